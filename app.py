@@ -9,7 +9,7 @@ from auth import handle_authentication, render_auth_sidebar_info, render_google_
 from backend import call_gemini_api, get_document_content
 from docs.knowledge import O1, EB1
 from prompt import SYSTEM_PROMPT
-from ui.display_results import display_analysis_results
+from ui.display_results import display_analysis_results, LiveIssueFeed
 from ui.database_ui import (
     render_full_analysis_history,
     render_database_management,
@@ -34,7 +34,8 @@ def initialize_session_state():
         'document_source_url': None,
         'show_full_history': False,
         'show_db_management': False,
-        'current_user_email': None
+        'current_user_email': None,
+        'live_results': True
     }
 
     for key, default_value in session_defaults.items():
@@ -130,6 +131,14 @@ def render_sidebar(auth_enabled, token):
 
         st.markdown("---")
 
+        st.session_state.live_results = st.checkbox(
+            "Show issues as they are found",
+            value=st.session_state.live_results,
+            help="Render issues progressively while the analysis is running"
+        )
+
+        st.markdown("---")
+
     return api_key
 
 
@@ -196,6 +205,7 @@ def process_document_analysis(api_key, doc_url, uploaded_file, oauth_manager):
     with st.spinner("Processing your document..."):
         progress_bar = st.progress(0)
         status_text = st.empty()
+        live_feed = None
 
         # Create status callback to update UI in real-time
         def status_callback(message):
@@ -237,7 +247,21 @@ def process_document_analysis(api_key, doc_url, uploaded_file, oauth_manager):
             status_text.text("Analyzing with Gemini AI...")
             progress_bar.progress(75)
 
-            result = call_gemini_api(doc_content, api_key, final_prompt, status_callback)
+            # Show issues as soon as they are streamed; the final list replaces them below
+            live_feed = LiveIssueFeed() if st.session_state.live_results else None
+            result = None
+            try:
+                result = call_gemini_api(
+                    doc_content,
+                    api_key,
+                    final_prompt,
+                    status_callback,
+                    issue_callback=live_feed.add_issue if live_feed else None
+                )
+            finally:
+                # Drops merged-away cards, or all of them when the analysis fails
+                if live_feed:
+                    live_feed.finalize(result)
             
             if result is None:
                 logging.error("Gemini API returned None")
@@ -276,14 +300,18 @@ def process_document_analysis(api_key, doc_url, uploaded_file, oauth_manager):
                     )
                     save_current_analysis_to_db(file_url, file_name, st.session_state.current_user_email, result)
 
-            # Clear progress
+            # Clear progress; the full results are rendered below
             progress_bar.empty()
             status_text.empty()
+            if live_feed:
+                live_feed.clear()
             logging.info("Analysis completed")
 
         except Exception as e:
             progress_bar.empty()
             status_text.empty()
+            if live_feed:
+                live_feed.clear()
             error_msg = str(e)
             
             # Error logging
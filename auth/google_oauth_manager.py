@@ -1,9 +1,10 @@
 """Google OAuth2 Manager for handling Google API authentication and document access"""
-import requests
 import streamlit as st
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+
+from docs.google_api import get_google_service
+from docs.http_session import get_http_session
 
 
 class GoogleOAuthManager:
@@ -49,7 +50,7 @@ class GoogleOAuthManager:
         credentials = self.get_credentials()
         if credentials and credentials.expired and credentials.refresh_token:
             try:
-                credentials.refresh(Request())
+                credentials.refresh(Request(session=get_http_session()))
                 # Update token in session state
                 st.session_state['token']['access_token'] = credentials.token
                 print("[INFO] OAuth2 credentials refreshed")
@@ -80,7 +81,7 @@ class GoogleOAuthManager:
 
         try:
             # Build Google Docs API service with user credentials
-            service = build('docs', 'v1', credentials=credentials)
+            service = get_google_service('docs', 'v1', credentials)
 
             # Get document content
             document = service.documents().get(documentId=doc_id).execute()
@@ -105,18 +106,16 @@ class GoogleOAuthManager:
                 try:
                     export_url = f"https://docs.google.com/document/d/{doc_id}/export?format=txt"
 
-                    # Use OAuth2 credentials to make authenticated request
-                    authed_session = requests.Session()
-
                     # Refresh credentials if needed
                     if not self.refresh_credentials():
                         raise Exception("Failed to refresh credentials")
 
-                    authed_session.headers.update({
-                        'Authorization': f'Bearer {credentials.token}'
-                    })
-
-                    response = authed_session.get(export_url, timeout=30)
+                    # Use OAuth2 credentials to make authenticated request on the shared session
+                    response = get_http_session().get(
+                        export_url,
+                        headers={'Authorization': f'Bearer {credentials.token}'},
+                        timeout=30
+                    )
                     if response.status_code == 200:
                         return response.text
                     elif response.status_code == 403:
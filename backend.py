@@ -1,14 +1,54 @@
 import json
 import logging
+import os
+import queue
 import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import pandas as pd
-import requests
-from google import genai
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-
+from tenacity import (
+    retry,
+    retry_if_exception,
+    retry_if_exception_type,
+    retry_if_not_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+    wait_random
+)
+
+from docs.chunking import chunk_document, merge_issues
 from docs.document_processor import DocumentProcessor
-from prompt import get_gemini_prompt_config, get_gemini_config
+from docs.public_export import ExportFailed, fetch_public_export
+from llm import (
+    RateLimitTimeout,
+    estimate_tokens,
+    get_client_pool_stats,
+    get_context_cache_manager,
+    get_gemini_client,
+    get_rate_limiter,
+    get_response_cache,
+    get_single_flight,
+    is_cached_content_error,
+    make_cache_key,
+    plan_request,
+    stream_issues
+)
+from prompt import get_default_system_prompt, get_gemini_prompt_config, get_gemini_config
+
+# Upper bound on chunk requests that are in flight against Gemini at the same time
+MAX_CONCURRENT_CHUNKS = int(os.environ.get("GEMINI_MAX_CONCURRENT_CHUNKS", "4"))
+# Trailing text repeated at the start of the next chunk so issues on a boundary are not lost
+CHUNK_OVERLAP_CHARS = int(os.environ.get("GEMINI_CHUNK_OVERLAP_CHARS", "2000"))
+
+
+
+class ChunkCancelled(Exception):
+    """Raised in a chunk worker once another chunk of the same document has failed"""
+
+
+# A rejected context cache fails the same way on every attempt; it is retried inline instead
+_retry_unless_stale_context_cache = retry_if_exception(lambda e: not is_cached_content_error(e))
 
 
 def extract_google_doc_id(url):
@@ -123,84 +163,126 @@ def fetch_doc_content(doc_url, oauth_manager=None, status_callback=None):
             # Fall back to public access if OAuth fails
             pass
 
-    # Try public export in different formats
-    export_formats = [
-        f"https://docs.google.com/document/d/{doc_id}/export?format=txt",
-        f"https://docs.google.com/document/d/{doc_id}/export?format=docx",
-        f"https://docs.google.com/document/u/0/d/{doc_id}/export?format=txt"
+    # Try both plain-text export URLs at once; the first to answer wins
+    txt_formats = [
+        ("txt", f"https://docs.google.com/document/d/{doc_id}/export?format=txt"),
+        ("txt_u0", f"https://docs.google.com/document/u/0/d/{doc_id}/export?format=txt")
     ]
-
-    for i, export_url in enumerate(export_formats):
-        try:
-            if status_callback:
-                status_callback(f"Trying export format {i+1}/{len(export_formats)}...")
-            response = requests.get(export_url, timeout=30)
-            
-            if response.status_code == 200:
-                if 'txt' in export_url:
-                    # Add page markers to text content
-                    return add_page_markers_to_text(response.text)
-                else:
-                    # For docx return binary content (will be processed by DocumentProcessor)
-                    return response.content
-        except Exception:
-            continue
+    try:
+        result = fetch_public_export(doc_id, txt_formats, status_callback)
+        # Add page markers to text content
+        return add_page_markers_to_text(result.text)
+    except ExportFailed as e:
+        logging.info(f"Public text export of {doc_id} failed: {e}")
+
+    # DOCX is not raced against the text exports: the document text (and the response
+    # cache key) would then depend on which format happened to answer first
+    try:
+        if status_callback:
+            status_callback("Trying DOCX export...")
+        result = fetch_public_export(
+            doc_id, [("docx", f"https://docs.google.com/document/d/{doc_id}/export?format=docx")]
+        )
+        # Page markers are added from the document's page breaks
+        return DocumentProcessor().extract_text_from_docx(result.content)
+    except ExportFailed as e:
+        logging.info(f"Public DOCX export of {doc_id} failed: {e}")
 
     error_msg = "Could not fetch document content. Make sure the document is publicly accessible or authenticate with Google."
     logging.error(error_msg)
     raise Exception(error_msg)
 
 
+def _generate_with_context_cache(api_key, model, system_prompt, generate):
+    """Call generate(config), referencing a context cache for the system prompt when enabled.
+
+    If Gemini rejects the cache (expired or deleted server-side), it is forgotten
+    and the call is retried once with the system prompt sent inline.
+    """
+    manager = get_context_cache_manager(api_key, model, lambda: get_gemini_client(api_key))
+    if manager is None:
+        return generate(get_gemini_config(system_prompt))
+
+    prompt = system_prompt or get_default_system_prompt()
+    cached_content = manager.get_cached_content(prompt)
+    try:
+        return generate(get_gemini_config(system_prompt, cached_content=cached_content))
+    except Exception as e:
+        if cached_content is None or not is_cached_content_error(e):
+            raise
+        logging.warning(f"Gemini rejected context cache {cached_content}, retrying with the prompt inline: {str(e)}")
+        manager.invalidate(prompt)
+        return generate(get_gemini_config(system_prompt))
+
+
 def _create_retry_callback(status_callback, call_type):
     """Create retry callback that updates UI"""
     def retry_callback(retry_state):
         sleep_time = retry_state.next_action.sleep
         attempt = retry_state.attempt_number
-        message = f"API attempt {attempt} failed, retrying {call_type} in {sleep_time} seconds..."
+        message = f"API attempt {attempt} failed, retrying {call_type} in {sleep_time:.1f} seconds..."
         logging.info(message)
         if status_callback:
             status_callback(message)
     return retry_callback
 
 
-def _call_gemini_streaming(client, model, contents, config, status_callback=None):
-    """Call Gemini API with streaming using tenacity retry"""
+def _wait_for_quota(request_tokens, status_callback=None):
+    """Block until the shared rate limiter admits one Gemini request of the given token cost"""
+    limiter = get_rate_limiter()
+    if limiter is not None:
+        limiter.acquire(request_tokens, status_callback)
+
+
+def _call_gemini_streaming(client, model, contents, config, status_callback=None, issue_callback=None,
+                           request_tokens=1):
+    """Call Gemini API with streaming using tenacity retry.
+
+    issue_callback(issue, index) is called for every issue as soon as its JSON
+    object is complete; index restarts at 0 if the stream is retried.
+    """
     
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type((ConnectionError, TimeoutError, Exception)),
+        wait=wait_exponential(multiplier=1, min=2, max=10) + wait_random(0, 2),
+        retry=retry_if_exception_type((ConnectionError, TimeoutError, Exception))
+        & retry_if_not_exception_type(RateLimitTimeout)
+        & _retry_unless_stale_context_cache,
         before_sleep=_create_retry_callback(status_callback, "streaming API call")
     )
     def _do_streaming_call():
+        _wait_for_quota(request_tokens, status_callback)
         logging.info("Attempting streaming API call")
         if status_callback:
             status_callback("Calling Gemini API (streaming)...")
         
-        result = ""
-        for chunk in client.models.generate_content_stream(
+        fragments = (
+            chunk.text
+            for chunk in client.models.generate_content_stream(
                 model=model,
                 contents=contents,
                 config=config,
-        ):
-            if chunk.text:
-                result += chunk.text
-        
-        return result
+            )
+            if chunk.text
+        )
+        return stream_issues(fragments, issue_callback)
     
     return _do_streaming_call()
 
 
-def _call_gemini_non_streaming(client, model, contents, config, status_callback=None):
+def _call_gemini_non_streaming(client, model, contents, config, status_callback=None, request_tokens=1):
     """Call Gemini API without streaming using tenacity retry"""
     
     @retry(
         stop=stop_after_attempt(2),
-        wait=wait_exponential(multiplier=1, min=1, max=5),
-        retry=retry_if_exception_type((ConnectionError, TimeoutError, Exception)),
+        wait=wait_exponential(multiplier=1, min=1, max=5) + wait_random(0, 2),
+        retry=retry_if_exception_type((ConnectionError, TimeoutError, Exception))
+        & retry_if_not_exception_type(RateLimitTimeout)
+        & _retry_unless_stale_context_cache,
         before_sleep=_create_retry_callback(status_callback, "non-streaming API call")
     )
     def _do_non_streaming_call():
+        _wait_for_quota(request_tokens, status_callback)
         logging.info("Attempting non-streaming API call")
         if status_callback:
             status_callback("Calling Gemini API (non-streaming)...")
@@ -222,8 +304,13 @@ def _call_gemini_non_streaming(client, model, contents, config, status_callback=
     return _do_non_streaming_call()
 
 
-def call_gemini_api(doc_content, api_key, system_prompt=None, status_callback=None):
-    """Call Gemini API for document analysis using custom or default system prompt"""
+def call_gemini_api(doc_content, api_key, system_prompt=None, status_callback=None, max_concurrent_chunks=None,
+                    issue_callback=None):
+    """Call Gemini API for document analysis using custom or default system prompt.
+
+    When issue_callback is given, it is called as issue_callback(issue, index)
+    for each issue while the response is still streaming.
+    """
     
     # Check for None values that could cause concatenation errors
     if doc_content is None:
@@ -233,25 +320,80 @@ def call_gemini_api(doc_content, api_key, system_prompt=None, status_callback=No
     if api_key is None:
         logging.error("api_key is None")
         raise ValueError("API key cannot be None")
-    
-    # Check if document is too large and split if necessary
-    max_content_length = 800000  # ~800k characters limit
-    if len(doc_content) > max_content_length:
-        logging.info(f"Document is large ({len(doc_content)} chars), splitting into chunks")
+
+    cache = get_response_cache()
+    flight = get_single_flight()
+    if cache is None and flight is None:
+        return _call_gemini_uncached(
+            doc_content, api_key, system_prompt, status_callback, max_concurrent_chunks, issue_callback
+        )
+
+    model = get_gemini_prompt_config("")["model"]
+    cache_key = make_cache_key(doc_content, system_prompt, model, get_gemini_config(system_prompt))
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            logging.info(f"Gemini response cache hit: {cache.stats()}")
+            if status_callback:
+                status_callback("Loaded analysis from cache")
+            return cached
+
+    def _analyze():
+        result = _call_gemini_uncached(
+            doc_content, api_key, system_prompt, status_callback, max_concurrent_chunks, issue_callback
+        )
+        if cache is not None:
+            # Only cache well-formed responses so a truncated stream is not served again
+            try:
+                json.loads(result)
+                cache.set(cache_key, result)
+            except (TypeError, ValueError):
+                logging.info("Gemini response is not valid JSON, not caching it")
+        return result
+
+    if flight is None:
+        return _analyze()
+    # The same document and prompt analyzed from several sessions at once shares one call
+    return flight.do(cache_key, _analyze, on_wait=status_callback)
+
+
+def _call_gemini_uncached(doc_content, api_key, system_prompt=None, status_callback=None, max_concurrent_chunks=None,
+                          issue_callback=None):
+    """Call Gemini API, splitting documents that exceed the model's token budget into chunks"""
+    client = get_gemini_client(api_key)
+    logging.info(f"Gemini client pool: {get_client_pool_stats()}")
+    model = get_gemini_prompt_config("")["model"]
+
+    # Decide single call vs chunking from token counts, not characters
+    plan = plan_request(
+        doc_content, system_prompt or get_default_system_prompt(), model, client, CHUNK_OVERLAP_CHARS
+    )
+    logging.info(f"Token plan: {plan.describe()}")
+    if plan.chunked:
         if status_callback:
-            status_callback("Document is large, processing in chunks...")
-        return _process_large_document(doc_content, api_key, system_prompt, max_content_length, status_callback)
-    
-    # Prepare client and configs
-    client = genai.Client(api_key=api_key)
-    prompt_config = get_gemini_prompt_config(doc_content)
-    generation_config = get_gemini_config(system_prompt)
-    contents = prompt_config["contents"]
-    model = prompt_config["model"]
-    
-    # Try streaming first, then fallback to non-streaming
+            status_callback(f"Document is large (~{plan.document_tokens} tokens), processing in chunks...")
+        return _process_large_document(
+            doc_content, api_key, system_prompt, plan.chunk_chars, status_callback, max_concurrent_chunks,
+            issue_callback
+        )
+
+    contents = get_gemini_prompt_config(doc_content)["contents"]
+    request_tokens = plan.document_tokens + plan.prompt_tokens
+    return _generate_with_context_cache(
+        api_key, model, system_prompt,
+        lambda generation_config: _call_gemini_with_fallback(
+            client, model, contents, generation_config, status_callback, issue_callback, request_tokens
+        )
+    )
+
+
+def _call_gemini_with_fallback(client, model, contents, generation_config, status_callback=None, issue_callback=None,
+                               request_tokens=1):
+    """Try streaming first, then fall back to non-streaming on network errors"""
     try:
-        return _call_gemini_streaming(client, model, contents, generation_config, status_callback)
+        return _call_gemini_streaming(
+            client, model, contents, generation_config, status_callback, issue_callback, request_tokens
+        )
     except Exception as streaming_error:
         error_msg = str(streaming_error)
         if any(keyword in error_msg.lower() for keyword in ["disconnected", "timeout", "connection", "remote"]):
@@ -260,7 +402,9 @@ def call_gemini_api(doc_content, api_key, system_prompt=None, status_callback=No
             if status_callback:
                 status_callback("Streaming failed, trying non-streaming approach...")
             try:
-                return _call_gemini_non_streaming(client, model, contents, generation_config, status_callback)
+                return _call_gemini_non_streaming(
+                    client, model, contents, generation_config, status_callback, request_tokens
+                )
             except Exception as final_error:
                 logging.error(f"All API approaches failed. Final error: {str(final_error)}")
                 import traceback
@@ -279,70 +423,157 @@ def call_gemini_api(doc_content, api_key, system_prompt=None, status_callback=No
             raise streaming_error
 
 
-def _process_large_document(doc_content, api_key, system_prompt, max_length, status_callback=None):
-    """Process large document by splitting it into chunks"""
-    
-    # Split document into chunks
-    chunk_size = max_length - 10000  # Leave room for prompt
-    chunks = []
+def _process_large_document(doc_content, api_key, system_prompt, chunk_chars, status_callback=None,
+                            max_concurrency=None, issue_callback=None):
+    """Process large document by splitting it into chunks and analyzing them concurrently"""
     
-    for i in range(0, len(doc_content), chunk_size):
-        chunk = doc_content[i:i + chunk_size]
-        chunks.append(chunk)
+    # Split document into page-aligned chunks sized by the token plan
+    chunks = chunk_document(doc_content, chunk_chars, CHUNK_OVERLAP_CHARS)
     
-    logging.info(f"Split document into {len(chunks)} chunks")
+    logging.info(
+        f"Split document into {len(chunks)} chunks: "
+        + ", ".join(f"#{c.index + 1} {c.page_range} [{c.start}:{c.end}]" for c in chunks)
+    )
     if status_callback:
         status_callback(f"Split document into {len(chunks)} chunks")
-    
+
+    chunk_results = _run_chunks_concurrently(
+        chunks, api_key, system_prompt, status_callback, max_concurrency, issue_callback
+    )
+
+    # Combine in chunk order regardless of completion order
     all_results = []
-    
-    for i, chunk in enumerate(chunks):
-        try:
-            logging.info(f"Processing chunk {i+1}/{len(chunks)}")
-            if status_callback:
-                status_callback(f"Processing chunk {i+1}/{len(chunks)}...")
-            
-            # Modify system prompt to indicate this is a chunk
-            chunk_prompt = system_prompt + f"\n\nNote: This is part {i+1} of {len(chunks)} of a larger document."
-            
-            # Process each chunk with the regular function (but force single attempt)
-            result = _call_gemini_single_chunk(chunk, api_key, chunk_prompt, status_callback)
-            
-            if result:
-                try:
-                    # Parse JSON result
-                    chunk_results = json.loads(result)
-                    if isinstance(chunk_results, list):
-                        all_results.extend(chunk_results)
-                    else:
-                        all_results.append(chunk_results)
-                except json.JSONDecodeError:
-                    logging.error(f"Failed to parse chunk {i+1} results as JSON")
-                    
-        except Exception as e:
-            logging.error(f"Failed to process chunk {i+1}: {str(e)}")
-            if status_callback:
-                status_callback(f"Warning: chunk {i+1} failed, continuing...")
-            continue
+    for results in chunk_results:
+        if results:
+            all_results.extend(results)
+
+    # Overlapping chunks report the same issues more than once
+    merged_results = merge_issues(all_results)
+    logging.info(f"Merged {len(all_results)} chunk issues into {len(merged_results)} unique issues")
     
     # Return combined results as JSON
-    return json.dumps(all_results, ensure_ascii=False, indent=2)
+    return json.dumps(merged_results, ensure_ascii=False, indent=2)
+
+
+def _run_chunks_concurrently(chunks, api_key, system_prompt, status_callback=None, max_concurrency=None,
+                             issue_callback=None):
+    """Run chunk analysis with a bounded number of in-flight requests, results indexed by chunk.
+
+    issue_callback(issue, index) is called on this thread for each issue of a chunk as soon
+    as that chunk finishes; the final list is still deduplicated by the caller.
+    """
+    total = len(chunks)
+    max_workers = max(1, min(max_concurrency or MAX_CONCURRENT_CHUNKS, total))
+    results_by_index = [None] * total
+
+    # Worker threads must not touch the UI directly (Streamlit elements are bound to the
+    # script thread), so their status messages are queued and emitted from this thread.
+    messages = queue.Queue()
+    worker_callback = messages.put if status_callback else None
+
+    if status_callback:
+        status_callback(f"Processing {total} chunks ({max_workers} in parallel)...")
+
+    completed = 0
+    issues_emitted = 0
+    cancelled = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gemini-chunk")
+    try:
+        futures = {
+            executor.submit(_process_chunk, i, total, chunk, api_key, system_prompt, worker_callback, cancelled): i
+            for i, chunk in enumerate(chunks)
+        }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            _drain_status_messages(messages, status_callback)
+
+            for future in done:
+                i = futures[future]
+                completed += 1
+                try:
+                    results_by_index[i] = future.result()
+                    logging.info(f"Chunk {i+1}/{total} finished ({completed}/{total} complete)")
+                    if status_callback:
+                        status_callback(f"Chunk {i+1}/{total} finished ({completed}/{total} complete)")
+                    if issue_callback:
+                        for issue in results_by_index[i]:
+                            issue_callback(issue, issues_emitted)
+                            issues_emitted += 1
+                except Exception as e:
+                    logging.error(f"Failed to process chunk {i+1}: {str(e)}")
+                    # A partial result would read as "no issues" in the missing pages (and be
+                    # cached as such), so one failed chunk fails the whole analysis
+                    cancelled.set()
+                    _drain_status_messages(messages, status_callback)
+                    raise Exception(f"Analysis of chunk {i+1}/{total} failed: {e}") from e
+    finally:
+        # Do not wait for chunks still in flight: queued ones are dropped, running ones stop
+        # before their next request and their results are discarded
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    _drain_status_messages(messages, status_callback)
+    return results_by_index
+
+
+def _drain_status_messages(messages, status_callback):
+    """Forward status messages queued by worker threads"""
+    while True:
+        try:
+            message = messages.get_nowait()
+        except queue.Empty:
+            return
+        if status_callback:
+            status_callback(message)
+
+
+def _process_chunk(index, total, chunk, api_key, system_prompt, status_callback=None, cancelled=None):
+    """Analyze a single chunk and return its parsed issues"""
+    logging.info(f"Processing chunk {index+1}/{total} ({chunk.page_range})")
+
+    # The chunk note goes into the user content so the system prompt is identical
+    # for every chunk and can be served from the context cache
+    chunk_text = (
+        f"Note: This is part {index+1} of {total} of a larger document, "
+        f"covering {chunk.page_range}.\n\n{chunk.text}"
+    )
 
+    result = _call_gemini_single_chunk(chunk_text, api_key, system_prompt, status_callback, cancelled)
 
-def _call_gemini_single_chunk(doc_content, api_key, system_prompt, status_callback=None):
-    """Call Gemini API for a single chunk with tenacity retry"""
+    try:
+        # Parse JSON result
+        chunk_results = json.loads(result or "")
+    except json.JSONDecodeError as e:
+        # An empty or truncated reply must not be merged (and cached) as "no issues on these pages"
+        logging.error(f"Failed to parse chunk {index+1} results as JSON")
+        raise ValueError(f"Chunk {index+1}/{total} response is not valid JSON") from e
+
+    if isinstance(chunk_results, list):
+        return chunk_results
+    return [chunk_results]
+
+
+def _call_gemini_single_chunk(doc_content, api_key, system_prompt, status_callback=None, cancelled=None):
+    """Call Gemini API for a single chunk with tenacity retry.
+
+    Once the cancelled event is set, no further attempt is sent and ChunkCancelled is raised.
+    """
+    request_tokens = estimate_tokens(doc_content) + estimate_tokens(system_prompt or get_default_system_prompt())
     
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=8),
-        retry=retry_if_exception_type((ConnectionError, TimeoutError, Exception)),
+        wait=wait_exponential(multiplier=1, min=1, max=8) + wait_random(0, 2),
+        retry=retry_if_exception_type((ConnectionError, TimeoutError, Exception))
+        & retry_if_not_exception_type((RateLimitTimeout, ChunkCancelled))
+        & _retry_unless_stale_context_cache,
         before_sleep=_create_retry_callback(status_callback, "chunk processing")
     )
-    def _do_chunk_call():
-        client = genai.Client(api_key=api_key)
+    def _do_chunk_call(generation_config):
+        _wait_for_quota(request_tokens, status_callback)
+        if cancelled is not None and cancelled.is_set():
+            raise ChunkCancelled("Another chunk failed")
+        client = get_gemini_client(api_key)
         
-        prompt_config = get_gemini_prompt_config(doc_content)
-        generation_config = get_gemini_config(system_prompt)
         contents = prompt_config["contents"]
         
         # Use non-streaming for chunks (more reliable)
@@ -359,7 +590,8 @@ def _call_gemini_single_chunk(doc_content, api_key, system_prompt, status_callba
         else:
             return str(response)
     
-    return _do_chunk_call()
+    prompt_config = get_gemini_prompt_config(doc_content)
+    return _generate_with_context_cache(api_key, prompt_config["model"], system_prompt, _do_chunk_call)
 
 
 def convert_to_csv(json_data):
@@ -469,23 +701,44 @@ def process_google_drive_file(url_or_id, oauth_manager=None, status_callback=Non
         raise
 
 
+def _fetch_flight_key(source_type, source_data, oauth_manager=None):
+    """In-flight key for a Google fetch; includes the user so private files are never shared"""
+    user = "public"
+    if oauth_manager and oauth_manager.is_authenticated():
+        user = oauth_manager.get_user_email() or "authenticated"
+    return f"fetch:{source_type}:{user}:{source_data}"
+
+
+def _fetch_google_document(source_type, source_data, oauth_manager=None, status_callback=None):
+    if source_type == "google_docs":
+        if status_callback:
+            status_callback("Accessing Google Docs...")
+        return fetch_doc_content(source_data, oauth_manager, status_callback)
+
+    if status_callback:
+        status_callback("Accessing Google Drive...")
+    # Try public access first, then authenticated if needed
+    try:
+        return fetch_doc_content(source_data, oauth_manager, status_callback)
+    except Exception:
+        if status_callback:
+            status_callback("Trying authenticated Google Drive access...")
+        return process_google_drive_file(source_data, oauth_manager, status_callback)
+
+
 def get_document_content(source_type, source_data, oauth_manager=None, status_callback=None):
     """Get document content from various sources"""
     try:
-        if source_type == "google_docs":
-            if status_callback:
-                status_callback("Accessing Google Docs...")
-            return fetch_doc_content(source_data, oauth_manager, status_callback)
-        elif source_type == "google_drive":
-            if status_callback:
-                status_callback("Accessing Google Drive...")
-            # Try public access first, then authenticated if needed
-            try:
-                return fetch_doc_content(source_data, oauth_manager, status_callback)
-            except Exception:
-                if status_callback:
-                    status_callback("Trying authenticated Google Drive access...")
-                return process_google_drive_file(source_data, oauth_manager, status_callback)
+        if source_type in ("google_docs", "google_drive"):
+            flight = get_single_flight()
+            if flight is None:
+                return _fetch_google_document(source_type, source_data, oauth_manager, status_callback)
+            # The same link opened in several tabs is downloaded once
+            return flight.do(
+                _fetch_flight_key(source_type, source_data, oauth_manager),
+                lambda: _fetch_google_document(source_type, source_data, oauth_manager, status_callback),
+                on_wait=status_callback,
+            )
         elif source_type == "uploaded_file":
             if status_callback:
                 status_callback("Processing uploaded file...")
@@ -1,5 +1,24 @@
 """Documents processing module"""
 
+from .chunking import DocumentChunk, chunk_document
 from .document_processor import DocumentProcessor
+from .drive_cache import drive_revision_key, get_drive_text_cache
+from .google_api import GoogleServiceCache, get_discovery_document, get_google_service
+from .http_session import get_http_session
+from .public_export import ExportFailed, ExportResult, PublicExportFetcher, fetch_public_export
 
-__all__ = ['DocumentProcessor']
\ No newline at end of file
+__all__ = [
+    'DocumentProcessor',
+    'DocumentChunk',
+    'chunk_document',
+    'drive_revision_key',
+    'get_drive_text_cache',
+    'GoogleServiceCache',
+    'get_discovery_document',
+    'get_google_service',
+    'get_http_session',
+    'ExportFailed',
+    'ExportResult',
+    'PublicExportFetcher',
+    'fetch_public_export'
+]
@@ -1,15 +1,23 @@
 import io
 import logging
+import os
 import re
+import tempfile
 from typing import Union, BinaryIO, Optional
 
 import PyPDF2
 import docx
-import requests
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseDownload
 
+from .drive_cache import REVISION_FIELDS, drive_revision_key, get_drive_text_cache
+from .google_api import get_google_service
+from .public_export import ExportFailed, fetch_public_export
+
+# Bytes per ranged request of a Drive download, and how much is kept in memory before it spools to disk
+DOWNLOAD_CHUNK_BYTES = int(os.environ.get("GOOGLE_DOWNLOAD_CHUNK_BYTES", str(32 * 1024 * 1024)))
+DOWNLOAD_SPOOL_MAX_BYTES = int(os.environ.get("GOOGLE_DOWNLOAD_SPOOL_MAX_BYTES", str(8 * 1024 * 1024)))
+
 
 class DocumentProcessor:
     """Class for processing various types of documents"""
@@ -24,7 +32,7 @@ class DocumentProcessor:
         """Load Google Drive service with OAuth2 credentials"""
         try:
             if self.credentials:
-                self.drive_service = build("drive", "v3", credentials=self.credentials, cache_discovery=False)
+                self.drive_service = get_google_service("drive", "v3", self.credentials)
         except Exception as e:
             print(f"Error loading Drive service: {e}")
 
@@ -74,9 +82,11 @@ class DocumentProcessor:
             raise Exception(f"Error processing PDF file: {e}")
 
     @staticmethod
-    def extract_text_from_txt(file_content: Union[bytes, str]) -> str:
+    def extract_text_from_txt(file_content: Union[bytes, str, BinaryIO]) -> str:
         """Extract text from TXT file"""
         try:
+            if not isinstance(file_content, (bytes, str)):
+                file_content = file_content.read()
             if isinstance(file_content, bytes):
                 # Try to detect encoding
                 encodings = ['utf-8', 'utf-16', 'cp1251', 'latin-1']
@@ -154,38 +164,61 @@ class DocumentProcessor:
             raise Exception("Google Drive API not initialized. Please authenticate with Google.")
 
         try:
-            # Get file metadata
+            # Get only the revision metadata first; an unchanged file is served from the cache
             file_metadata = self.drive_service.files().get(
                 fileId=file_id,
-                supportsAllDrives=True
+                supportsAllDrives=True,
+                fields=REVISION_FIELDS
             ).execute()
 
-            file_name = file_metadata.get('name', '')
-            mime_type = file_metadata.get('mimeType', '')
+            cache = get_drive_text_cache()
+            cache_key = drive_revision_key(file_id, file_metadata) if cache else None
+            if cache_key:
+                cached_text = cache.get(cache_key)
+                if cached_text is not None:
+                    logging.info(f"Drive file {file_id} unchanged since last extraction, using cached text")
+                    return cached_text
 
-            # If this is Google Docs, export as DOCX
-            if mime_type == 'application/vnd.google-apps.document':
-                request = self.drive_service.files().export_media(
-                    fileId=file_id,
-                    mimeType='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-                )
+            text = self._download_and_extract(file_id, file_metadata)
+            if cache_key:
+                cache.set(cache_key, text)
+            return text
+
+        except Exception as e:
+            error_msg = str(e).lower()
+            if "not found" in error_msg or "permission" in error_msg or "forbidden" in error_msg:
+                raise Exception(
+                    "File access denied. You don't have permission to access this file, or it doesn't exist.")
             else:
-                # For regular files use get_media
-                request = self.drive_service.files().get_media(
-                    fileId=file_id,
-                    supportsAllDrives=True
-                )
-
-            # Download file
-            fh = io.BytesIO()
-            downloader = MediaIoBaseDownload(fh, request)
+                raise Exception(f"Error downloading file from Google Drive: {e}")
+
+    def _download_and_extract(self, file_id: str, file_metadata: dict) -> str:
+        """Download a Drive file and extract its text"""
+        file_name = file_metadata.get('name', '')
+        mime_type = file_metadata.get('mimeType', '')
+
+        # If this is Google Docs, export as DOCX
+        if mime_type == 'application/vnd.google-apps.document':
+            request = self.drive_service.files().export_media(
+                fileId=file_id,
+                mimeType='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+            )
+        else:
+            # For regular files use get_media
+            request = self.drive_service.files().get_media(
+                fileId=file_id,
+                supportsAllDrives=True
+            )
+
+        # Download file in large ranged requests; big files spill over to a temporary file
+        with tempfile.SpooledTemporaryFile(max_size=DOWNLOAD_SPOOL_MAX_BYTES) as file_content:
+            downloader = MediaIoBaseDownload(file_content, request, chunksize=DOWNLOAD_CHUNK_BYTES)
             done = False
             while not done:
                 status, done = downloader.next_chunk()
 
-            # Process content
-            fh.seek(0)
-            file_content = fh.read()
+            # Extractors read the downloaded file in place instead of a copy of its bytes
+            file_content.seek(0)
 
             # Determine file type and process
             if mime_type == 'application/vnd.google-apps.document' or file_name.lower().endswith('.docx'):
@@ -200,16 +233,9 @@ class DocumentProcessor:
                     return self.extract_text_from_docx(file_content)
                 except:
                     # If that fails, try as text
+                    file_content.seek(0)
                     return self.extract_text_from_txt(file_content)
 
-        except Exception as e:
-            error_msg = str(e).lower()
-            if "not found" in error_msg or "permission" in error_msg or "forbidden" in error_msg:
-                raise Exception(
-                    "File access denied. You don't have permission to access this file, or it doesn't exist.")
-            else:
-                raise Exception(f"Error downloading file from Google Drive: {e}")
-
     def process_google_drive_url(self, url_or_id: str) -> str:
         """Process Google Drive URL or ID with public access fallback"""
         if url_or_id is None:
@@ -246,35 +272,34 @@ class DocumentProcessor:
     def _try_public_google_drive_access(self, file_id: str) -> str:
         """Try to access Google Drive file as public document"""
         
-        # Try different public access URLs
+        # Try different public access URLs at once; the first to answer wins
         public_urls = [
-            f"https://drive.google.com/uc?export=download&id={file_id}",
-            f"https://docs.google.com/document/d/{file_id}/export?format=txt",
-            f"https://docs.google.com/document/d/{file_id}/export?format=docx",
-            f"https://docs.google.com/presentation/d/{file_id}/export?format=txt",
-            f"https://docs.google.com/spreadsheets/d/{file_id}/export?format=csv"
+            ("download", f"https://drive.google.com/uc?export=download&id={file_id}"),
+            ("document_txt", f"https://docs.google.com/document/d/{file_id}/export?format=txt"),
+            ("document_docx", f"https://docs.google.com/document/d/{file_id}/export?format=docx"),
+            ("presentation_txt", f"https://docs.google.com/presentation/d/{file_id}/export?format=txt"),
+            ("spreadsheet_csv", f"https://docs.google.com/spreadsheets/d/{file_id}/export?format=csv")
         ]
-        
-        for url in public_urls:
-            try:
-                response = requests.get(url, timeout=30)
-                if response.status_code == 200 and response.content:
-                    # Handle different content types
-                    if 'txt' in url or 'csv' in url:
-                        return response.text
-                    elif 'docx' in url:
-                        return self.extract_text_from_docx(response.content)
-                    else:
-                        # Try to detect file type from content
-                        content = response.content
-                        if content.startswith(b'PK'):  # ZIP/DOCX signature
-                            return self.extract_text_from_docx(content)
-                        elif content.startswith(b'%PDF'):  # PDF signature
-                            return self.extract_text_from_pdf(content)
-                        else:
-                            # Try as text
-                            return content.decode('utf-8', errors='ignore')
-            except Exception:
-                continue
-        
+
+        try:
+            result = fetch_public_export(file_id, public_urls)
+        except ExportFailed as e:
+            logging.info(f"Public access to {file_id} failed: {e}")
+        else:
+            # Handle different content types
+            if result.fmt.endswith(('_txt', '_csv')):
+                return result.text
+            elif result.fmt.endswith('_docx'):
+                return self.extract_text_from_docx(result.content)
+            else:
+                # Try to detect file type from content
+                content = result.content
+                if content.startswith(b'PK'):  # ZIP/DOCX signature
+                    return self.extract_text_from_docx(content)
+                elif content.startswith(b'%PDF'):  # PDF signature
+                    return self.extract_text_from_pdf(content)
+                else:
+                    # Try as text
+                    return content.decode('utf-8', errors='ignore')
+
         raise Exception("Could not access file as public document. File may be private or does not exist.")
\ No newline at end of file
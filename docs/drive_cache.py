@@ -0,0 +1,74 @@
+"""Extracted text of Drive files, keyed by file revision"""
+import hashlib
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from llm.response_cache import (
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    ResponseCache,
+    SQLiteCacheBackend
+)
+
+# Backend for extracted Drive text: off | memory | sqlite | redis
+DRIVE_CACHE_BACKEND = os.environ.get("DRIVE_TEXT_CACHE_BACKEND", "memory")
+DRIVE_CACHE_TTL_SECONDS = int(os.environ.get("DRIVE_TEXT_CACHE_TTL_SECONDS", str(7 * 86400)))
+DRIVE_CACHE_MAX_ENTRIES = int(os.environ.get("DRIVE_TEXT_CACHE_MAX_ENTRIES", "128"))
+DRIVE_CACHE_PATH = os.environ.get("DRIVE_TEXT_CACHE_PATH", "drive_text_cache.db")
+
+# Only what is needed to decide whether the file changed since it was last extracted
+REVISION_FIELDS = "id,name,mimeType,modifiedTime,md5Checksum,headRevisionId,version"
+
+
+def drive_revision_key(file_id: str, metadata: Dict[str, Any]) -> Optional[str]:
+    """Cache key for one revision of a Drive file, or None if its revision cannot be told.
+
+    Uploaded files carry md5Checksum and headRevisionId; Google Docs have neither,
+    but their version number increases with every change. Name and MIME type are
+    part of the key because they choose the extractor.
+    """
+    revision = metadata.get("md5Checksum") or metadata.get("headRevisionId")
+    if revision is None and metadata.get("version") is not None:
+        revision = f"v{metadata['version']}:{metadata.get('modifiedTime', '')}"
+    if not revision:
+        return None
+    digest = hashlib.sha256()
+    for part in (file_id, revision, metadata.get("mimeType", ""), metadata.get("name", "")):
+        data = str(part).encode("utf-8")
+        # Length prefix keeps the key unambiguous across field boundaries
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_drive_text_cache() -> Optional[ResponseCache]:
+    """Return the process-wide extracted-text cache, or None if it is disabled"""
+    global _cache
+    if DRIVE_CACHE_BACKEND == "off":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            backend = None
+            if DRIVE_CACHE_BACKEND == "redis":
+                try:
+                    import redis
+
+                    url = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+                    backend = RedisCacheBackend(
+                        redis.Redis.from_url(url), max_entries=DRIVE_CACHE_MAX_ENTRIES, prefix="drive_text:"
+                    )
+                except ImportError:
+                    logging.error("DRIVE_TEXT_CACHE_BACKEND=redis requires the 'redis' package, using memory cache")
+            elif DRIVE_CACHE_BACKEND == "sqlite":
+                backend = SQLiteCacheBackend(DRIVE_CACHE_PATH, max_entries=DRIVE_CACHE_MAX_ENTRIES)
+
+            if backend is None:
+                backend = MemoryCacheBackend(max_entries=DRIVE_CACHE_MAX_ENTRIES)
+            _cache = ResponseCache(backend, ttl_seconds=DRIVE_CACHE_TTL_SECONDS)
+        return _cache
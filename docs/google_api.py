@@ -0,0 +1,125 @@
+"""Process-wide Google API discovery documents and service objects"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import google_auth_httplib2
+import httplib2
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.http import HttpRequest
+
+# Service objects kept for distinct credentials (users), least recently used evicted first
+SERVICE_CACHE_SIZE = int(os.environ.get("GOOGLE_SERVICE_CACHE_SIZE", "64"))
+
+_discovery_documents: Dict[str, Dict[str, Any]] = {}
+_discovery_lock = threading.Lock()
+
+
+def get_discovery_document(api: str, version: str) -> Optional[Dict[str, Any]]:
+    """Return the parsed discovery document shipped with google-api-python-client.
+
+    build() reads the same bundled documents, but loads and parses the JSON
+    again for every service it creates; here each one is parsed once per process.
+    """
+    key = f"{api}.{version}"
+    with _discovery_lock:
+        document = _discovery_documents.get(key)
+        if document is None:
+            raw = get_static_doc(api, version)
+            if raw is None:
+                return None
+            document = json.loads(raw)
+            _discovery_documents[key] = document
+        return document
+
+
+def _thread_local_request_builder(credentials):
+    """Request builder giving each thread its own authorized connection.
+
+    httplib2 connections are not thread-safe, so a service object shared by
+    Streamlit sessions (or worker threads) must not share one Http instance.
+    """
+    local = threading.local()
+
+    def build_request(_http, *args, **kwargs):
+        http = getattr(local, "http", None)
+        if http is None:
+            http = google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http())
+            local.http = http
+        return HttpRequest(http, *args, **kwargs)
+
+    return build_request
+
+
+class GoogleServiceCache:
+    """Hand out one Google API service object per (API, version, credentials).
+
+    Building a service from a discovery document is cheap once the document is
+    parsed, but not free; reusing it means a fetch only pays for the actual
+    file request. Credentials are identified by their client id and refresh
+    token (or access token), so a user who logs in again in another session
+    reuses the service. Credentials with neither get a fresh, uncached service.
+    """
+
+    def __init__(self, max_size: int = SERVICE_CACHE_SIZE):
+        self.max_size = max(1, max_size)
+        self._services: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(api: str, version: str, credentials) -> Optional[str]:
+        identity = getattr(credentials, "refresh_token", None) or getattr(credentials, "token", None)
+        if not identity:
+            # Object ids are reused once the credentials are garbage collected
+            return None
+        raw = f"{api}.{version}:{getattr(credentials, 'client_id', '')}:{identity}"
+        # Never keep raw tokens around as dictionary keys
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, api: str, version: str, credentials):
+        """Return the shared service for these credentials, building it on first use"""
+        key = self._key(api, version, credentials)
+        if key is None:
+            return self._build(api, version, credentials)
+        with self._lock:
+            service = self._services.get(key)
+            if service is not None:
+                self._services.move_to_end(key)
+                return service
+
+        service = self._build(api, version, credentials)
+        with self._lock:
+            self._services[key] = service
+            self._services.move_to_end(key)
+            while len(self._services) > self.max_size:
+                self._services.popitem(last=False)
+        return service
+
+    @staticmethod
+    def _build(api: str, version: str, credentials):
+        request_builder = _thread_local_request_builder(credentials)
+        document = get_discovery_document(api, version)
+        if document is None:
+            logging.warning(f"No bundled discovery document for {api} {version}, fetching it")
+            return build(
+                api, version, credentials=credentials, cache_discovery=False, static_discovery=False,
+                requestBuilder=request_builder
+            )
+        return build_from_document(document, credentials=credentials, requestBuilder=request_builder)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._services.clear()
+
+
+_service_cache = GoogleServiceCache()
+
+
+def get_google_service(api: str, version: str, credentials):
+    """Return the process-wide shared Google API service for the given credentials"""
+    return _service_cache.get(api, version, credentials)
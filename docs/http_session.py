@@ -0,0 +1,31 @@
+"""Process-wide keep-alive HTTP session for outbound Google requests"""
+import os
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Hosts with their own connection pool, and connections kept open per host
+HTTP_POOL_CONNECTIONS = int(os.environ.get("GOOGLE_HTTP_POOL_CONNECTIONS", "10"))
+HTTP_POOL_MAXSIZE = int(os.environ.get("GOOGLE_HTTP_POOL_MAXSIZE", "32"))
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Return the shared session, so exports and token refreshes reuse open TCP/TLS connections.
+
+    The session is shared by every Streamlit session thread: pass per-user
+    headers (e.g. Authorization) with each request, never on the session.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
@@ -0,0 +1,165 @@
+"""Race public Google export URLs and remember which format works per document"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from .http_session import get_http_session
+
+# Time budget shared by all export URLs of one fetch
+EXPORT_DEADLINE_SECONDS = float(os.environ.get("GOOGLE_EXPORT_DEADLINE_SECONDS", "30"))
+# Documents whose working export format is remembered, least recently used forgotten first
+EXPORT_FORMAT_MEMORY_SIZE = int(os.environ.get("GOOGLE_EXPORT_FORMAT_MEMORY_SIZE", "1024"))
+# The remembered format is requested alone for this long before the others join the race
+EXPORT_HEDGE_DELAY_SECONDS = float(os.environ.get("GOOGLE_EXPORT_HEDGE_DELAY_SECONDS", "2"))
+
+_READ_CHUNK_BYTES = 64 * 1024
+
+
+class ExportResult(NamedTuple):
+    """Body of the export URL that answered first"""
+    fmt: str
+    url: str
+    content: bytes
+    encoding: Optional[str]
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+class ExportFailed(Exception):
+    """No export URL returned the document before the deadline"""
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class PublicExportFetcher:
+    """Fetch a public Google document from whichever export URL answers first.
+
+    All candidate URLs are requested at the same time under one shared
+    deadline; once one returns the document, the others stop reading and
+    close their connections. The winning format is remembered per document
+    id, so the next fetch of that document requests that URL first and starts
+    the rest in the same race only if it fails or has not answered within
+    hedge_delay_seconds; a stalled URL cannot use up the whole deadline.
+    """
+
+    def __init__(self, deadline_seconds: float = EXPORT_DEADLINE_SECONDS,
+                 memory_size: int = EXPORT_FORMAT_MEMORY_SIZE,
+                 hedge_delay_seconds: float = EXPORT_HEDGE_DELAY_SECONDS):
+        self.deadline_seconds = deadline_seconds
+        self.memory_size = max(1, memory_size)
+        self.hedge_delay_seconds = hedge_delay_seconds
+        self._formats: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def remembered_format(self, doc_id: str) -> Optional[str]:
+        with self._lock:
+            fmt = self._formats.get(doc_id)
+            if fmt is not None:
+                self._formats.move_to_end(doc_id)
+            return fmt
+
+    def _remember(self, doc_id: str, fmt: Optional[str]) -> None:
+        with self._lock:
+            if fmt is None:
+                self._formats.pop(doc_id, None)
+                return
+            self._formats[doc_id] = fmt
+            self._formats.move_to_end(doc_id)
+            while len(self._formats) > self.memory_size:
+                self._formats.popitem(last=False)
+
+    def fetch(self, doc_id: str, candidates: List[Tuple[str, str]],
+              status_callback: Optional[Callable[[str], None]] = None) -> ExportResult:
+        """Return the first successful export among (format, url) candidates"""
+        deadline = time.monotonic() + self.deadline_seconds
+        hedge_delay = None
+        known = self.remembered_format(doc_id)
+        if known is not None and any(fmt == known for fmt, _ in candidates):
+            # Stable sort: the remembered URL first, the others keep their order
+            candidates = sorted(candidates, key=lambda candidate: candidate[0] != known)
+            hedge_delay = self.hedge_delay_seconds
+        elif status_callback:
+            status_callback(f"Trying {len(candidates)} export formats in parallel...")
+
+        result = self._race(candidates, deadline, hedge_delay)
+        if known is not None and result.fmt != known:
+            logging.info(f"Remembered export format '{known}' lost for {doc_id} to '{result.fmt}'")
+        self._remember(doc_id, result.fmt)
+        return result
+
+    def _race(self, candidates: List[Tuple[str, str]], deadline: float,
+              hedge_delay: Optional[float] = None) -> ExportResult:
+        """First successful download; with hedge_delay, only the first candidate starts at once.
+
+        The others are started once it fails or after hedge_delay seconds.
+        """
+        if not candidates:
+            raise ExportFailed("No export URLs to try")
+        cancelled = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=len(candidates), thread_name_prefix="export")
+        later = candidates[1:] if hedge_delay is not None else []
+        hedge_at = time.monotonic() + (hedge_delay or 0.0)
+        try:
+            pending = {
+                executor.submit(self._download, fmt, url, deadline, cancelled)
+                for fmt, url in candidates[:len(candidates) - len(later)]
+            }
+            while pending or later:
+                now = time.monotonic()
+                if later and (not pending or now >= hedge_at):
+                    pending |= {
+                        executor.submit(self._download, fmt, url, deadline, cancelled)
+                        for fmt, url in later
+                    }
+                    later = []
+                remaining = deadline - now
+                if remaining <= 0:
+                    break
+                timeout = min(remaining, hedge_at - now) if later else remaining
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        return future.result()
+            raise ExportFailed(f"No export URL answered within {self.deadline_seconds:.0f}s")
+        finally:
+            # Losers notice at their next chunk and close their connections
+            cancelled.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _download(fmt: str, url: str, deadline: float, cancelled: threading.Event) -> ExportResult:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or cancelled.is_set():
+            raise _Cancelled()
+        with get_http_session().get(url, timeout=remaining, stream=True) as response:
+            if response.status_code != 200:
+                raise ExportFailed(f"{url} returned {response.status_code}")
+            # Private documents redirect to a sign-in page instead of failing
+            if "text/html" in response.headers.get("Content-Type", ""):
+                raise ExportFailed(f"{url} returned a web page instead of the document")
+            chunks = []
+            for chunk in response.iter_content(_READ_CHUNK_BYTES):
+                if cancelled.is_set() or time.monotonic() > deadline:
+                    raise _Cancelled()
+                chunks.append(chunk)
+            content = b"".join(chunks)
+            if not content:
+                raise ExportFailed(f"{url} returned an empty document")
+            return ExportResult(fmt, url, content, response.encoding)
+
+
+_fetcher = PublicExportFetcher()
+
+
+def fetch_public_export(doc_id: str, candidates: List[Tuple[str, str]],
+                        status_callback: Optional[Callable[[str], None]] = None) -> ExportResult:
+    """Race the export URLs of a public document with the process-wide format memory"""
+    return _fetcher.fetch(doc_id, candidates, status_callback)
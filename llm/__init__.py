@@ -0,0 +1,51 @@
+"""Gemini integration module: caching and request infrastructure"""
+
+from .client_pool import GeminiClientPool, get_client_pool_stats, get_gemini_client
+from .context_cache import ContextCacheManager, get_context_cache_manager, is_cached_content_error
+from .json_stream import IssueStreamParser, iter_issues, stream_issues
+from .rate_limiter import (
+    InProcessRateLimiter,
+    RateLimiter,
+    RateLimitTimeout,
+    RedisRateLimiter,
+    get_rate_limiter
+)
+from .response_cache import (
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    ResponseCache,
+    SQLiteCacheBackend,
+    get_response_cache,
+    make_cache_key
+)
+from .single_flight import SingleFlight, get_single_flight
+from .token_budget import ModelLimits, TokenPlan, estimate_tokens, plan_request
+
+__all__ = [
+    'GeminiClientPool',
+    'get_client_pool_stats',
+    'get_gemini_client',
+    'ContextCacheManager',
+    'get_context_cache_manager',
+    'is_cached_content_error',
+    'IssueStreamParser',
+    'iter_issues',
+    'stream_issues',
+    'InProcessRateLimiter',
+    'RateLimiter',
+    'RateLimitTimeout',
+    'RedisRateLimiter',
+    'get_rate_limiter',
+    'MemoryCacheBackend',
+    'RedisCacheBackend',
+    'ResponseCache',
+    'SQLiteCacheBackend',
+    'get_response_cache',
+    'make_cache_key',
+    'SingleFlight',
+    'get_single_flight',
+    'ModelLimits',
+    'TokenPlan',
+    'estimate_tokens',
+    'plan_request'
+]
@@ -0,0 +1,77 @@
+"""Process-wide registry of long-lived Gemini clients"""
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from google import genai
+
+
+class GeminiClientPool:
+    """Hand out one shared genai.Client per API key.
+
+    Each genai.Client keeps its own HTTP client with a keep-alive connection
+    pool, so sharing the instance lets consecutive analyses, chunks and retries
+    reuse open TCP/TLS connections instead of paying setup on every call.
+    """
+
+    def __init__(self, client_factory: Optional[Callable[[str], Any]] = None):
+        self._client_factory = client_factory or (lambda api_key: genai.Client(api_key=api_key))
+        self._clients: Dict[str, Any] = {}
+        self._clients_created = 0
+        self._lookups_reused = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(api_key: str) -> str:
+        # Never keep raw API keys around as dictionary keys
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+    def get(self, api_key: str):
+        """Return the shared client for an API key, creating it on first use"""
+        if not api_key:
+            raise ValueError("API key cannot be empty")
+        key = self._key(api_key)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._client_factory(api_key)
+                self._clients[key] = client
+                self._clients_created += 1
+                logging.info(f"Created shared Gemini client ({len(self._clients)} in pool)")
+            else:
+                self._lookups_reused += 1
+            return client
+
+    def discard(self, api_key: str) -> None:
+        """Drop the client for an API key, e.g. after the key was rotated"""
+        with self._lock:
+            self._clients.pop(self._key(api_key), None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Client lookup statistics for logging and diagnostics.
+
+        These count lookups served by an already pooled client, not HTTP
+        connections; connection reuse happens inside each client's transport.
+        """
+        with self._lock:
+            total = self._clients_created + self._lookups_reused
+            return {
+                "clients": len(self._clients),
+                "clients_created": self._clients_created,
+                "lookups_reused": self._lookups_reused,
+                "lookup_reuse_rate": self._lookups_reused / total if total else 0.0,
+            }
+
+
+_pool = GeminiClientPool()
+
+
+def get_gemini_client(api_key: str):
+    """Return the process-wide shared Gemini client for an API key"""
+    return _pool.get(api_key)
+
+
+def get_client_pool_stats() -> Dict[str, Any]:
+    """Return client lookup statistics of the process-wide Gemini client pool"""
+    return _pool.stats()
@@ -0,0 +1,136 @@
+"""Gemini explicit context caching for the static system prompt prefix"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from google.genai import types
+
+# Register the system prompt (+ knowledge) as cached content instead of re-sending it
+CONTEXT_CACHE_ENABLED = os.environ.get("GEMINI_CONTEXT_CACHE", "").lower() in ("1", "true", "yes")
+CONTEXT_CACHE_TTL_SECONDS = int(os.environ.get("GEMINI_CONTEXT_CACHE_TTL_SECONDS", "3600"))
+# Extend the TTL when a cache is used this close to its expiry
+CONTEXT_CACHE_REFRESH_MARGIN_SECONDS = int(os.environ.get("GEMINI_CONTEXT_CACHE_REFRESH_MARGIN_SECONDS", "300"))
+# After a failed create (e.g. prompt below the model's minimum cacheable size) wait before retrying
+CONTEXT_CACHE_FAILURE_BACKOFF_SECONDS = 600
+
+_STALE_CACHE_MARKERS = ("not found", "expired", "permission denied", "404", "403")
+
+
+@dataclass
+class _CacheEntry:
+    name: Optional[str]
+    expires_at: float
+
+
+class ContextCacheManager:
+    """Create, reuse and refresh cached-content resources for system prompts.
+
+    The client only needs a ``caches`` attribute with ``create`` and ``update``
+    methods, so a fake client can be passed in tests.
+    """
+
+    def __init__(self, client, model: str, ttl_seconds: int = CONTEXT_CACHE_TTL_SECONDS,
+                 refresh_margin_seconds: int = CONTEXT_CACHE_REFRESH_MARGIN_SECONDS,
+                 clock: Callable[[], float] = time.time):
+        self.client = client
+        self.model = model
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.clock = clock
+        self._entries: Dict[str, _CacheEntry] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _prompt_key(system_prompt: str) -> str:
+        return hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+
+    def get_cached_content(self, system_prompt: str) -> Optional[str]:
+        """Return the cached-content name for the prompt, creating or refreshing it as needed.
+
+        Returns None when the prompt cannot be cached; callers then send it inline.
+        """
+        if not system_prompt:
+            return None
+
+        key = self._prompt_key(system_prompt)
+        with self._lock:
+            now = self.clock()
+            entry = self._entries.get(key)
+
+            if entry is not None and entry.name is None and now < entry.expires_at:
+                return None
+            if entry is not None and entry.name and now < entry.expires_at - self.refresh_margin_seconds:
+                return entry.name
+            if entry is not None and entry.name and now < entry.expires_at:
+                if self._refresh(entry):
+                    return entry.name
+
+            return self._create(key, system_prompt)
+
+    def _create(self, key: str, system_prompt: str) -> Optional[str]:
+        try:
+            cached = self.client.caches.create(
+                model=self.model,
+                config=types.CreateCachedContentConfig(
+                    display_name=f"system-prompt-{key[:16]}",
+                    system_instruction=system_prompt,
+                    ttl=f"{self.ttl_seconds}s",
+                ),
+            )
+        except Exception as e:
+            logging.error(f"Failed to create Gemini context cache, sending prompt inline: {str(e)}")
+            self._entries[key] = _CacheEntry(None, self.clock() + CONTEXT_CACHE_FAILURE_BACKOFF_SECONDS)
+            return None
+
+        self._entries[key] = _CacheEntry(cached.name, self.clock() + self.ttl_seconds)
+        logging.info(f"Created Gemini context cache {cached.name} (ttl {self.ttl_seconds}s)")
+        return cached.name
+
+    def _refresh(self, entry: _CacheEntry) -> bool:
+        try:
+            self.client.caches.update(
+                name=entry.name,
+                config=types.UpdateCachedContentConfig(ttl=f"{self.ttl_seconds}s"),
+            )
+        except Exception as e:
+            # The resource may have been deleted server-side; a new one will be created
+            logging.error(f"Failed to refresh Gemini context cache {entry.name}: {str(e)}")
+            return False
+
+        entry.expires_at = self.clock() + self.ttl_seconds
+        logging.info(f"Refreshed Gemini context cache {entry.name}")
+        return True
+
+    def invalidate(self, system_prompt: str) -> None:
+        """Forget the cache for a prompt, e.g. after the server rejected its handle"""
+        with self._lock:
+            self._entries.pop(self._prompt_key(system_prompt), None)
+
+
+def is_cached_content_error(error: BaseException) -> bool:
+    """True if Gemini rejected a request because its cached content expired or was deleted"""
+    message = str(error).lower()
+    if not any(name in message for name in ("cachedcontent", "cached content", "cached_content")):
+        return False
+    return any(marker in message for marker in _STALE_CACHE_MARKERS)
+
+
+_managers: Dict[str, ContextCacheManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_context_cache_manager(api_key: str, model: str, client_factory) -> Optional[ContextCacheManager]:
+    """Return the process-wide context cache manager for an API key, or None if disabled"""
+    if not CONTEXT_CACHE_ENABLED:
+        return None
+    key = f"{model}:{hashlib.sha256(api_key.encode('utf-8')).hexdigest()}"
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = ContextCacheManager(client_factory(), model)
+            _managers[key] = manager
+        return manager
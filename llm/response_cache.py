@@ -0,0 +1,275 @@
+"""Content-addressed cache of Gemini responses"""
+import contextlib
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional, Protocol, Tuple
+
+# Backend for cached Gemini responses: off | memory | sqlite | redis
+CACHE_BACKEND = os.environ.get("GEMINI_CACHE_BACKEND", "memory")
+CACHE_TTL_SECONDS = int(os.environ.get("GEMINI_CACHE_TTL_SECONDS", "86400"))
+CACHE_MAX_ENTRIES = int(os.environ.get("GEMINI_CACHE_MAX_ENTRIES", "256"))
+CACHE_PATH = os.environ.get("GEMINI_CACHE_PATH", "gemini_cache.db")
+
+
+def normalize_document_text(text) -> str:
+    """Normalize text so cosmetic differences do not defeat the cache"""
+    if isinstance(text, bytes):
+        text = text.decode("utf-8", errors="replace")
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+    return "\n".join(line.rstrip() for line in text.split("\n")).strip()
+
+
+def _config_fingerprint(generation_config: Any) -> str:
+    if generation_config is None:
+        return ""
+    if hasattr(generation_config, "model_dump_json"):
+        return generation_config.model_dump_json(exclude_none=True)
+    return repr(generation_config)
+
+
+def make_cache_key(document_text: str, system_prompt: Optional[str], model: str, generation_config: Any = None) -> str:
+    """Content address of a Gemini request: document, prompt, model and generation config"""
+    digest = hashlib.sha256()
+    for part in (
+        normalize_document_text(document_text),
+        system_prompt or "",
+        model,
+        _config_fingerprint(generation_config),
+    ):
+        data = part.encode("utf-8")
+        # Length prefix keeps the key unambiguous across field boundaries
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> Optional[str]: ...
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+class MemoryCacheBackend:
+    """In-process LRU with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCacheBackend:
+    """On-disk cache shared by all processes on one host"""
+
+    def __init__(self, path: str, max_entries: int = 256):
+        self.path = path
+        self.max_entries = max_entries
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS gemini_response_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_gemini_response_cache_accessed "
+                "ON gemini_response_cache (accessed_at)"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM gemini_response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                conn.execute("DELETE FROM gemini_response_cache WHERE key = ?", (key,))
+                return None
+            conn.execute(
+                "UPDATE gemini_response_cache SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            return row[0]
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO gemini_response_cache "
+                "(key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl_seconds, now),
+            )
+            conn.execute("DELETE FROM gemini_response_cache WHERE expires_at <= ?", (now,))
+            conn.execute(
+                """
+                DELETE FROM gemini_response_cache WHERE key IN (
+                    SELECT key FROM gemini_response_cache
+                    ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM gemini_response_cache")
+
+
+class RedisCacheBackend:
+    """Cache shared across hosts; entries expire via Redis TTL, size is bounded by LRU order"""
+
+    def __init__(self, client: Any, max_entries: int = 256, prefix: str = "gemini_cache:"):
+        self.client = client
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self._index = f"{prefix}index"
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            self.client.zrem(self._index, key)
+            return None
+        self.client.zadd(self._index, {key: time.time()})
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        pipe = self.client.pipeline()
+        pipe.set(self.prefix + key, value, ex=ttl_seconds)
+        pipe.zadd(self._index, {key: time.time()})
+        pipe.execute()
+
+        overflow = self.client.zcard(self._index) - self.max_entries
+        if overflow > 0:
+            evicted = self.client.zrange(self._index, 0, overflow - 1)
+            if evicted:
+                keys = [k.decode("utf-8") if isinstance(k, bytes) else k for k in evicted]
+                pipe = self.client.pipeline()
+                pipe.delete(*[self.prefix + k for k in keys])
+                pipe.zrem(self._index, *keys)
+                pipe.execute()
+
+    def clear(self) -> None:
+        keys = self.client.zrange(self._index, 0, -1)
+        if keys:
+            decoded = [k.decode("utf-8") if isinstance(k, bytes) else k for k in keys]
+            self.client.delete(*[self.prefix + k for k in decoded])
+        self.client.delete(self._index)
+
+
+class ResponseCache:
+    """Content-addressed cache of Gemini responses with hit/miss counters"""
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: int = 86400):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def _count(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            value = self.backend.get(key)
+        except Exception as exc:
+            # A broken cache must never fail the analysis itself
+            logging.error(f"Response cache read failed: {exc}")
+            self._count("errors")
+            value = None
+        self._count("hits" if value is not None else "misses")
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        try:
+            self.backend.set(key, value, self.ttl_seconds)
+        except Exception as exc:
+            logging.error(f"Response cache write failed: {exc}")
+            self._count("errors")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide response cache, or None if caching is disabled"""
+    global _cache
+    if CACHE_BACKEND == "off":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            backend = None
+            if CACHE_BACKEND == "redis":
+                try:
+                    import redis
+
+                    url = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+                    backend = RedisCacheBackend(redis.Redis.from_url(url), max_entries=CACHE_MAX_ENTRIES)
+                except ImportError:
+                    logging.error("GEMINI_CACHE_BACKEND=redis requires the 'redis' package, using memory cache")
+            elif CACHE_BACKEND == "sqlite":
+                backend = SQLiteCacheBackend(CACHE_PATH, max_entries=CACHE_MAX_ENTRIES)
+
+            if backend is None:
+                backend = MemoryCacheBackend(max_entries=CACHE_MAX_ENTRIES)
+            _cache = ResponseCache(backend, ttl_seconds=CACHE_TTL_SECONDS)
+        return _cache
@@ -0,0 +1,88 @@
+"""Coalesce identical concurrent requests into one computation"""
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+# Identical analyses running at the same time share one Gemini call: memory | off
+SINGLE_FLIGHT_BACKEND = os.environ.get("GEMINI_SINGLE_FLIGHT_BACKEND", "memory").lower()
+
+
+class _Call:
+    """One running computation and the callers waiting for it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """In-flight registry: the first caller for a key computes, later callers wait for its result.
+
+    A key stays registered only while its computation runs, so this never
+    serves stale results; long-term reuse is the response cache's job. If the
+    computation fails, every waiting caller receives the same exception.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any], on_wait: Optional[Callable[[str], None]] = None) -> Any:
+        """Return fn()'s result, running it only if no identical call is already in flight"""
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = _Call()
+                    self._calls[key] = call
+                else:
+                    call.followers += 1
+            if leader:
+                return self._lead(key, call, fn)
+
+            logging.info(f"Joined in-flight request {key[:12]} ({call.followers} waiting)")
+            if on_wait:
+                on_wait("An identical analysis is already running, waiting for its result...")
+            call.done.wait()
+            if call.error is None:
+                return call.result
+            if isinstance(call.error, Exception):
+                raise call.error
+            # The leader was interrupted (e.g. its session stopped), not failed; take over
+
+    def _lead(self, key: str, call: _Call, fn: Callable[[], Any]) -> Any:
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+            if call.followers:
+                logging.info(f"In-flight request {key[:12]} served {call.followers} identical callers")
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+_single_flight: Optional[SingleFlight] = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> Optional[SingleFlight]:
+    """Return the process-wide in-flight registry, or None if coalescing is disabled"""
+    global _single_flight
+    if SINGLE_FLIGHT_BACKEND == "off":
+        return None
+    with _single_flight_lock:
+        if _single_flight is None:
+            _single_flight = SingleFlight()
+        return _single_flight
@@ -0,0 +1,178 @@
+"""Token budget planning: decide between a single Gemini call and chunked processing"""
+import logging
+import math
+import os
+import re
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+
+@dataclass(frozen=True)
+class ModelLimits:
+    """Context limits of a Gemini model in tokens"""
+    input_tokens: int
+    output_tokens: int
+
+
+MODEL_LIMITS: Dict[str, ModelLimits] = {
+    "gemini-2.5-pro": ModelLimits(input_tokens=1_048_576, output_tokens=65_536),
+    "gemini-2.5-flash": ModelLimits(input_tokens=1_048_576, output_tokens=65_536),
+}
+DEFAULT_MODEL_LIMITS = ModelLimits(input_tokens=1_048_576, output_tokens=65_536)
+
+# Share of the input window kept free to absorb estimation error
+TOKEN_SAFETY_MARGIN = float(os.environ.get("GEMINI_TOKEN_SAFETY_MARGIN", "0.1"))
+# Expected response size per document token (issues are short compared to the source text)
+OUTPUT_TOKENS_PER_INPUT_TOKEN = float(os.environ.get("GEMINI_OUTPUT_TOKENS_PER_INPUT_TOKEN", "0.08"))
+# Output tokens reserved for the model's thinking, which count against the output limit
+THINKING_TOKEN_RESERVE = int(os.environ.get("GEMINI_THINKING_TOKEN_RESERVE", "16384"))
+# Ask the API for an exact count when the local estimate is this close to the budget
+EXACT_TOKEN_COUNT = os.environ.get("GEMINI_EXACT_TOKEN_COUNT", "").lower() in ("1", "true", "yes")
+EXACT_COUNT_BAND = 0.3
+
+# Runs of one script class; each class has its own chars-per-token ratio
+_TOKEN_CLASS_PATTERN = re.compile(
+    r'(?P<ascii>[A-Za-z]+)'
+    r'|(?P<digits>\d+)'
+    '|(?P<cjk>[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+)'
+    r'|(?P<letters>[^\W\d_]+)'
+    r'|(?P<symbol>[^\w\s])'
+    r'|(?P<newline>\n)'
+)
+_CHARS_PER_TOKEN = {
+    "ascii": 4.0,
+    "digits": 1.0,  # numbers are split into single digits
+    "cjk": 1.0,
+    "letters": 2.5,  # Cyrillic, Greek, accented Latin words
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of text without calling the API.
+
+    Latin words average about four characters per token, but Cyrillic words,
+    digits in tables and citations, and punctuation cost noticeably more, so
+    each run of characters is weighted by its script.
+    """
+    if not text:
+        return 0
+    tokens = 0
+    for match in _TOKEN_CLASS_PATTERN.finditer(text):
+        kind = match.lastgroup
+        ratio = _CHARS_PER_TOKEN.get(kind)
+        if ratio is None:
+            tokens += 1
+        else:
+            tokens += math.ceil((match.end() - match.start()) / ratio)
+    return tokens
+
+
+def count_tokens(client, model: str, text: str) -> Optional[int]:
+    """Count tokens exactly through the API, returning None if the call fails"""
+    try:
+        response = client.models.count_tokens(model=model, contents=text)
+        return int(response.total_tokens)
+    except Exception as e:
+        logging.error(f"Exact token count failed, using local estimate: {str(e)}")
+        return None
+
+
+@dataclass(frozen=True)
+class TokenPlan:
+    """How a document will be sent to the model, with the numbers behind the decision"""
+    model: str
+    strategy: str  # "single" or "chunked"
+    document_chars: int
+    document_tokens: int
+    prompt_tokens: int
+    exact: bool  # document_tokens came from the API rather than the estimate
+    input_limit: int
+    output_limit: int
+    input_budget: int  # document tokens that fit into one call
+    expected_output_tokens: int
+    chunk_count: int
+    chunk_tokens: int
+    chunk_chars: int
+
+    @property
+    def chunked(self) -> bool:
+        return self.strategy == "chunked"
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def describe(self) -> str:
+        """One-line summary for logs"""
+        source = "counted" if self.exact else "estimated"
+        summary = (
+            f"{self.model}: document {self.document_tokens} tokens ({source}, {self.document_chars} chars), "
+            f"prompt {self.prompt_tokens} tokens, budget {self.input_budget}/{self.input_limit} input tokens, "
+            f"~{self.expected_output_tokens}/{self.output_limit} output tokens -> {self.strategy}"
+        )
+        if self.chunked:
+            summary += f" into {self.chunk_count} chunks of ~{self.chunk_tokens} tokens ({self.chunk_chars} chars)"
+        return summary
+
+
+def _expected_output_tokens(document_tokens: int) -> int:
+    return THINKING_TOKEN_RESERVE + math.ceil(document_tokens * OUTPUT_TOKENS_PER_INPUT_TOKEN)
+
+
+def plan_request(document: str, system_prompt: str, model: str, client=None,
+                 overlap_chars: int = 0, limits: Optional[ModelLimits] = None) -> TokenPlan:
+    """Plan a request from the model's real token limits.
+
+    The document fits into a single call when it, the system prompt (including
+    any knowledge) and the safety margin fit into the input window and the
+    expected response fits into the output limit. Otherwise it is split into
+    the fewest evenly sized chunks that satisfy both limits. Pass a client to
+    count tokens exactly through the API when the estimate is borderline and
+    GEMINI_EXACT_TOKEN_COUNT is enabled.
+    """
+    limits = limits or MODEL_LIMITS.get(model, DEFAULT_MODEL_LIMITS)
+    prompt_tokens = estimate_tokens(system_prompt or "")
+    document_tokens = estimate_tokens(document)
+
+    input_budget = int(limits.input_tokens * (1 - TOKEN_SAFETY_MARGIN)) - prompt_tokens
+    # Largest document slice whose expected response still fits into the output limit
+    output_bound = int((limits.output_tokens - THINKING_TOKEN_RESERVE) / OUTPUT_TOKENS_PER_INPUT_TOKEN)
+    input_budget = max(1, min(input_budget, output_bound))
+
+    exact = False
+    borderline = abs(document_tokens - input_budget) <= input_budget * EXACT_COUNT_BAND
+    if client is not None and EXACT_TOKEN_COUNT and borderline:
+        counted = count_tokens(client, model, document)
+        if counted is not None:
+            document_tokens = counted
+            exact = True
+
+    chars_per_token = len(document) / document_tokens if document_tokens else 1.0
+
+    if document_tokens <= input_budget:
+        chunk_count = 1
+        chunk_tokens = document_tokens
+        chunk_chars = len(document)
+    else:
+        # Overlap repeats text in every chunk after the first
+        overlap_tokens = math.ceil(overlap_chars / chars_per_token)
+        per_chunk = max(1, input_budget - overlap_tokens)
+        chunk_count = math.ceil(document_tokens / per_chunk)
+        # Even chunks keep the concurrent calls about equally long
+        chunk_tokens = min(input_budget, math.ceil(document_tokens / chunk_count) + overlap_tokens)
+        chunk_chars = max(1, int(chunk_tokens * chars_per_token))
+
+    return TokenPlan(
+        model=model,
+        strategy="single" if chunk_count == 1 else "chunked",
+        document_chars=len(document),
+        document_tokens=document_tokens,
+        prompt_tokens=prompt_tokens,
+        exact=exact,
+        input_limit=limits.input_tokens,
+        output_limit=limits.output_tokens,
+        input_budget=input_budget,
+        expected_output_tokens=_expected_output_tokens(chunk_tokens),
+        chunk_count=chunk_count,
+        chunk_tokens=chunk_tokens,
+        chunk_chars=chunk_chars,
+    )
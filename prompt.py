@@ -197,10 +197,26 @@ def get_gemini_prompt_config(document_content):
     }
 
 
-def get_gemini_config(system_prompt=None):
-    """Returns the Gemini generation configuration with system prompt"""
+def get_default_system_prompt():
+    """Returns the default system prompt with the current date filled in"""
+    return SYSTEM_PROMPT.replace("{current_date}", datetime.now().strftime("%A, %B %d, %Y"))
+
+
+def get_gemini_config(system_prompt=None, cached_content=None):
+    """Returns the Gemini generation configuration with system prompt.
+
+    When cached_content names a context cache holding the system prompt, the
+    prompt is referenced through the cache instead of being sent inline.
+    """
     if system_prompt is None:
-        system_prompt = SYSTEM_PROMPT.replace("{current_date}", datetime.now().strftime("%A, %B %d, %Y"))
+        system_prompt = get_default_system_prompt()
+
+    if cached_content:
+        system_instruction = None
+    else:
+        system_instruction = [
+            types.Part.from_text(text=system_prompt),
+        ]
 
     return types.GenerateContentConfig(
         temperature=0.3,
@@ -237,7 +253,6 @@ def get_gemini_config(system_prompt=None):
                 },
             ),
         ),
-        system_instruction=[
-            types.Part.from_text(text=system_prompt),
-        ],
+        system_instruction=system_instruction,
+        cached_content=cached_content,
     )
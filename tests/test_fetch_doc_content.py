@@ -0,0 +1,93 @@
+import io
+import time
+
+import pytest
+
+backend = pytest.importorskip("backend")
+docx = pytest.importorskip("docx")
+
+from docs import public_export  # noqa: E402
+
+DOC_ID = "doc123"
+
+
+def _docx_bytes(text):
+    document = docx.Document()
+    document.add_paragraph(text)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+class FakeResponse:
+    def __init__(self, status_code, content, delay):
+        self.status_code = status_code
+        self.headers = {"Content-Type": "application/octet-stream"}
+        self.encoding = "utf-8"
+        self._content = content
+        self._delay = delay
+
+    def __enter__(self):
+        time.sleep(self._delay)
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def iter_content(self, chunk_size):
+        yield self._content
+
+
+class FakeSession:
+    """Answers export URLs by format with a fixed delay; records what was requested"""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.requested = []
+
+    def get(self, url, timeout=None, stream=False):
+        fmt = "docx" if "format=docx" in url else "txt_u0" if "/u/0/" in url else "txt"
+        self.requested.append(fmt)
+        status_code, content, delay = self.answers[fmt]
+        return FakeResponse(status_code, content, delay)
+
+
+@pytest.fixture
+def session(monkeypatch):
+    def install(answers):
+        fake = FakeSession(answers)
+        monkeypatch.setattr(public_export, "get_http_session", lambda: fake)
+        monkeypatch.setattr(public_export, "_fetcher", public_export.PublicExportFetcher(deadline_seconds=5))
+        return fake
+    return install
+
+
+def test_docx_answering_first_does_not_replace_the_text_export(session):
+    fake = session({
+        "docx": (200, _docx_bytes("From DOCX"), 0.0),
+        "txt": (200, b"From TXT", 0.2),
+        "txt_u0": (404, b"", 0.2),
+    })
+
+    content = backend.fetch_doc_content(f"https://docs.google.com/document/d/{DOC_ID}/edit")
+
+    assert isinstance(content, str)
+    assert content.startswith("=== PAGE 1 ===")
+    assert "From TXT" in content
+    assert "docx" not in fake.requested
+    assert backend.estimate_tokens(content) > 0
+
+
+def test_docx_fallback_is_converted_to_text(session):
+    fake = session({
+        "docx": (200, _docx_bytes("From DOCX"), 0.0),
+        "txt": (404, b"", 0.0),
+        "txt_u0": (500, b"", 0.0),
+    })
+
+    content = backend.fetch_doc_content(f"https://docs.google.com/document/d/{DOC_ID}/edit")
+
+    assert isinstance(content, str)
+    assert "=== PAGE 1 ===" in content
+    assert "From DOCX" in content
+    assert fake.requested[-1] == "docx"
@@ -0,0 +1,125 @@
+import pytest
+
+from llm.rate_limiter import InProcessRateLimiter, RateLimitTimeout, RedisRateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def fake_redis():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return fakeredis.FakeRedis()
+
+
+def _rewind_redis_bucket(client, seconds, prefix="gemini_rate:"):
+    """Pretend the bucket was last updated the given number of seconds earlier"""
+    updated = float(client.hget(f"{prefix}bucket", "updated"))
+    client.hset(f"{prefix}bucket", "updated", str(updated - seconds))
+
+
+def test_in_process_large_request_at_head_is_not_starved():
+    clock = FakeClock()
+    limiter = InProcessRateLimiter(100, 1000, clock=clock)
+
+    assert limiter._try_acquire("warm", 900) == (True, 1, 0.0)
+    # 100 tokens left: "big" waits for 700 more, "small" behind it for the demand of both
+    assert limiter._try_acquire("big", 800) == (False, 1, 42.0)
+    assert limiter._try_acquire("small", 50) == (False, 2, 45.0)
+
+    clock.now += 42
+    assert limiter._try_acquire("small", 50)[0] is False
+    assert limiter._try_acquire("big", 800) == (True, 1, 0.0)
+    clock.now += 3
+    assert limiter._try_acquire("small", 50) == (True, 1, 0.0)
+
+
+def test_in_process_request_slots_are_granted_in_arrival_order():
+    clock = FakeClock()
+    limiter = InProcessRateLimiter(2, 1000, clock=clock)
+
+    assert limiter._try_acquire("a", 1)[0] is True
+    assert limiter._try_acquire("b", 1)[0] is True
+    granted, position, wait = limiter._try_acquire("c", 1)
+    assert (granted, position) == (False, 1)
+    assert wait == pytest.approx(30.0)
+    assert limiter._try_acquire("d", 1)[1] == 2
+
+    clock.now += 30
+    assert limiter._try_acquire("d", 1)[0] is False
+    assert limiter._try_acquire("c", 1)[0] is True
+
+
+def test_in_process_acquire_waits_then_times_out_and_leaves_the_queue():
+    clock = FakeClock()
+    limiter = InProcessRateLimiter(60, 1000, max_wait_seconds=5, clock=clock, sleep=clock.sleep)
+    messages = []
+
+    limiter.acquire(1000)
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(1000, messages.append)
+
+    assert messages == []
+    assert not limiter._queue
+
+
+def test_in_process_oversized_request_drains_the_whole_bucket():
+    clock = FakeClock()
+    limiter = InProcessRateLimiter(60, 1000, clock=clock, sleep=clock.sleep)
+
+    limiter.acquire(5000)
+    assert limiter._tokens == 0
+
+
+def test_redis_large_request_at_head_is_not_starved(fake_redis):
+    limiter = RedisRateLimiter(fake_redis, 100, 1000)
+
+    assert limiter._try_acquire("warm", 900) == (True, 1, 0.0)
+    granted, position, wait = limiter._try_acquire("big", 800)
+    assert (granted, position) == (False, 1)
+    assert wait == pytest.approx(42.0, abs=0.5)
+    granted, position, wait = limiter._try_acquire("small", 50)
+    assert (granted, position) == (False, 2)
+    assert wait == pytest.approx(45.0, abs=0.5)
+    # Queued demand is kept per ticket until the ticket is granted
+    assert fake_redis.hgetall("gemini_rate:costs") == {b"big": b"800", b"small": b"50"}
+
+    _rewind_redis_bucket(fake_redis, 43)
+    assert limiter._try_acquire("small", 50)[0] is False
+    assert limiter._try_acquire("big", 800)[:2] == (True, 1)
+    _rewind_redis_bucket(fake_redis, 3)
+    assert limiter._try_acquire("small", 50)[:2] == (True, 1)
+    assert fake_redis.zcard("gemini_rate:queue") == 0
+    assert fake_redis.hgetall("gemini_rate:costs") == {}
+
+
+def test_redis_abandoned_ticket_releases_its_demand(fake_redis):
+    limiter = RedisRateLimiter(fake_redis, 100, 1000)
+
+    limiter._try_acquire("warm", 900)
+    limiter._try_acquire("big", 800)
+    limiter._abandon("big")
+
+    granted, position, wait = limiter._try_acquire("small", 50)
+    assert (granted, position) == (True, 1)
+    assert fake_redis.hgetall("gemini_rate:costs") == {}
+
+
+def test_redis_drops_waiters_that_stopped_polling(fake_redis):
+    limiter = RedisRateLimiter(fake_redis, 100, 1000, stale_after_seconds=30)
+
+    limiter._try_acquire("warm", 900)
+    limiter._try_acquire("crashed", 800)
+    fake_redis.zadd("gemini_rate:heartbeats", {"crashed": 0})
+
+    assert limiter._try_acquire("small", 50)[:2] == (True, 1)
+    assert fake_redis.zscore("gemini_rate:queue", "crashed") is None
@@ -0,0 +1,154 @@
+import pytest
+
+from llm import response_cache
+from llm.response_cache import (
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    ResponseCache,
+    SQLiteCacheBackend,
+    make_cache_key,
+    normalize_document_text
+)
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(response_cache, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def fake_redis():
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeRedis()
+
+
+def test_normalization_ignores_cosmetic_differences():
+    decomposed = "Café \r\nline two  \r\n\r\n"
+    assert normalize_document_text(decomposed) == "Café\nline two"
+    assert normalize_document_text(decomposed.encode("utf-8")) == "Café\nline two"
+    assert make_cache_key(decomposed, "p", "m") == make_cache_key("Café\nline two", "p", "m")
+
+
+def test_key_covers_every_field_without_ambiguity():
+    base = make_cache_key("doc", "prompt", "model")
+    assert make_cache_key("doc", "other", "model") != base
+    assert make_cache_key("doc", "prompt", "other") != base
+    assert make_cache_key("doc", "prompt", "model", {"temperature": 0.3}) != base
+    # Moving text across the document/prompt boundary must change the key
+    assert make_cache_key("ab", "c", "model") != make_cache_key("a", "bc", "model")
+    assert make_cache_key("doc", None, "model") == make_cache_key("doc", "", "model")
+
+
+def test_memory_backend_evicts_least_recently_used(clock):
+    backend = MemoryCacheBackend(max_entries=2)
+    backend.set("a", "1", 60)
+    backend.set("b", "2", 60)
+    assert backend.get("a") == "1"
+    backend.set("c", "3", 60)
+
+    assert backend.get("b") is None
+    assert backend.get("a") == "1"
+    assert backend.get("c") == "3"
+
+
+def test_memory_backend_expires_entries(clock):
+    backend = MemoryCacheBackend()
+    backend.set("a", "1", 60)
+    clock.now += 59
+    assert backend.get("a") == "1"
+    clock.now += 1
+    assert backend.get("a") is None
+
+
+def test_sqlite_backend_evicts_least_recently_accessed(tmp_path, clock):
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.db"), max_entries=2)
+    backend.set("a", "1", 60)
+    clock.now += 1
+    backend.set("b", "2", 60)
+    clock.now += 1
+    assert backend.get("a") == "1"
+    clock.now += 1
+    backend.set("c", "3", 60)
+
+    assert backend.get("b") is None
+    assert backend.get("a") == "1"
+    assert backend.get("c") == "3"
+
+
+def test_sqlite_backend_expires_entries_and_persists(tmp_path, clock):
+    path = str(tmp_path / "cache.db")
+    SQLiteCacheBackend(path).set("a", "1", 60)
+
+    reopened = SQLiteCacheBackend(path)
+    assert reopened.get("a") == "1"
+    clock.now += 60
+    assert reopened.get("a") is None
+
+    reopened.set("b", "2", 60)
+    reopened.clear()
+    assert reopened.get("b") is None
+
+
+def test_redis_backend_evicts_least_recently_used(fake_redis, clock):
+    backend = RedisCacheBackend(fake_redis, max_entries=2, prefix="t:")
+    backend.set("a", "1", 60)
+    clock.now += 1
+    backend.set("b", "2", 60)
+    clock.now += 1
+    assert backend.get("a") == "1"
+    clock.now += 1
+    backend.set("c", "3", 60)
+
+    assert fake_redis.get("t:b") is None
+    assert backend.get("a") == "1"
+    assert backend.get("c") == "3"
+    assert fake_redis.zcard("t:index") == 2
+
+
+def test_redis_backend_drops_index_entry_of_expired_value(fake_redis, clock):
+    backend = RedisCacheBackend(fake_redis, prefix="t:")
+    backend.set("a", "1", 60)
+    # Redis expired the value, the LRU index still lists it
+    fake_redis.delete("t:a")
+
+    assert backend.get("a") is None
+    assert fake_redis.zscore("t:index", "a") is None
+
+
+def test_redis_backend_clear(fake_redis, clock):
+    backend = RedisCacheBackend(fake_redis, prefix="t:")
+    backend.set("a", "1", 60)
+    backend.set("b", "2", 60)
+    backend.clear()
+
+    assert fake_redis.keys("t:*") == []
+
+
+def test_response_cache_counts_hits_misses_and_errors(clock):
+    class BrokenBackend:
+        def get(self, key):
+            raise ConnectionError("down")
+
+        def set(self, key, value, ttl_seconds):
+            raise ConnectionError("down")
+
+    cache = ResponseCache(MemoryCacheBackend(), ttl_seconds=60)
+    cache.set("k", "v")
+    assert cache.get("k") == "v"
+    assert cache.get("missing") is None
+    assert cache.stats()["hit_rate"] == 0.5
+
+    broken = ResponseCache(BrokenBackend())
+    broken.set("k", "v")
+    assert broken.get("k") is None
+    assert broken.stats()["errors"] == 2
@@ -1,6 +1,6 @@
 """UI module for displaying analysis results and database management"""
 
-from .display_results import display_analysis_results, display_enhanced_results_table
+from .display_results import display_analysis_results, display_enhanced_results_table, LiveIssueFeed
 from .html_styles import FULL_STYLES_AND_SCRIPTS, ENHANCED_TABLE_STYLES, NAVIGATION_JAVASCRIPT
 from .database_ui import (
     render_analysis_history_sidebar,
@@ -12,6 +12,7 @@ from .database_ui import (
 __all__ = [
     'display_analysis_results',
     'display_enhanced_results_table', 
+    'LiveIssueFeed',
     'FULL_STYLES_AND_SCRIPTS',
     'ENHANCED_TABLE_STYLES',
     'NAVIGATION_JAVASCRIPT',
@@ -1,10 +1,14 @@
 """Module for displaying analysis results"""
 import html
 import json
+import logging
+from collections import Counter
+
 import streamlit as st
 import pandas as pd
 
 from .html_styles import FULL_STYLES_AND_SCRIPTS
+from docs.chunking import normalize_issue_text
 from utils import (
     validate_page_numbers, 
     get_navigation_info, 
@@ -14,6 +18,55 @@ from utils import (
 from backend import convert_to_csv, convert_to_json
 
 
+def _navigation_html(nav_info):
+    """Build the navigation section of an issue card"""
+    link = f'<a href="{nav_info.get("url")}" target="_blank" class="nav-link">{nav_info.get("text")}</a>'
+    if nav_info.get('url') and nav_info['type'] == 'link':
+        return link
+    if nav_info.get('url') and nav_info['type'] == 'search':
+        return (
+            link
+            + f'<div style="margin-top: 4px;"><span class="search-instruction">{nav_info["instruction"]}</span></div>'
+        )
+    if nav_info['type'] == 'search':
+        return (
+            f'<div class="search-instruction">{nav_info["instruction"]}</div>'
+            f'<div style="margin-top: 4px; font-size: 0.85em; color: #495057;">{nav_info["page_info"]}</div>'
+        )
+    return ''
+
+
+def _issue_card_html(item, idx, navigation_html=""):
+    """Build the HTML card for a single issue"""
+    original_highlighted, suggestion_highlighted = highlight_differences(
+        item.get('original_text', ''),
+        item.get('suggestion', '')
+    )
+    return f'''
+            <div class="issue-row" id="issue_{idx + 1}">
+                <div class="issue-header">
+                    <div>
+                        <span class="issue-type">{html.escape(item.get('error_type', 'Unknown'))}</span>
+                        <span class="page-info">📄 Page {item.get('page', 'N/A')}</span>
+                        <span style="margin-left: 10px; font-weight: normal;">Issue #{idx + 1}</span>
+                    </div>
+                </div>
+                <div class="location-info">📍 {html.escape(item.get('location_context', ''))}</div>
+                <div>
+                    <strong>❌ Original Text:</strong>
+                    <div class="original-text difference-highlight">{original_highlighted}</div>
+                </div>
+                <div>
+                    <strong>✅ Suggested Fix:</strong>
+                    <div class="suggestion-text difference-highlight">{suggestion_highlighted}</div>
+                </div>
+                <div class="navigation-section">
+                    {navigation_html}
+                </div>
+            </div>
+            '''
+
+
 def display_enhanced_results_table(parsed_result):
     """Display enhanced results table with improved UX"""
     if not isinstance(parsed_result, list) or len(parsed_result) == 0:
@@ -35,14 +88,9 @@ def display_enhanced_results_table(parsed_result):
 
     # Display enhanced table
     for idx, item in enumerate(parsed_result):
-        anchor_id = f"issue_{idx + 1}"
-
         original_text = item.get('original_text', '')
         suggestion = item.get('suggestion', '')
 
-        # Highlight differences
-        original_highlighted, suggestion_highlighted = highlight_differences(original_text, suggestion)
-
         # Get navigation info
         nav_info = get_navigation_info(
             st.session_state.upload_mode,
@@ -52,29 +100,7 @@ def display_enhanced_results_table(parsed_result):
         )
 
         with st.container():
-            st.markdown(f'''
-            <div class="issue-row" id="{anchor_id}">
-                <div class="issue-header">
-                    <div>
-                        <span class="issue-type">{html.escape(item.get('error_type', 'Unknown'))}</span>
-                        <span class="page-info">📄 Page {item.get('page', 'N/A')}</span>
-                        <span style="margin-left: 10px; font-weight: normal;">Issue #{idx + 1}</span>
-                    </div>
-                </div>
-                <div class="location-info">📍 {html.escape(item.get('location_context', ''))}</div>
-                <div>
-                    <strong>❌ Original Text:</strong>
-                    <div class="original-text difference-highlight">{original_highlighted}</div>
-                </div>
-                <div>
-                    <strong>✅ Suggested Fix:</strong>
-                    <div class="suggestion-text difference-highlight">{suggestion_highlighted}</div>
-                </div>
-                <div class="navigation-section">
-                    {'<a href="' + nav_info['url'] + '" target="_blank" class="nav-link">' + nav_info['text'] + '</a>' if nav_info.get('url') and nav_info['type'] == 'link' else ('<a href="' + nav_info['url'] + '" target="_blank" class="nav-link">' + nav_info['text'] + '</a><div style="margin-top: 4px;"><span class="search-instruction">' + nav_info['instruction'] + '</span></div>' if nav_info.get('url') and nav_info['type'] == 'search' else '<div class="search-instruction">' + nav_info['instruction'] + '</div><div style="margin-top: 4px; font-size: 0.85em; color: #495057;">' + nav_info['page_info'] + '</div>' if nav_info['type'] == 'search' else '')}
-                </div>
-            </div>
-            ''', unsafe_allow_html=True)
+            st.markdown(_issue_card_html(item, idx, _navigation_html(nav_info)), unsafe_allow_html=True)
 
             # Add expandable section for additional details if needed
             with st.expander(f"🔍 Details for Issue #{idx + 1}", expanded=False):
@@ -111,6 +137,117 @@ def display_enhanced_results_table(parsed_result):
                     )
 
 
+def _page_sort_key(page):
+    """Sort numeric pages in order, anything else last"""
+    try:
+        return (0, int(page))
+    except (TypeError, ValueError):
+        return (1, 0)
+
+
+def _issue_identity(issue):
+    """Identity of an issue that survives retries and reordering: normalized text plus page"""
+    return (
+        normalize_issue_text(issue.get('original_text')),
+        normalize_issue_text(issue.get('suggestion')),
+        str(issue.get('page', 'N/A'))
+    )
+
+
+class LiveIssueFeed:
+    """Progressively render issue cards while the analysis is still running.
+
+    Pass add_issue as the issue_callback of call_gemini_api. The streamed cards
+    are provisional: finalize() drops the ones the final, deduplicated result no
+    longer contains, and clear() removes the live view once the full result is
+    rendered by display_analysis_results.
+    """
+
+    def __init__(self):
+        self._placeholder = st.empty()
+        self._summary = None
+        self._cards = None
+        self._slots = {}
+        self._last_index = -1
+        self.issues = []
+        self.page_tally = Counter()
+        self._reset()
+
+    def _reset(self):
+        """Start a fresh live area, e.g. when the stream was retried from the beginning"""
+        self._slots = {}
+        self._last_index = -1
+        self.issues = []
+        self.page_tally = Counter()
+        root = self._placeholder.container()
+        root.markdown(FULL_STYLES_AND_SCRIPTS, unsafe_allow_html=True)
+        self._summary = root.empty()
+        self._cards = root.container()
+
+    def add_issue(self, issue, index):
+        """Append a card for a newly completed issue and refresh the running tally"""
+        # A retried stream starts numbering from zero again
+        if index <= self._last_index:
+            self._reset()
+        self._last_index = index
+
+        if not isinstance(issue, dict):
+            return
+        identity = _issue_identity(issue)
+        if identity in self._slots:
+            # Repeated by an overlapping chunk; merge_issues keeps only the first one
+            return
+
+        self._slots[identity] = self._cards.empty()
+        self._slots[identity].markdown(_issue_card_html(issue, len(self.issues)), unsafe_allow_html=True)
+        self.issues.append(issue)
+        self.page_tally[issue.get('page', 'N/A')] += 1
+        self._summary.info(f"⏳ {len(self.issues)} issues found so far — {self._tally_text()}")
+
+    def _tally_text(self):
+        pages = sorted(self.page_tally.items(), key=lambda item: _page_sort_key(item[0]))
+        return " · ".join(f"p.{page}: {count}" for page, count in pages)
+
+    def finalize(self, analysis_result):
+        """Reconcile the streamed cards with the final result.
+
+        Cards of issues that merge_issues removed are dropped and the tally is
+        recomputed from the final list. Pass None when the analysis failed; the
+        live view is then cleared.
+        """
+        if analysis_result is None:
+            logging.info(f"Analysis did not finish, clearing {len(self.issues)} streamed issues")
+            self.clear()
+            return
+        try:
+            parsed_result = json.loads(analysis_result) if analysis_result else []
+        except (TypeError, ValueError):
+            logging.warning(f"Final result is not JSON, clearing {len(self.issues)} streamed issues")
+            self.clear()
+            return
+
+        if not isinstance(parsed_result, list):
+            parsed_result = [parsed_result]
+        final_issues = [issue for issue in parsed_result if isinstance(issue, dict)]
+        final_identities = {_issue_identity(issue) for issue in final_issues}
+        dropped = [identity for identity in self._slots if identity not in final_identities]
+        for identity in dropped:
+            self._slots.pop(identity).empty()
+
+        streamed = len(self.issues)
+        self.issues = [issue for issue in self.issues if _issue_identity(issue) in final_identities]
+        self.page_tally = Counter(issue.get('page', 'N/A') for issue in final_issues)
+        self._summary.success(f"✅ {len(final_issues)} issues — {self._tally_text()}")
+        logging.info(
+            f"Live view streamed {streamed} issues, dropped {len(dropped)} merged away, "
+            f"final result has {len(final_issues)}"
+        )
+
+    def clear(self):
+        """Remove the live view"""
+        self._placeholder.empty()
+
+
 def display_analysis_results(analysis_result):
     """Display complete analysis results with all views and downloads"""
     if not analysis_result:
@@ -5,8 +5,19 @@ import logging
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    Header,
+    HTTPException,
+    Response,
+    UploadFile,
+    status,
+)
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...api.v1.routes_auth import get_current_user
@@ -18,6 +29,14 @@ from ...schemas.task import (
     TaskOut,
     TaskWithResult,
 )
+from ...services.task_dedup import (
+    find_active_duplicate,
+    find_by_idempotency_key,
+    find_recent_duplicate,
+    make_dedup_key,
+    scope_idempotency_key,
+)
+from ...services.uploads import UploadTooLarge, save_upload
 from ...workers.jobs import run_analyze_task
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
@@ -27,6 +46,85 @@ logger = logging.getLogger(__name__)
 
 
 DbDep = Annotated[AsyncSession, Depends(get_db)]
+IdempotencyKey = Annotated[str | None, Header(alias="Idempotency-Key", max_length=255)]
+
+
+def _task_out(task: Task) -> TaskOut:
+    return TaskOut(
+        id=task.id,
+        type=task.type,  # type: ignore[arg-type]
+        status=task.status,  # type: ignore[arg-type]
+        progress=task.progress,
+        created_at=task.created_at.isoformat(),
+        updated_at=task.updated_at.isoformat(),
+        error=task.error,
+        checkpoint_hits=task.checkpoint_hits or 0,
+    )
+
+
+async def _find_existing_task(
+        db: AsyncSession, scoped_key: str | None, dedup_key: str
+) -> Task | None:
+    """Task to return instead of creating one: same Idempotency-Key, or same content recently."""
+    if scoped_key is not None:
+        task = await find_by_idempotency_key(db, scoped_key)
+        if task is not None:
+            if task.dedup_key != dedup_key:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Idempotency-Key was already used for a different request",
+                )
+            return task
+    return await find_recent_duplicate(db, dedup_key)
+
+
+async def _find_conflicting_task(
+        db: AsyncSession, scoped_key: str | None, dedup_key: str
+) -> Task:
+    """Task whose insert beat ours: same Idempotency-Key, or the active task for the content."""
+    existing = await _find_existing_task(db, scoped_key, dedup_key)
+    if existing is None:
+        # Outside the dedup window, but the unique index still allows one active task per key
+        existing = await find_active_duplicate(db, dedup_key)
+    if existing is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Duplicate request")
+    return existing
+
+
+async def _create_task(
+        db: AsyncSession, payload: dict[str, object], scoped_key: str | None, dedup_key: str
+) -> Task | None:
+    """Insert and enqueue a task; None if a concurrent request with the same key won the race.
+
+    Both the Idempotency-Key and, among pending and running tasks, the dedup key are unique.
+    """
+    task = Task(
+        type="document_inconsistency_check",
+        idempotency_key=scoped_key,
+        dedup_key=dedup_key,
+    )
+    db.add(task)
+    try:
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        return None
+
+    db.add(TaskInput(task_id=task.id, payload=json.dumps(payload)))
+    await db.commit()
+
+    # Enqueue background job (don't fail request if broker unavailable)
+    try:
+        run_analyze_task.delay(task.id)
+    except Exception as e:  # noqa: BLE001
+        logger.error(f"Failed to enqueue task {task.id}: {e}")
+    return task
+
+
+def _reused(response: Response, task: Task) -> TaskOut:
+    logger.info(f"Returning existing task {task.id} for a repeated submission")
+    response.status_code = status.HTTP_200_OK
+    return _task_out(task)
 
 
 @router.post(
@@ -37,30 +135,24 @@ DbDep = Annotated[AsyncSession, Depends(get_db)]
 async def create_doc_inconsistency_task(
     body: CreateDocumentInconsistencyCheckTask,
     db: DbDep,
+    response: Response,
+    idempotency_key: IdempotencyKey = None,
     username: str = Depends(get_current_user),
 ) -> TaskOut:
-    task = Task(type="document_inconsistency_check")
-    db.add(task)
-    await db.flush()
-
     payload = body.model_dump()
-    db.add(TaskInput(task_id=task.id, payload=json.dumps(payload)))
-    await db.commit()
+    # The API does not fetch Drive files, so the source ref stands in for their content
+    options = {k: v for k, v in payload.items() if k != "source_ref"}
+    dedup_key = make_dedup_key(username, f"ref:{body.source_ref}", options)
+    scoped_key = scope_idempotency_key(username, idempotency_key) if idempotency_key else None
 
-    # Enqueue background job (don't fail request if broker unavailable)
-    try:
-        run_analyze_task.delay(task.id)
-    except Exception as e:  # noqa: BLE001
-        logger.error(f"Failed to enqueue task {task.id}: {e}")
+    existing = await _find_existing_task(db, scoped_key, dedup_key)
+    if existing is not None:
+        return _reused(response, existing)
 
-    return TaskOut(
-        id=task.id,
-        type="document_inconsistency_check",
-        status=task.status,
-        progress=task.progress,
-        created_at=task.created_at.isoformat(),
-        updated_at=task.updated_at.isoformat(),
-    )
+    task = await _create_task(db, payload, scoped_key, dedup_key)
+    if task is None:
+        return _reused(response, await _find_conflicting_task(db, scoped_key, dedup_key))
+    return _task_out(task)
 
 
 @router.get("/{task_id}", response_model=TaskWithResult)
@@ -83,6 +175,7 @@ async def get_task(task_id: UUID, db: DbDep) -> TaskWithResult:
         created_at=task.created_at.isoformat(),
         updated_at=task.updated_at.isoformat(),
         error=task.error,
+        checkpoint_hits=task.checkpoint_hits,
         result_json=json.loads(analysis.result_json) if analysis else None,
     )
 
@@ -95,51 +188,40 @@ async def get_task(task_id: UUID, db: DbDep) -> TaskWithResult:
 async def create_doc_inconsistency_task_local(
     file: Annotated[UploadFile, File(description="Upload document file")],
     db: DbDep,
+    response: Response,
+    idempotency_key: IdempotencyKey = None,
     username: str = Depends(get_current_user),
     use_o1: bool = Form(False),
     use_eb1: bool = Form(False),
     system_prompt_override: str | None = Form(None),
 ) -> TaskOut:
-    # Save file to shared volume
-    import os
-    import uuid
-
-    uploads_dir = "/app/uploads"
-    os.makedirs(uploads_dir, exist_ok=True)
-    ext = os.path.splitext(file.filename or "")[1]
-    file_id = f"{uuid.uuid4()}{ext}"
-    dest_path = os.path.join(uploads_dir, file_id)
-    with open(dest_path, "wb") as f:
-        f.write(await file.read())
-
-    task = Task(type="document_inconsistency_check")
-    db.add(task)
-    await db.flush()
+    try:
+        stored = await save_upload(file)
+    except UploadTooLarge as exc:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc)
+        ) from exc
 
-    payload = {
+    options = {
         "source_type": "upload",
-        "source_ref": dest_path,
-        "file_name": file.filename,
         "use_o1": use_o1,
         "use_eb1": use_eb1,
         "system_prompt_override": system_prompt_override,
     }
-    db.add(TaskInput(task_id=task.id, payload=json.dumps(payload)))
-    await db.commit()
-
-    try:
-        run_analyze_task.delay(task.id)
-    except Exception as e:  # noqa: BLE001
-        logger.error(f"Failed to enqueue task {task.id}: {e}")
-
-    return TaskOut(
-        id=task.id,
-        type="document_inconsistency_check",
-        status=task.status,  # type: ignore[arg-type]
-        progress=task.progress,
-        created_at=task.created_at.isoformat(),
-        updated_at=task.updated_at.isoformat(),
-        error=task.error,
-    )
+    dedup_key = make_dedup_key(username, f"sha256:{stored.sha256}", options)
+    scoped_key = scope_idempotency_key(username, idempotency_key) if idempotency_key else None
 
+    existing = await _find_existing_task(db, scoped_key, dedup_key)
+    if existing is not None:
+        return _reused(response, existing)
 
+    payload = {
+        **options,
+        "source_ref": stored.path,
+        "file_name": file.filename,
+        "content_sha256": stored.sha256,
+    }
+    task = await _create_task(db, payload, scoped_key, dedup_key)
+    if task is None:
+        return _reused(response, await _find_conflicting_task(db, scoped_key, dedup_key))
+    return _task_out(task)
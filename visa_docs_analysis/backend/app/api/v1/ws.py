@@ -2,38 +2,107 @@ from __future__ import annotations
 
 import asyncio
 import contextlib
-import json
-import os
+from typing import Any
+from uuid import UUID
 
-import redis.asyncio as aioredis
-from fastapi import APIRouter, WebSocket
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from ...db.session import SessionLocal
+from ...models.task import Task
+from ...services.progress import TERMINAL_STAGES
+from ...services.progress_hub import ProgressHub, ProgressSubscription, get_progress_hub
 
 router = APIRouter()
 
+# Close code for a watcher dropped because it could not keep up ("try again later")
+_WS_CLOSE_TOO_SLOW = 1013
+_WS_CLOSE_POLICY = 1008
+
+
+async def _task_state(task_id: str) -> tuple[str, int] | None:
+    async with SessionLocal() as db:
+        task = await db.get(Task, task_id)
+        return (task.status, task.progress) if task is not None else None
+
+
+async def _replay_or_finish(websocket: WebSocket, hub: ProgressHub, task_id: str) -> int | None:
+    """Send what the client missed; returns the last seq sent, or None once the socket is closed.
+
+    Unknown tasks are refused, and tasks that already finished get their
+    outcome and are closed, so only running tasks continue to the live feed.
+    """
+    state = await _task_state(task_id)
+    if state is None:
+        await websocket.close(code=_WS_CLOSE_POLICY, reason="Task not found")
+        return None
+    status, progress = state
+
+    last_seq = 0
+    last: dict[str, Any] | None = None
+    for data in await hub.replay(task_id):
+        await websocket.send_json(data)
+        last_seq = data.get("seq", last_seq)
+        last = data
+
+    if status in TERMINAL_STAGES:
+        # Finished before the client connected: report the outcome and hang up
+        if last is None or last.get("stage") != status:
+            await websocket.send_json({"progress": progress, "stage": status})
+        await websocket.close()
+        return None
+    if last is None:
+        await websocket.send_json({"progress": progress, "stage": "queued"})
+    return last_seq
+
+
+async def _forward_live(
+        websocket: WebSocket,
+        subscription: ProgressSubscription,
+        disconnected: asyncio.Task[None],
+        last_seq: int,
+) -> None:
+    """Forward live messages until the task finishes, the client leaves or falls behind."""
+    while not disconnected.done():
+        next_message = asyncio.create_task(subscription.get())
+        await asyncio.wait({next_message, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+        if not next_message.done():
+            next_message.cancel()
+            return
+        data = next_message.result()
+        if data is None:
+            await websocket.close(code=_WS_CLOSE_TOO_SLOW, reason="Progress consumer too slow")
+            return
+        # Already sent, as part of the replay or before the hub reconnected
+        if data.get("seq", last_seq + 1) <= last_seq:
+            continue
+        await websocket.send_json(data)
+        last_seq = data.get("seq", last_seq)
+        if data.get("stage") in TERMINAL_STAGES:
+            await websocket.close()
+            return
+
 
 @router.websocket("/tasks/{task_id}/ws")
-async def ws_task_progress(websocket: WebSocket, task_id: str) -> None:
+async def ws_task_progress(websocket: WebSocket, task_id: UUID) -> None:
     await websocket.accept()
-    url = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
-    channel = f"task_progress:{task_id}"
-    redis = aioredis.from_url(url)
-    pubsub = redis.pubsub()
-    await pubsub.subscribe(channel)
+    hub = get_progress_hub()
+    # Subscribe before reading the replay so no update falls between the two
+    subscription = hub.subscribe(str(task_id))
+
+    async def _wait_for_disconnect() -> None:
+        # Clients send nothing; receive() returns once they go away
+        with contextlib.suppress(WebSocketDisconnect):
+            while True:
+                await websocket.receive_text()
+
+    disconnected = asyncio.create_task(_wait_for_disconnect())
     try:
-        # Send initial message
-        await websocket.send_json({"progress": 0, "stage": "queued"})
-        while True:
-            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=5.0)
-            if message and message.get("type") == "message":
-                data = json.loads(message["data"])  # type: ignore[index]
-                await websocket.send_json(data)
-            await asyncio.sleep(0.1)
+        last_seq = await _replay_or_finish(websocket, hub, str(task_id))
+        if last_seq is not None:
+            subscription.mark_delivered(last_seq)
+            await _forward_live(websocket, subscription, disconnected, last_seq)
     except Exception:
         pass
     finally:
-        with contextlib.suppress(Exception):
-            await pubsub.unsubscribe(channel)
-            await pubsub.close()
-            await redis.close()
-
-
+        hub.unsubscribe(subscription)
+        disconnected.cancel()
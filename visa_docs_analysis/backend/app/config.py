@@ -11,8 +11,64 @@ class Settings(BaseSettings):
     app_env: str = "dev"
     database_url: str = "sqlite+aiosqlite:///./dev.db"
     redis_url: str | None = None
+    # Connection pool of each process's engine (ignored for SQLite)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_recycle_seconds: int = 1800
 
     gemini_api_key: str | None = None
+    gemini_chunk_overlap_chars: int = 2_000
+    # Chunks of one document analyzed at the same time by the async client
+    gemini_max_concurrent_chunks: int = 4
+
+    # Token budget planning: documents that do not fit one call are analyzed in chunks
+    gemini_token_safety_margin: float = 0.1
+    gemini_output_tokens_per_input_token: float = 0.08
+    gemini_thinking_token_reserve: int = 16_384
+    gemini_exact_token_count: bool = False
+
+    # Gemini quota shared by callers: off | memory (per process) | redis (all workers)
+    gemini_rate_limit_backend: str = "memory"
+    gemini_rate_limit_rpm: int = 150
+    gemini_rate_limit_tpm: int = 2_000_000
+    gemini_rate_limit_max_wait_seconds: float = 600.0
+
+    # Gemini response cache: off | memory | sqlite | redis
+    gemini_cache_backend: str = "memory"
+    gemini_cache_ttl_seconds: int = 86_400
+    gemini_cache_max_entries: int = 512
+    gemini_cache_path: str = "./gemini_cache.db"
+
+    # Register system prompts as Gemini cached content instead of sending them inline
+    gemini_context_cache: bool = False
+    gemini_context_cache_ttl_seconds: int = 3600
+    gemini_context_cache_refresh_margin_seconds: int = 300
+
+    # Uploads are stored content-addressed (<uploads_dir>/<sha[:2]>/<sha256>)
+    uploads_dir: str = "/app/uploads"
+    upload_max_bytes: int = 50 * 1024 * 1024
+    upload_chunk_bytes: int = 1024 * 1024
+
+    # Progress messages buffered per WebSocket before a slow client is disconnected
+    progress_ws_max_queued: int = 100
+    # Last state and recent history of each task, replayed to clients that connect late
+    progress_history_max: int = 200
+    progress_state_ttl_seconds: int = 86_400
+
+    # Identical task submissions (user, content, options) within this window return the
+    # existing task instead of starting another analysis; 0 disables
+    task_dedup_window_seconds: int = 600
+
+    # Celery worker: "prefork" runs one analysis per process; "async" uses a thread pool that
+    # hands analyses to one event loop per process, up to worker_async_concurrency at a time
+    worker_mode: str = "prefork"
+    worker_async_concurrency: int = 32
+    # Lease per task id so a redelivered task does not run twice: off | memory | redis
+    task_lease_backend: str = "redis"
+    task_lease_ttl_seconds: float = 60.0
+    # Identical analyses running at the same time share one Gemini call: off | memory | redis
+    single_flight_backend: str = "redis"
+    single_flight_result_ttl_seconds: float = 300.0
 
     # JWT/Auth
     jwt_secret: str = "change-me"
@@ -29,6 +85,26 @@ class Settings(BaseSettings):
         "profile",
         "https://www.googleapis.com/auth/drive.readonly",
     ]
+    # Drive service objects kept for distinct credentials, least recently used evicted first
+    google_service_cache_size: int = 64
+    # Public export URLs are raced under one deadline; the winning format is remembered
+    # per document for this many documents
+    google_export_deadline_seconds: float = 30.0
+    google_export_format_memory_size: int = 1024
+    # The remembered format is requested alone for this long before the others join the race
+    google_export_hedge_delay_seconds: float = 2.0
+    # Authenticated Drive downloads: bytes per ranged request, and how much is kept in memory
+    # before the download spools to a temporary file
+    google_download_chunk_bytes: int = 32 * 1024 * 1024
+    google_download_spool_max_bytes: int = 8 * 1024 * 1024
+
+    # Shared outbound HTTP pools (Google APIs, exports, OAuth); HTTP/2 needs httpx's http2 extra
+    http2: bool = True
+    http_timeout_seconds: float = 30.0
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry_seconds: float = 30.0
+    http_pool_hosts: int = 10
 
     token_encryption_key: str | None = None
 
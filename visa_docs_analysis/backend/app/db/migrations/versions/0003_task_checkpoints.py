@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0003_task_checkpoints"
+down_revision = "0002_oauth_tokens"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "task",
+        sa.Column("checkpoint_hits", sa.Integer, nullable=False, server_default="0"),
+    )
+    op.create_table(
+        "taskcheckpoint",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column(
+            "task_id",
+            sa.String,
+            sa.ForeignKey("task.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("stage", sa.String, nullable=False),
+        sa.Column("content_hash", sa.String(64), nullable=True),
+        sa.Column("data", sa.Text, nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.UniqueConstraint("task_id", "stage"),
+    )
+    op.create_index("ix_taskcheckpoint_task_id", "taskcheckpoint", ["task_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_taskcheckpoint_task_id", table_name="taskcheckpoint")
+    op.drop_table("taskcheckpoint")
+    op.drop_column("task", "checkpoint_hits")
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0004_task_dedup"
+down_revision = "0003_task_checkpoints"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("task", sa.Column("idempotency_key", sa.String(64), nullable=True))
+    op.add_column("task", sa.Column("dedup_key", sa.String(64), nullable=True))
+    op.create_index("ix_task_idempotency_key", "task", ["idempotency_key"], unique=True)
+    op.create_index("ix_task_dedup_key", "task", ["dedup_key"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_task_dedup_key", table_name="task")
+    op.drop_index("ix_task_idempotency_key", table_name="task")
+    op.drop_column("task", "dedup_key")
+    op.drop_column("task", "idempotency_key")
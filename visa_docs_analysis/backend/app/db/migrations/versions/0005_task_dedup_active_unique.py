@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0005_task_dedup_active_unique"
+down_revision = "0004_task_dedup"
+branch_labels = None
+depends_on = None
+
+_ACTIVE_WHERE = sa.text("status IN ('pending', 'running')")
+
+
+def upgrade() -> None:
+    # Concurrent submissions may already have created several active tasks for one key;
+    # keep the key on the newest of them only
+    op.execute(
+        """
+        UPDATE task SET dedup_key = NULL
+        WHERE dedup_key IS NOT NULL
+          AND status IN ('pending', 'running')
+          AND EXISTS (
+            SELECT 1 FROM task AS newer
+            WHERE newer.dedup_key = task.dedup_key
+              AND newer.status IN ('pending', 'running')
+              AND (newer.created_at > task.created_at
+                   OR (newer.created_at = task.created_at AND newer.id > task.id))
+          )
+        """
+    )
+    op.create_index(
+        "uq_task_dedup_key_active",
+        "task",
+        ["dedup_key"],
+        unique=True,
+        postgresql_where=_ACTIVE_WHERE,
+        sqlite_where=_ACTIVE_WHERE,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_task_dedup_key_active", table_name="task")
@@ -1,14 +1,88 @@
 from __future__ import annotations
 
+import threading
 from collections.abc import AsyncGenerator
+from typing import Any
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 
 from ..config import get_settings
 
 settings = get_settings()
-engine = create_async_engine(settings.database_url, echo=False, future=True)
-SessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+_engine: AsyncEngine | None = None
+_sessionmaker: async_sessionmaker[AsyncSession] | None = None
+_engine_lock = threading.Lock()
+
+
+def _pool_options(pool_size: int | None, max_overflow: int | None) -> dict[str, Any]:
+    if make_url(settings.database_url).get_backend_name() == "sqlite":
+        # SQLite picks its own pool class, which does not take sizing arguments
+        return {}
+    return {
+        "pool_size": pool_size if pool_size is not None else settings.db_pool_size,
+        "max_overflow": max_overflow if max_overflow is not None else settings.db_max_overflow,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": True,
+    }
+
+
+def _create_engine(pool_size: int | None, max_overflow: int | None) -> None:
+    global _engine, _sessionmaker
+    _engine = create_async_engine(
+        settings.database_url,
+        echo=False,
+        future=True,
+        **_pool_options(pool_size, max_overflow),
+    )
+    _sessionmaker = async_sessionmaker(_engine, expire_on_commit=False, class_=AsyncSession)
+
+
+def init_engine(pool_size: int | None = None, max_overflow: int | None = None) -> AsyncEngine:
+    """Create this process's engine and session factory, replacing any previous one.
+
+    Connections are opened lazily and belong to the event loop that first uses
+    them, so every process (and Celery worker process) needs its own engine.
+    """
+    with _engine_lock:
+        _create_engine(pool_size, max_overflow)
+        assert _engine is not None
+        return _engine
+
+
+def _get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    with _engine_lock:
+        if _sessionmaker is None:
+            _create_engine(None, None)
+        assert _sessionmaker is not None
+        return _sessionmaker
+
+
+def get_engine() -> AsyncEngine:
+    """Return this process's engine, creating it with the default pool size on first use."""
+    _get_sessionmaker()
+    assert _engine is not None
+    return _engine
+
+
+def SessionLocal() -> AsyncSession:  # noqa: N802 - kept for existing call sites
+    """Open a session on this process's engine."""
+    return _get_sessionmaker()()
+
+
+async def dispose_engine() -> None:
+    """Close pooled connections; must run on the event loop that opened them."""
+    global _engine, _sessionmaker
+    with _engine_lock:
+        engine, _engine, _sessionmaker = _engine, None, None
+    if engine is not None:
+        await engine.dispose()
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
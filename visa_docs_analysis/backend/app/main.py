@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 from .api.v1.routes_auth import router as auth_router
@@ -8,7 +11,24 @@ from .api.v1.routes_history import router as history_router
 from .api.v1.routes_tasks import router as tasks_router
 from .api.v1.ws import router as ws_router
 from .config import get_settings
+from .db.session import dispose_engine
 from .logging import configure_logging
+from .middleware.body_limit import BodySizeLimitMiddleware
+from .services.http_clients import close_http_clients
+from .services.progress_hub import get_progress_hub, shutdown_progress_hub
+
+# Multipart boundaries and form fields on top of the file itself
+_UPLOAD_BODY_OVERHEAD_BYTES = 64 * 1024
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    # Subscribe to progress before the first WebSocket connects, so none of it is missed
+    get_progress_hub().start()
+    yield
+    await shutdown_progress_hub()
+    await close_http_clients()
+    await dispose_engine()
 
 
 def create_app() -> FastAPI:
@@ -21,6 +41,13 @@ def create_app() -> FastAPI:
         version="0.1.0",
         docs_url="/api/docs",
         openapi_url="/api/openapi.json",
+        lifespan=lifespan,
+    )
+
+    app.add_middleware(
+        BodySizeLimitMiddleware,
+        max_bytes=settings.upload_max_bytes + _UPLOAD_BODY_OVERHEAD_BYTES,
+        paths=("/api/v1/tasks/document-inconsistency-check-local",),
     )
 
     # Routers
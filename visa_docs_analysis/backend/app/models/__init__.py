@@ -2,7 +2,7 @@ from .analysis import AnalysisResult
 from .base import Base
 from .document import Document
 from .oauth_token import OAuthToken
-from .task import Task, TaskInput
+from .task import Task, TaskCheckpoint, TaskInput
 from .user import User
 
 __all__ = [
@@ -11,6 +11,7 @@ __all__ = [
     "Document",
     "Task",
     "TaskInput",
+    "TaskCheckpoint",
     "AnalysisResult",
     "OAuthToken",
 ]
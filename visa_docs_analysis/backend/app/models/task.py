@@ -4,7 +4,7 @@ import uuid
 from datetime import datetime
 from typing import Literal
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, UniqueConstraint, text
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -12,6 +12,9 @@ from .base import Base
 
 TaskType = Literal["document_inconsistency_check", "compare"]
 TaskStatus = Literal["pending", "running", "succeeded", "failed", "canceled"]
+# Queued, running or waiting for a retry; at most one such task exists per dedup key
+ACTIVE_TASK_STATUSES = ("pending", "running")
+_ACTIVE_WHERE = text("status IN ('pending', 'running')")
 
 
 class Task(Base):
@@ -29,6 +32,26 @@ class Task(Base):
         DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
     )
     error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Stages a retry reused from an earlier attempt instead of redoing them
+    checkpoint_hits: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    # Client Idempotency-Key, scoped to the user; a repeat returns this task
+    idempotency_key: Mapped[str | None] = mapped_column(
+        String(64), nullable=True, unique=True, index=True
+    )
+    # Hash of user, content and options; identical submissions within the window reuse this task
+    dedup_key: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+
+    __table_args__ = (
+        Index(
+            "uq_task_dedup_key_active",
+            "dedup_key",
+            unique=True,
+            postgresql_where=_ACTIVE_WHERE,
+            sqlite_where=_ACTIVE_WHERE,
+        ),
+    )
 
 
 class TaskInput(Base):
@@ -37,3 +60,18 @@ class TaskInput(Base):
     payload: Mapped[str] = mapped_column(Text, nullable=False)  # JSON string
 
 
+class TaskCheckpoint(Base):
+    """Output of a completed stage, kept so a retried task resumes after it."""
+
+    __table_args__ = (UniqueConstraint("task_id", "stage"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    task_id: Mapped[str] = mapped_column(
+        ForeignKey("task.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    stage: Mapped[str] = mapped_column(String, nullable=False)
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    data: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=datetime.utcnow, nullable=False
+    )
@@ -25,6 +25,7 @@ class TaskOut(BaseModel):
     created_at: str
     updated_at: str
     error: str | None = None
+    checkpoint_hits: int = 0
 
 
 class TaskWithResult(TaskOut):
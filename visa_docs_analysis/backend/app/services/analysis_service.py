@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import asyncio
+import io
 import json
 import logging
-from typing import Any
+from typing import Any, BinaryIO
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from .checkpoints import EXTRACTED, FETCHED, MODEL_OUTPUT, TaskCheckpoints, content_hash
 from .document_processing import detect_and_extract
 from .gemini import GeminiClient
 from .google_docs import GoogleDocsFetcher
@@ -18,6 +21,17 @@ from ..models.task import Task
 logger = logging.getLogger(__name__)
 
 
+def _open_upload(path: str, file_name: str | None) -> tuple[str, BinaryIO]:
+    return file_name or path, open(path, "rb")
+
+
+def _file_size(content: BinaryIO) -> int:
+    position = content.tell()
+    size = content.seek(0, io.SEEK_END)
+    content.seek(position)
+    return size
+
+
 class AnalysisService:
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -34,26 +48,61 @@ class AnalysisService:
         use_eb1 = bool(payload.get("use_eb1", False))
         override = payload.get("system_prompt_override")
 
+        # Stages finished by an earlier attempt of this task are reused, not redone
+        checkpoints = TaskCheckpoints(self.db, task)
+        await checkpoints.load()
+
         # 1) Fetch/prepare text
         text: str
-        if source_type == "google_drive":
-            publisher.publish(task.id, 25, "fetching_google_drive")
-            fetcher = GoogleDocsFetcher()
-            text = await fetcher.fetch_public_or_authenticated(source_ref)
+        extracted = await checkpoints.reuse(EXTRACTED)
+        if extracted is not None:
+            publisher.publish(task.id, 25, "resumed", "Reusing extracted text")
+            text = extracted.data or ""
         else:
-            # For upload flow we expect that file is pre-staged elsewhere; here we use ref as path
-            publisher.publish(task.id, 25, "loading_upload")
-            with open(source_ref, "rb") as f:
-                content = f.read()
-            text = detect_and_extract(file_name or source_ref, content)
+            content: BinaryIO
+            if source_type == "google_drive":
+                publisher.publish(task.id, 25, "fetching_google_drive")
+                fetcher = GoogleDocsFetcher()
+                name, content = await fetcher.fetch_file(source_ref)
+            else:
+                # Upload flow: the file is pre-staged elsewhere and the ref is its path
+                publisher.publish(task.id, 25, "loading_upload")
+                # File IO blocks; run it off the shared event loop
+                name, content = await asyncio.to_thread(_open_upload, source_ref, file_name)
+            # Extractors read the file in place instead of a copy of its bytes
+            with content:
+                # Uploads were hashed while being stored; Drive files are hashed here
+                digest = payload.get("content_sha256") or await asyncio.to_thread(
+                    content_hash, content
+                )
+                await checkpoints.save(
+                    FETCHED, json.dumps({"name": name, "size": _file_size(content)}), digest
+                )
+                text = await asyncio.to_thread(detect_and_extract, name, content)
+            await checkpoints.save(EXTRACTED, text, digest)
 
         publisher.publish(task.id, 40, "building_prompt")
         system_prompt = build_system_prompt(use_o1=use_o1, use_eb1=use_eb1, override=override)
 
         # 2) Call Gemini
-        publisher.publish(task.id, 60, "gemini_call")
-        gemini = GeminiClient()
-        results = gemini.generate(system_prompt=system_prompt, document_text=text)
+        model_output = await checkpoints.reuse(MODEL_OUTPUT)
+        if model_output is not None and model_output.data:
+            publisher.publish(task.id, 60, "resumed", "Reusing model output")
+            results = json.loads(model_output.data)
+        else:
+            publisher.publish(task.id, 60, "gemini_call")
+            gemini = GeminiClient()
+            results = await gemini.generate_async(
+                system_prompt=system_prompt,
+                document_text=text,
+                on_issue=lambda issue, index: publisher.publish_issue(task.id, 60, index, issue),
+                on_status=lambda message: publisher.publish(
+                    task.id, 60, "waiting_for_quota", message
+                ),
+            )
+            await checkpoints.save(
+                MODEL_OUTPUT, json.dumps(results), content_hash(system_prompt + text)
+            )
 
         # 3) Persist
         publisher.publish(task.id, 90, "persisting")
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+from typing import BinaryIO
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.task import Task, TaskCheckpoint
+
+logger = logging.getLogger(__name__)
+
+# Stages of an analysis, in order
+FETCHED = "fetched"  # hash and size of the downloaded/uploaded bytes
+EXTRACTED = "extracted"  # document text
+MODEL_OUTPUT = "model_output"  # parsed Gemini response (JSON)
+
+_HASH_BLOCK_BYTES = 1024 * 1024
+
+
+def content_hash(content: bytes | str | BinaryIO) -> str:
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    if isinstance(content, bytes):
+        return hashlib.sha256(content).hexdigest()
+    # Files are hashed block by block and rewound, never loaded whole
+    digest = hashlib.sha256()
+    position = content.tell()
+    for block in iter(lambda: content.read(_HASH_BLOCK_BYTES), b""):
+        digest.update(block)
+    content.seek(position)
+    return digest.hexdigest()
+
+
+class TaskCheckpoints:
+    """Stage results of one task, committed as each stage completes.
+
+    A Celery retry rolls back the failed attempt's transaction, so every
+    checkpoint is committed on its own; the next attempt loads them and skips
+    the stages that already finished.
+    """
+
+    def __init__(self, db: AsyncSession, task: Task):
+        self.db = db
+        self.task = task
+        self._stages: dict[str, TaskCheckpoint] = {}
+
+    async def load(self) -> None:
+        res = await self.db.execute(
+            select(TaskCheckpoint).where(TaskCheckpoint.task_id == self.task.id)
+        )
+        self._stages = {checkpoint.stage: checkpoint for checkpoint in res.scalars()}
+        if self._stages:
+            logger.info(f"Task {self.task.id} has checkpoints: {', '.join(sorted(self._stages))}")
+
+    async def reuse(self, stage: str) -> TaskCheckpoint | None:
+        """Return the stage's checkpoint, counting the hit on the task, or None."""
+        checkpoint = self._stages.get(stage)
+        if checkpoint is None:
+            return None
+        self.task.checkpoint_hits = (self.task.checkpoint_hits or 0) + 1
+        await self.db.commit()
+        logger.info(f"Task {self.task.id} resumed from checkpoint '{stage}'")
+        return checkpoint
+
+    async def save(self, stage: str, data: str | None, digest: str | None = None) -> None:
+        checkpoint = self._stages.get(stage)
+        if checkpoint is None:
+            checkpoint = TaskCheckpoint(task_id=self.task.id, stage=stage)
+            self.db.add(checkpoint)
+            self._stages[stage] = checkpoint
+        elif digest and checkpoint.content_hash and checkpoint.content_hash != digest:
+            logger.info(f"Task {self.task.id}: '{stage}' changed since the previous attempt")
+        checkpoint.data = data
+        checkpoint.content_hash = digest
+        await self.db.commit()
@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Any
+
+PAGE_MARKER_PATTERN = re.compile(r"=== PAGE (\d+) ===")
+PARAGRAPH_BREAK_PATTERN = re.compile(r"\n\s*\n")
+
+# Separators tried in order when a single paragraph does not fit into a chunk
+_FALLBACK_SEPARATORS = [
+    re.compile(r"\n"),
+    re.compile(r"(?<=[.!?])\s+"),
+    re.compile(r"\s+"),
+]
+
+# A chunk is closed at the last page boundary if that keeps at least this share of the budget
+_PAGE_BREAK_MIN_FILL = 0.5
+
+
+@dataclass(frozen=True)
+class DocumentChunk:
+    """A contiguous slice of the document prepared for a single model call"""
+    index: int
+    text: str
+    start: int  # char offset of the chunk in the source document
+    end: int
+    first_page: int
+    last_page: int
+    overlap_chars: int = 0  # leading chars repeated from the previous chunk
+
+    @property
+    def page_range(self) -> str:
+        if self.first_page == self.last_page:
+            return f"page {self.first_page}"
+        return f"pages {self.first_page}-{self.last_page}"
+
+
+@dataclass(frozen=True)
+class _Unit:
+    start: int
+    end: int
+    page: int
+    page_start: bool  # unit begins with a page marker
+
+    @property
+    def size(self) -> int:
+        return self.end - self.start
+
+
+def page_marker(page: int) -> str:
+    """Return the page marker line used by the extractors"""
+    return f"=== PAGE {page} ==="
+
+
+def _page_segments(text: str) -> list[tuple[int, int, int]]:
+    """Split text into (start, end, page) segments, one per page marker"""
+    segments: list[tuple[int, int, int]] = []
+    markers = list(PAGE_MARKER_PATTERN.finditer(text))
+
+    # Text before the first marker belongs to page 1
+    first_start = markers[0].start() if markers else len(text)
+    if first_start > 0 and text[:first_start].strip():
+        segments.append((0, first_start, 1))
+
+    for i, match in enumerate(markers):
+        end = markers[i + 1].start() if i + 1 < len(markers) else len(text)
+        segments.append((match.start(), end, int(match.group(1))))
+
+    if not segments and text:
+        segments.append((0, len(text), 1))
+    return segments
+
+
+def _split_span(
+        text: str, start: int, end: int, pattern: re.Pattern[str], limit: int
+) -> list[tuple[int, int]]:
+    """Split [start, end) after each separator match, keeping separators with the left piece"""
+    pieces: list[tuple[int, int]] = []
+    piece_start = start
+    for match in pattern.finditer(text, start, end):
+        if match.end() >= end:
+            break
+        pieces.append((piece_start, match.end()))
+        piece_start = match.end()
+    pieces.append((piece_start, end))
+
+    # Merge neighbouring pieces back together while they still fit
+    merged: list[tuple[int, int]] = []
+    for piece in pieces:
+        if merged and piece[1] - merged[-1][0] <= limit:
+            merged[-1] = (merged[-1][0], piece[1])
+        else:
+            merged.append(piece)
+    return merged
+
+
+def _split_oversized(
+        text: str, start: int, end: int, limit: int, level: int = 0
+) -> list[tuple[int, int]]:
+    """Split a span that exceeds the limit at line, sentence, word and finally character level"""
+    if end - start <= limit:
+        return [(start, end)]
+    if level >= len(_FALLBACK_SEPARATORS):
+        return [(i, min(i + limit, end)) for i in range(start, end, limit)]
+
+    spans: list[tuple[int, int]] = []
+    for piece_start, piece_end in _split_span(text, start, end, _FALLBACK_SEPARATORS[level], limit):
+        spans.extend(_split_oversized(text, piece_start, piece_end, limit, level + 1))
+    return spans
+
+
+def _build_units(text: str, limit: int) -> list[_Unit]:
+    """Break the document into paragraph units that never cross a page boundary"""
+    units: list[_Unit] = []
+    for seg_start, seg_end, page in _page_segments(text):
+        paragraph_start = seg_start
+        boundaries = [m.end() for m in PARAGRAPH_BREAK_PATTERN.finditer(text, seg_start, seg_end)]
+        for boundary in boundaries + [seg_end]:
+            if boundary <= paragraph_start:
+                continue
+            for span_start, span_end in _split_oversized(text, paragraph_start, boundary, limit):
+                units.append(_Unit(span_start, span_end, page, span_start == seg_start))
+            paragraph_start = boundary
+    return units
+
+
+def _end_before_page_start(units: list[_Unit], floor: int, last: int, size: int, limit: int) -> int:
+    """Move the chunk end back to just before a page start, if the chunk stays full enough"""
+    if last + 1 >= len(units) or units[last + 1].page_start:
+        return last
+    fill = size
+    for i in range(last, floor, -1):
+        fill -= units[i].size
+        if units[i].page_start and fill >= limit * _PAGE_BREAK_MIN_FILL:
+            return i - 1
+    return last
+
+
+def _overlap_start(units: list[_Unit], floor: int, last: int, overlap_chars: int) -> int:
+    """First unit of the next chunk: the trailing units after floor that fit in overlap_chars"""
+    next_first = last + 1
+    overlap_size = 0
+    while (
+        overlap_chars
+        and next_first - 1 > floor
+        and overlap_size + units[next_first - 1].size <= overlap_chars
+    ):
+        next_first -= 1
+        overlap_size += units[next_first].size
+    return next_first
+
+
+def chunk_document(text: str, max_chars: int, overlap_chars: int = 0) -> list[DocumentChunk]:
+    """Split a document into chunks of at most max_chars characters.
+
+    Chunks are cut at page markers where possible and at paragraph boundaries
+    otherwise. Each chunk after the first repeats up to overlap_chars of the
+    previous chunk's trailing paragraphs, and a chunk that starts mid-page is
+    prefixed with that page's marker so page numbers stay correct.
+    """
+    if max_chars <= 0:
+        raise ValueError("max_chars must be positive")
+    if not text:
+        return []
+
+    # Reserve room for the page marker that may be prepended to a chunk
+    marker_room = len(page_marker(10 ** 6)) + 1
+    limit = max(1, max_chars - marker_room)
+    overlap_chars = max(0, min(overlap_chars, limit // 2))
+
+    units = _build_units(text, limit)
+    chunks: list[DocumentChunk] = []
+    first = 0
+    overlap_units = 0
+
+    while first < len(units):
+        last = first
+        size = units[first].size
+        while last + 1 < len(units) and size + units[last + 1].size <= limit:
+            last += 1
+            size += units[last].size
+
+        # Prefer to end the chunk right before a page starts
+        last = _end_before_page_start(units, first + overlap_units, last, size, limit)
+
+        chunk_units = units[first:last + 1]
+        start, end = chunk_units[0].start, chunk_units[-1].end
+        body = text[start:end]
+        if not chunk_units[0].page_start:
+            body = page_marker(chunk_units[0].page) + "\n" + body
+        overlap_size = units[first + overlap_units - 1].end - start if overlap_units else 0
+
+        chunks.append(DocumentChunk(
+            index=len(chunks),
+            text=body,
+            start=start,
+            end=end,
+            first_page=chunk_units[0].page,
+            last_page=chunk_units[-1].page,
+            overlap_chars=overlap_size,
+        ))
+
+        if last + 1 >= len(units):
+            break
+
+        # Step back over trailing paragraphs to form the overlap of the next chunk
+        next_first = _overlap_start(units, first + overlap_units, last, overlap_chars)
+        overlap_units = last + 1 - next_first
+        first = next_first
+
+    return chunks
+
+
+# Near-duplicate detection: MinHash signatures over word tokens, bucketed by LSH bands so
+# only issues sharing a band are compared. Candidates are confirmed by token-set Jaccard.
+_MINHASH_PERMUTATIONS = 16
+_MINHASH_ROWS_PER_BAND = 2
+_NEAR_DUPLICATE_SIMILARITY = 0.8
+_NON_WORD_PATTERN = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize_issue_text(value: Any) -> str:
+    """Normalize issue text for comparison: case, punctuation and whitespace insensitive"""
+    if value is None:
+        return ""
+    text = unicodedata.normalize("NFKC", str(value)).casefold()
+    return _NON_WORD_PATTERN.sub(" ", text).strip()
+
+
+def _issue_page(issue: dict[str, Any]) -> int | None:
+    page = issue.get("page")
+    try:
+        return int(page)
+    except (TypeError, ValueError):
+        return None
+
+
+def _pages_close(a: int | None, b: int | None, page_tolerance: int) -> bool:
+    if a is None or b is None:
+        return a is b
+    return abs(a - b) <= page_tolerance
+
+
+def _minhash_bands(tokens: frozenset[str]) -> list[tuple[int, tuple[int, ...]]]:
+    signature = [
+        min(hash((seed, token)) for token in tokens) for seed in range(_MINHASH_PERMUTATIONS)
+    ]
+    return [
+        (band, tuple(signature[band:band + _MINHASH_ROWS_PER_BAND]))
+        for band in range(0, _MINHASH_PERMUTATIONS, _MINHASH_ROWS_PER_BAND)
+    ]
+
+
+def _jaccard(a: frozenset[str], b: frozenset[str]) -> float:
+    return len(a & b) / len(a | b)
+
+
+def _page_sort_key(issue: Any) -> tuple[bool, int]:
+    page = _issue_page(issue) if isinstance(issue, dict) else None
+    return (page is None, page or 0)
+
+
+def merge_issues(issues: list[Any], page_tolerance: int = 1) -> list[Any]:
+    """Collapse duplicate issues reported by overlapping or repeated chunks.
+
+    Two issues are duplicates when their pages differ by at most page_tolerance
+    and their normalized original_text/suggestion are identical or share most
+    of their words. The first occurrence is kept and the result is sorted by page.
+    """
+    kept: list[Any] = []
+    exact_index: dict[tuple[str, str], list[int | None]] = {}
+    band_index: dict[tuple[int, tuple[int, ...]], list[tuple[int | None, frozenset[str]]]] = {}
+
+    for issue in issues:
+        if not isinstance(issue, dict):
+            kept.append(issue)
+            continue
+
+        page = _issue_page(issue)
+        original = normalize_issue_text(issue.get("original_text"))
+        suggestion = normalize_issue_text(issue.get("suggestion"))
+
+        text_key = (original, suggestion)
+        if any(
+            _pages_close(page, kept_page, page_tolerance)
+            for kept_page in exact_index.get(text_key, ())
+        ):
+            continue
+
+        tokens = frozenset(
+            [f"o:{word}" for word in original.split()]
+            + [f"s:{word}" for word in suggestion.split()]
+        )
+        bands = _minhash_bands(tokens) if tokens else []
+        candidates = {c for band in bands for c in band_index.get(band, ())}
+        if any(
+            _pages_close(page, candidate_page, page_tolerance)
+            and _jaccard(tokens, candidate_tokens) >= _NEAR_DUPLICATE_SIMILARITY
+            for candidate_page, candidate_tokens in candidates
+        ):
+            continue
+
+        kept.append(issue)
+        exact_index.setdefault(text_key, []).append(page)
+        for band in bands:
+            band_index.setdefault(band, []).append((page, tokens))
+
+    # Stable sort keeps chunk order within a page
+    return sorted(kept, key=_page_sort_key)
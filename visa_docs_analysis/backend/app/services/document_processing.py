@@ -53,8 +53,10 @@ def extract_text_from_pdf(file_content: bytes | BinaryIO) -> str:
         raise Exception(msg) from exc
 
 
-def extract_text_from_txt(file_content: bytes | str) -> str:
+def extract_text_from_txt(file_content: bytes | str | BinaryIO) -> str:
     try:
+        if not isinstance(file_content, bytes | str):
+            file_content = file_content.read()
         if isinstance(file_content, bytes):
             for enc in ["utf-8", "utf-16", "cp1251", "latin-1"]:
                 try:
@@ -69,7 +71,17 @@ def extract_text_from_txt(file_content: bytes | str) -> str:
         raise Exception(msg) from exc
 
 
-def detect_and_extract(file_name: str, content: bytes) -> str:
+def _head(content: bytes | BinaryIO, size: int = 4) -> bytes:
+    if isinstance(content, bytes):
+        return content[:size]
+    position = content.tell()
+    head = content.read(size)
+    content.seek(position)
+    return head
+
+
+def detect_and_extract(file_name: str, content: bytes | BinaryIO) -> str:
+    """Extract text by file name, or by content signature; files are read in place."""
     name = (file_name or "").lower()
     if name.endswith(".docx"):
         return extract_text_from_docx(content)
@@ -78,9 +90,10 @@ def detect_and_extract(file_name: str, content: bytes) -> str:
     if name.endswith(".txt"):
         return extract_text_from_txt(content)
     # fallback heuristics
-    if content.startswith(b"PK"):
+    head = _head(content)
+    if head.startswith(b"PK"):
         return extract_text_from_docx(content)
-    if content.startswith(b"%PDF"):
+    if head.startswith(b"%PDF"):
         return extract_text_from_pdf(content)
     return extract_text_from_txt(content)
 
@@ -1,28 +1,62 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+from collections.abc import Callable
 from typing import Any
 
 from google import genai  # type: ignore
 from google.genai import types  # type: ignore
-from tenacity import Retrying, retry_if_exception_type, stop_after_attempt, wait_exponential
+from tenacity import (
+    AsyncRetrying,
+    Retrying,
+    retry_if_exception,
+    retry_if_exception_type,
+    retry_if_not_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+    wait_random,
+)
 
 from ..config import get_settings
+from .chunking import DocumentChunk, chunk_document, merge_issues
+from .context_cache import get_context_cache_manager, is_cached_content_error
+from .gemini_pool import get_client_pool_stats, get_gemini_client
+from .json_stream import astream_issues, stream_issues
+from .rate_limiter import RateLimitTimeout, StatusCallback, get_rate_limiter
+from .response_cache import get_response_cache, make_cache_key
+from .single_flight import get_single_flight
+from .token_budget import estimate_tokens, plan_request
 
 logger = logging.getLogger(__name__)
 
+IssueCallback = Callable[[dict[str, Any], int], None]
+
 
 class GeminiClient:
+    model = "gemini-2.5-pro"
+
     def __init__(self) -> None:
         settings = get_settings()
         api_key = settings.gemini_api_key
         if not api_key:
             raise RuntimeError("GEMINI_API_KEY is not configured")
-        self.client = genai.Client(api_key=api_key)
+        # Shared per process so connections are reused across analyses and retries
+        self.client = get_gemini_client(api_key)
+        logger.info(f"Gemini client pool: {get_client_pool_stats()}")
+        self.context_cache = get_context_cache_manager(api_key, self.model, lambda: self.client)
+        self.chunk_overlap_chars = settings.gemini_chunk_overlap_chars
+        self.max_concurrent_chunks = max(1, settings.gemini_max_concurrent_chunks)
 
     @staticmethod
-    def _build_config(system_prompt: str) -> types.GenerateContentConfig:
+    def _build_config(
+            system_prompt: str, cached_content: str | None = None
+    ) -> types.GenerateContentConfig:
+        # A context cache already carries the system prompt; it must not be sent again
+        system_instruction = (
+            None if cached_content else [types.Part.from_text(text=system_prompt)]
+        )
         return types.GenerateContentConfig(
             temperature=0.3,
             thinking_config=types.ThinkingConfig(thinking_budget=-1),
@@ -47,40 +81,351 @@ class GeminiClient:
                     },
                 ),
             ),
-            system_instruction=[types.Part.from_text(text=system_prompt)],
+            system_instruction=system_instruction,
+            cached_content=cached_content,
+        )
+
+    def generate(
+            self,
+            system_prompt: str,
+            document_text: str,
+            on_issue: IssueCallback | None = None,
+            on_status: StatusCallback | None = None,
+    ) -> list[dict[str, Any]]:
+        """Analyze a document and return the list of issues.
+
+        With on_issue, the response is streamed and on_issue(issue, index) is called
+        for every issue as soon as it is complete; index restarts at the chunk's
+        offset if a call is retried. on_status receives rate limit queue positions
+        while a call waits for quota.
+        """
+        cache = get_response_cache()
+        if cache is None:
+            return self._generate_uncached(system_prompt, document_text, on_issue, on_status)
+
+        cache_key = make_cache_key(
+            document_text, system_prompt, self.model, self._build_config(system_prompt)
+        )
+        cached = cache.get_json(cache_key)
+        if cached is not None:
+            logger.info("Gemini response cache hit", extra=cache.stats())
+            return cached
+
+        results = self._generate_uncached(system_prompt, document_text, on_issue, on_status)
+        if not self._is_raw_fallback(results):
+            cache.set_json(cache_key, results)
+        return results
+
+    @staticmethod
+    def _is_raw_fallback(results: list[dict[str, Any]]) -> bool:
+        """True for the single-message placeholder returned when Gemini sends non-JSON."""
+        return len(results) == 1 and isinstance(results[0], dict) and set(results[0]) == {"message"}
+
+    @classmethod
+    def _check_chunk_results(
+            cls, chunk: DocumentChunk, total: int, results: list[dict[str, Any]]
+    ) -> None:
+        """Fail on a chunk whose reply did not parse.
+
+        Merged with the other chunks, the placeholder would no longer be recognized
+        as a raw fallback and the pages of this chunk would be cached as clean.
+        """
+        if isinstance(results, list) and cls._is_raw_fallback(results):
+            raise ValueError(f"Gemini returned non-JSON for chunk {chunk.index + 1}/{total}")
+
+    @staticmethod
+    def _offset_callback(on_issue: IssueCallback, offset: int) -> IssueCallback:
+        return lambda issue, index: on_issue(issue, offset + index)
+
+    @staticmethod
+    def _chunk_text(chunk: DocumentChunk, total: int) -> str:
+        # The chunk note goes into the user content so the system prompt stays cacheable
+        return (
+            f"Note: This is part {chunk.index + 1} of {total} of a larger document, "
+            f"covering {chunk.page_range}.\n\n{chunk.text}"
+        )
+
+    @staticmethod
+    def _contents(document_text: str) -> list[types.Content]:
+        return [
+            types.Content(
+                role="user",
+                parts=[types.Part.from_text(text=f"Analyze this document:\n\n{document_text}")],
+            )
+        ]
+
+    @staticmethod
+    def _parse_response(text: str | None) -> list[dict[str, Any]]:
+        try:
+            return json.loads(text or "")
+        except Exception:
+            logger.error("Gemini returned non-JSON; returning as raw list with single message")
+            return [{"message": text}]
+
+    @staticmethod
+    def _retry_policy() -> dict[str, Any]:
+        return {
+            "stop": stop_after_attempt(3),
+            "wait": wait_exponential(multiplier=1, min=1, max=8) + wait_random(0, 2),
+            # CancelledError is not an Exception, so cancellation is never retried
+            "retry": retry_if_exception_type(Exception)
+            & retry_if_not_exception_type(RateLimitTimeout)
+            # A rejected context cache fails the same way every time; it is retried inline
+            & retry_if_exception(lambda exc: not is_cached_content_error(exc)),
+            "reraise": True,
+        }
+
+    def _forget_stale_context_cache(
+            self, exc: Exception, system_prompt: str, cached_content: str | None
+    ) -> bool:
+        """Forget a context cache Gemini rejected; True if the call should be retried inline."""
+        if cached_content is None or self.context_cache is None:
+            return False
+        if not is_cached_content_error(exc):
+            return False
+        logger.warning(
+            f"Gemini rejected context cache {cached_content}, retrying with the prompt inline: "
+            f"{exc}"
+        )
+        self.context_cache.invalidate(system_prompt)
+        return True
+
+    def _generate_uncached(
+            self,
+            system_prompt: str,
+            document_text: str,
+            on_issue: IssueCallback | None = None,
+            on_status: StatusCallback | None = None,
+    ) -> list[dict[str, Any]]:
+        # Decide single call vs chunking from token counts, not characters
+        plan = plan_request(
+            document_text, system_prompt, self.model, self.client, self.chunk_overlap_chars
+        )
+        logger.info(f"Token plan: {plan.describe()}")
+        if not plan.chunked:
+            return self._generate_single(system_prompt, document_text, on_issue, on_status)
+
+        chunks = chunk_document(document_text, plan.chunk_chars, self.chunk_overlap_chars)
+        logger.info(f"Document is large, split into {len(chunks)} chunks")
+
+        results: list[dict[str, Any]] = []
+        for chunk in chunks:
+            # Number streamed issues across chunks
+            chunk_on_issue = (
+                self._offset_callback(on_issue, len(results)) if on_issue is not None else None
+            )
+            chunk_results = self._generate_single(
+                system_prompt, self._chunk_text(chunk, len(chunks)), chunk_on_issue, on_status
+            )
+            self._check_chunk_results(chunk, len(chunks), chunk_results)
+            if isinstance(chunk_results, list):
+                results.extend(chunk_results)
+            else:
+                results.append(chunk_results)
+
+        # Overlapping chunks report the same issues more than once
+        merged = merge_issues(results)
+        logger.info(f"Merged {len(results)} chunk issues into {len(merged)} unique issues")
+        return merged
+
+    def _generate_single(
+            self,
+            system_prompt: str,
+            document_text: str,
+            on_issue: IssueCallback | None = None,
+            on_status: StatusCallback | None = None,
+    ) -> list[dict[str, Any]]:
+        cached_content = (
+            self.context_cache.get_cached_content(system_prompt) if self.context_cache else None
         )
+        config = self._build_config(system_prompt, cached_content)
+        contents = self._contents(document_text)
 
-    def generate(self, system_prompt: str, document_text: str) -> list[dict[str, Any]]:
-        config = self._build_config(system_prompt)
+        request_tokens = estimate_tokens(system_prompt) + estimate_tokens(document_text)
+        limiter = get_rate_limiter()
 
         def _call() -> list[dict[str, Any]]:
-            result = self.client.models.generate_content(
-                model="gemini-2.5-pro",
-                config=config,
-                contents=[
-                    types.Content(
-                        role="user",
-                        parts=[
-                            types.Part.from_text(
-                                text=f"Analyze this document:\n\n{document_text}"
-                            )
-                        ],
+            # Every attempt waits for quota, so retries are spread out instead of piling up
+            if limiter is not None:
+                limiter.acquire(request_tokens, on_status)
+            if on_issue is not None:
+                fragments = (
+                    chunk.text
+                    for chunk in self.client.models.generate_content_stream(
+                        model=self.model, config=config, contents=contents
                     )
-                ],
+                    if chunk.text
+                )
+                text = stream_issues(fragments, on_issue)
+            else:
+                text = self.client.models.generate_content(
+                    model=self.model, config=config, contents=contents
+                ).text
+            return self._parse_response(text)
+
+        for attempt in Retrying(**self._retry_policy()):
+            with attempt:
+                try:
+                    return _call()
+                except Exception as exc:
+                    if not self._forget_stale_context_cache(exc, system_prompt, cached_content):
+                        raise
+                    cached_content = None
+                    config = self._build_config(system_prompt)
+                    return _call()
+
+        return []
+
+    async def generate_async(
+            self,
+            system_prompt: str,
+            document_text: str,
+            on_issue: IssueCallback | None = None,
+            on_status: StatusCallback | None = None,
+    ) -> list[dict[str, Any]]:
+        """Async variant of generate() built on the SDK's async client.
+
+        Nothing blocks the event loop while waiting on Gemini, retries or quota,
+        so one worker process can drive many analyses at once. Cancelling the
+        awaiting task aborts the in-flight request and any pending chunks.
+        """
+        cache = get_response_cache()
+        flight = get_single_flight()
+        if cache is None and flight is None:
+            return await self._generate_uncached_async(
+                system_prompt, document_text, on_issue, on_status
+            )
+
+        cache_key = make_cache_key(
+            document_text, system_prompt, self.model, self._build_config(system_prompt)
+        )
+        if cache is not None:
+            # Cache backends may do disk or network IO
+            cached = await asyncio.to_thread(cache.get_json, cache_key)
+            if cached is not None:
+                logger.info("Gemini response cache hit", extra=cache.stats())
+                return cached
+
+        async def _compute() -> list[dict[str, Any]]:
+            results = await self._generate_uncached_async(
+                system_prompt, document_text, on_issue, on_status
             )
-            try:
-                return json.loads(result.text)
-            except Exception:
-                logger.error("Gemini returned non-JSON; returning as raw list with single message")
-                return [{"message": result.text}]
-
-        for attempt in Retrying(
-                stop=stop_after_attempt(3),
-                wait=wait_exponential(multiplier=1, min=1, max=8),
-                retry=retry_if_exception_type(Exception),
-                reraise=True,
-        ):
+            if cache is not None and not self._is_raw_fallback(results):
+                await asyncio.to_thread(cache.set_json, cache_key, results)
+            return results
+
+        if flight is None:
+            return await _compute()
+        # Identical document and prompt submitted at the same time, possibly on another worker
+        return await flight.do(cache_key, _compute, on_wait=on_status)
+
+    async def _generate_uncached_async(
+            self,
+            system_prompt: str,
+            document_text: str,
+            on_issue: IssueCallback | None = None,
+            on_status: StatusCallback | None = None,
+    ) -> list[dict[str, Any]]:
+        # Planning may call the token counting endpoint
+        plan = await asyncio.to_thread(
+            plan_request,
+            document_text,
+            system_prompt,
+            self.model,
+            self.client,
+            self.chunk_overlap_chars,
+        )
+        logger.info(f"Token plan: {plan.describe()}")
+        if not plan.chunked:
+            return await self._generate_single_async(
+                system_prompt, document_text, on_issue, on_status
+            )
+
+        chunks = chunk_document(document_text, plan.chunk_chars, self.chunk_overlap_chars)
+        logger.info(f"Document is large, split into {len(chunks)} chunks")
+
+        semaphore = asyncio.Semaphore(self.max_concurrent_chunks)
+        emitted = 0
+
+        async def _run_chunk(chunk: DocumentChunk) -> list[dict[str, Any]]:
+            nonlocal emitted
+            async with semaphore:
+                chunk_results = await self._generate_single_async(
+                    system_prompt, self._chunk_text(chunk, len(chunks)), None, on_status
+                )
+            self._check_chunk_results(chunk, len(chunks), chunk_results)
+            if not isinstance(chunk_results, list):
+                chunk_results = [chunk_results]
+            # Chunks finish out of order, so issues are reported per finished chunk
+            if on_issue is not None:
+                for issue in chunk_results:
+                    on_issue(issue, emitted)
+                    emitted += 1
+            return chunk_results
+
+        tasks = [asyncio.create_task(_run_chunk(chunk)) for chunk in chunks]
+        try:
+            per_chunk = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        # Combine in chunk order; overlapping chunks report the same issues more than once
+        results = [issue for chunk_results in per_chunk for issue in chunk_results]
+        merged = merge_issues(results)
+        logger.info(f"Merged {len(results)} chunk issues into {len(merged)} unique issues")
+        return merged
+
+    async def _generate_single_async(
+            self,
+            system_prompt: str,
+            document_text: str,
+            on_issue: IssueCallback | None = None,
+            on_status: StatusCallback | None = None,
+    ) -> list[dict[str, Any]]:
+        cached_content = (
+            await asyncio.to_thread(self.context_cache.get_cached_content, system_prompt)
+            if self.context_cache
+            else None
+        )
+        config = self._build_config(system_prompt, cached_content)
+        contents = self._contents(document_text)
+
+        request_tokens = estimate_tokens(system_prompt) + estimate_tokens(document_text)
+        limiter = get_rate_limiter()
+
+        async def _call() -> list[dict[str, Any]]:
+            if limiter is not None:
+                await limiter.acquire_async(request_tokens, on_status)
+            if on_issue is not None:
+                stream = await self.client.aio.models.generate_content_stream(
+                    model=self.model, config=config, contents=contents
+                )
+                try:
+                    text = await astream_issues(
+                        (chunk.text async for chunk in stream if chunk.text), on_issue
+                    )
+                finally:
+                    # Close the HTTP stream promptly on errors and cancellation
+                    await stream.aclose()
+            else:
+                response = await self.client.aio.models.generate_content(
+                    model=self.model, config=config, contents=contents
+                )
+                text = response.text
+            return self._parse_response(text)
+
+        async for attempt in AsyncRetrying(**self._retry_policy()):
             with attempt:
-                return _call()
+                try:
+                    return await _call()
+                except Exception as exc:
+                    if not self._forget_stale_context_cache(exc, system_prompt, cached_content):
+                        raise
+                    cached_content = None
+                    config = self._build_config(system_prompt)
+                    return await _call()
 
         return []
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any
+
+import google_auth_httplib2  # type: ignore
+import httplib2  # type: ignore
+from googleapiclient.discovery import build, build_from_document  # type: ignore
+from googleapiclient.discovery_cache import get_static_doc  # type: ignore
+from googleapiclient.http import HttpRequest  # type: ignore
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_discovery_documents: dict[str, dict[str, Any]] = {}
+_discovery_lock = threading.Lock()
+
+
+def get_discovery_document(api: str, version: str) -> dict[str, Any] | None:
+    """Return the parsed discovery document bundled with google-api-python-client.
+
+    build() reads the same bundled documents, but loads and parses the JSON
+    again for every service it creates; here each one is parsed once per process.
+    """
+    key = f"{api}.{version}"
+    with _discovery_lock:
+        document = _discovery_documents.get(key)
+        if document is None:
+            raw = get_static_doc(api, version)
+            if raw is None:
+                return None
+            document = json.loads(raw)
+            _discovery_documents[key] = document
+        return document
+
+
+def _thread_local_request_builder(credentials: Any) -> Any:
+    # httplib2 connections are not thread-safe and Drive calls run in to_thread workers,
+    # so a shared service object gives each thread its own authorized connection
+    local = threading.local()
+
+    def build_request(_http: Any, *args: Any, **kwargs: Any) -> HttpRequest:
+        http = getattr(local, "http", None)
+        if http is None:
+            http = google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http())
+            local.http = http
+        return HttpRequest(http, *args, **kwargs)
+
+    return build_request
+
+
+class GoogleServiceCache:
+    """One Google API service object per (API, version, credentials), LRU-bounded.
+
+    Credentials are identified by client id and refresh token (or access
+    token), so tasks of the same user reuse the service and a fetch only pays
+    for the file request. Credentials with neither get a fresh, uncached service.
+    """
+
+    def __init__(self, max_size: int = 64):
+        self.max_size = max(1, max_size)
+        self._services: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(api: str, version: str, credentials: Any) -> str | None:
+        identity = getattr(credentials, "refresh_token", None)
+        if not identity:
+            identity = getattr(credentials, "token", None)
+        if not identity:
+            # Object ids are reused once the credentials are garbage collected
+            return None
+        raw = f"{api}.{version}:{getattr(credentials, 'client_id', '')}:{identity}"
+        # Never keep raw tokens around as dictionary keys
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, api: str, version: str, credentials: Any) -> Any:
+        key = self._key(api, version, credentials)
+        if key is None:
+            return self._build(api, version, credentials)
+        with self._lock:
+            service = self._services.get(key)
+            if service is not None:
+                self._services.move_to_end(key)
+                return service
+
+        service = self._build(api, version, credentials)
+        with self._lock:
+            self._services[key] = service
+            self._services.move_to_end(key)
+            while len(self._services) > self.max_size:
+                self._services.popitem(last=False)
+        return service
+
+    @staticmethod
+    def _build(api: str, version: str, credentials: Any) -> Any:
+        request_builder = _thread_local_request_builder(credentials)
+        document = get_discovery_document(api, version)
+        if document is None:
+            logger.warning(f"No bundled discovery document for {api} {version}, fetching it")
+            return build(
+                api,
+                version,
+                credentials=credentials,
+                cache_discovery=False,
+                static_discovery=False,
+                requestBuilder=request_builder,
+            )
+        return build_from_document(
+            document, credentials=credentials, requestBuilder=request_builder
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._services.clear()
+
+
+_service_cache: GoogleServiceCache | None = None
+_service_cache_lock = threading.Lock()
+
+
+def get_google_service(api: str, version: str, credentials: Any) -> Any:
+    """Return this process's shared service object for the given credentials."""
+    global _service_cache
+    with _service_cache_lock:
+        if _service_cache is None:
+            _service_cache = GoogleServiceCache(get_settings().google_service_cache_size)
+        cache = _service_cache
+    return cache.get(api, version, credentials)
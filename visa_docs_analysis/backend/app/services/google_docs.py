@@ -1,18 +1,23 @@
 from __future__ import annotations
 
+import asyncio
 import io
 import logging
+import tempfile
+from typing import BinaryIO
 
-import httpx
 from google.auth.transport.requests import Request  # type: ignore
 from google.oauth2.credentials import Credentials  # type: ignore
-from googleapiclient.discovery import build  # type: ignore
 from googleapiclient.http import MediaIoBaseDownload  # type: ignore
 
+from ..config import get_settings
 from .document_processing import (
     detect_and_extract,
     extract_google_drive_id,
 )
+from .google_api import get_google_service
+from .http_clients import get_http_session
+from .public_export import ExportFailed, get_public_export_fetcher
 
 logger = logging.getLogger(__name__)
 
@@ -24,13 +29,21 @@ class GoogleDocsFetcher:
         if self.credentials is not None:
             try:
                 self._ensure_fresh_credentials()
-                self.drive_service = build(
-                    "drive", "v3", credentials=self.credentials, cache_discovery=False
-                )
+                self.drive_service = get_google_service("drive", "v3", self.credentials)
             except Exception as exc:  # noqa: BLE001
                 logger.error(f"Error loading Drive service: {exc}")
 
     async def fetch_public_or_authenticated(self, url_or_id: str) -> str:
+        name, content = await self.fetch_file(url_or_id)
+        with content:
+            return await asyncio.to_thread(detect_and_extract, name, content)
+
+    async def fetch_file(self, url_or_id: str) -> tuple[str, BinaryIO]:
+        """Download the file without extracting it; returns (file name, rewound file).
+
+        Large authenticated downloads are spooled to a temporary file, so the
+        caller must close the returned file.
+        """
         file_id = extract_google_drive_id(url_or_id)
         # Try authenticated first if available
         if self.drive_service is not None:
@@ -39,9 +52,14 @@ class GoogleDocsFetcher:
             except Exception:
                 pass
         # Fallback to public
-        return await self._try_public(file_id)
+        name, content = await self._try_public(file_id)
+        return name, io.BytesIO(content)
 
-    async def _download_authenticated(self, file_id: str) -> str:
+    async def _download_authenticated(self, file_id: str) -> tuple[str, BinaryIO]:
+        # googleapiclient is blocking; keep it off the event loop shared with other analyses
+        return await asyncio.to_thread(self._download_authenticated_sync, file_id)
+
+    def _download_authenticated_sync(self, file_id: str) -> tuple[str, BinaryIO]:
         if self.drive_service is None:
             raise RuntimeError("Drive API not initialized")
         meta = (
@@ -62,39 +80,47 @@ class GoogleDocsFetcher:
                 fileId=file_id, supportsAllDrives=True
             )
 
-        fh = io.BytesIO()
-        downloader = MediaIoBaseDownload(fh, request)
-        done = False
-        while not done:
-            _, done = downloader.next_chunk()
+        settings = get_settings()
+        fh = tempfile.SpooledTemporaryFile(max_size=settings.google_download_spool_max_bytes)
+        try:
+            downloader = MediaIoBaseDownload(
+                fh, request, chunksize=settings.google_download_chunk_bytes
+            )
+            done = False
+            while not done:
+                _, done = downloader.next_chunk()
+        except BaseException:
+            fh.close()
+            raise
         fh.seek(0)
-        content = fh.read()
-        return detect_and_extract(name, content)
+        return name, fh
 
     def _ensure_fresh_credentials(self) -> None:
         if self.credentials and self.credentials.expired and self.credentials.refresh_token:
             try:
-                self.credentials.refresh(Request())
+                self.credentials.refresh(Request(session=get_http_session()))
             except Exception as exc:  # noqa: BLE001
                 logger.error(f"Failed to refresh Google credentials: {exc}")
 
     @staticmethod
-    async def _try_public(file_id: str) -> str:
+    async def _try_public(file_id: str) -> tuple[str, bytes]:
         urls = [
-            f"https://drive.google.com/uc?export=download&id={file_id}",
-            f"https://docs.google.com/document/d/{file_id}/export?format=txt",
-            f"https://docs.google.com/document/d/{file_id}/export?format=docx",
-            f"https://docs.google.com/presentation/d/{file_id}/export?format=txt",
-            f"https://docs.google.com/spreadsheets/d/{file_id}/export?format=csv",
+            ("download", f"https://drive.google.com/uc?export=download&id={file_id}"),
+            ("document_txt", f"https://docs.google.com/document/d/{file_id}/export?format=txt"),
+            ("document_docx", f"https://docs.google.com/document/d/{file_id}/export?format=docx"),
+            (
+                "presentation_txt",
+                f"https://docs.google.com/presentation/d/{file_id}/export?format=txt",
+            ),
+            (
+                "spreadsheet_csv",
+                f"https://docs.google.com/spreadsheets/d/{file_id}/export?format=csv",
+            ),
         ]
-        async with httpx.AsyncClient(timeout=30) as client:
-            for url in urls:
-                try:
-                    resp = await client.get(url)
-                    if resp.status_code == 200 and resp.content:
-                        name = "public"
-                        content = resp.content
-                        return detect_and_extract(name, content)
-                except Exception:
-                    continue
-        raise Exception("Could not access file as public document. File may be private or missing.")
+        try:
+            result = await get_public_export_fetcher().fetch(file_id, urls)
+        except ExportFailed as exc:
+            raise Exception(
+                "Could not access file as public document. File may be private or missing."
+            ) from exc
+        return "public", result.content
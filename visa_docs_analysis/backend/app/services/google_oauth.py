@@ -5,7 +5,6 @@ import logging
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
-import httpx
 from cryptography.fernet import Fernet  # type: ignore
 from google.auth.transport.requests import Request  # type: ignore
 from google.oauth2.credentials import Credentials  # type: ignore
@@ -13,6 +12,7 @@ from google.oauth2.credentials import Credentials  # type: ignore
 from ..config import get_settings
 from ..models.oauth_token import OAuthToken
 from ..models.user import User
+from .http_clients import get_async_http_client, get_http_session
 
 logger = logging.getLogger(__name__)
 
@@ -44,10 +44,9 @@ class GoogleOAuthService:
             "redirect_uri": self.settings.google_oauth_redirect_uri,
             "grant_type": "authorization_code",
         }
-        async with httpx.AsyncClient(timeout=30) as client:
-            resp = await client.post("https://oauth2.googleapis.com/token", data=data)
-            resp.raise_for_status()
-            return resp.json()
+        resp = await get_async_http_client().post("https://oauth2.googleapis.com/token", data=data)
+        resp.raise_for_status()
+        return resp.json()
 
     async def refresh_token(self, refresh_token: str) -> dict[str, Any]:
         data = {
@@ -56,10 +55,9 @@ class GoogleOAuthService:
             "grant_type": "refresh_token",
             "refresh_token": refresh_token,
         }
-        async with httpx.AsyncClient(timeout=30) as client:
-            resp = await client.post("https://oauth2.googleapis.com/token", data=data)
-            resp.raise_for_status()
-            return resp.json()
+        resp = await get_async_http_client().post("https://oauth2.googleapis.com/token", data=data)
+        resp.raise_for_status()
+        return resp.json()
 
     async def store_tokens(self, db, user: User, token_payload: dict[str, Any]) -> OAuthToken:
         access_token = token_payload["access_token"]
@@ -97,7 +95,7 @@ class GoogleOAuthService:
         # Best-effort refresh if expired
         try:
             if creds.expired and creds.refresh_token:
-                creds.refresh(Request())
+                creds.refresh(Request(session=get_http_session()))
         except Exception:  # noqa: BLE001
             pass
         return creds
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import logging
+import threading
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+_async_client: httpx.AsyncClient | None = None
+_async_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _http2_available() -> bool:
+    # httpx negotiates HTTP/2 only with the optional h2 package installed
+    return get_settings().http2 and importlib.util.find_spec("h2") is not None
+
+
+def get_http_session() -> requests.Session:
+    """Return this process's requests session; its keep-alive pool is shared by all threads.
+
+    Used for blocking calls such as google-auth token refreshes. Never set
+    per-user headers on it; pass them with each request instead.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            settings = get_settings()
+            adapter = HTTPAdapter(
+                pool_connections=settings.http_pool_hosts,
+                pool_maxsize=settings.http_max_keepalive_connections,
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Return this process's async HTTP client, pooled per host and HTTP/2 if available.
+
+    Like the database engine, its connections belong to the event loop that
+    opened them: the API's loop, or the worker runtime's loop.
+    """
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client_loop is not loop:
+        settings = get_settings()
+        _async_client = httpx.AsyncClient(
+            http2=_http2_available(),
+            timeout=settings.http_timeout_seconds,
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry_seconds,
+            ),
+        )
+        _async_client_loop = loop
+    return _async_client
+
+
+async def close_http_clients() -> None:
+    """Close pooled connections; must run on the event loop that uses the async client."""
+    global _session, _async_client, _async_client_loop
+    client, _async_client, _async_client_loop = _async_client, None, None
+    if client is not None:
+        try:
+            await client.aclose()
+        except Exception as exc:  # noqa: BLE001
+            logger.error(f"Failed to close HTTP client: {exc}")
+    with _session_lock:
+        session, _session = _session, None
+    if session is not None:
+        session.close()
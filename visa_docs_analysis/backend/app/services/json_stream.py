@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import json
+import logging
+import re
+from collections.abc import AsyncIterable, Callable, Iterable, Iterator
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Characters that can change the parser state; everything else is skipped in bulk
+_STRUCTURAL_PATTERN = re.compile(r"[\"\\{}\[\]]")
+_STRING_SPECIAL_PATTERN = re.compile(r"[\"\\]")
+
+
+class IssueStreamParser:
+    """Parse a JSON array of issue objects as it arrives in text fragments.
+
+    feed() returns every top-level object whose closing brace has arrived, so
+    issues can be shown while the model is still generating. The full text is
+    kept as a list of fragments and joined once, avoiding quadratic string
+    concatenation.
+    """
+
+    def __init__(self) -> None:
+        self._fragments: list[str] = []
+        self._object_parts: list[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.issues_emitted = 0
+
+    @property
+    def text(self) -> str:
+        """The complete text received so far."""
+        return "".join(self._fragments)
+
+    def feed(self, fragment: str) -> list[dict[str, Any]]:
+        """Consume a text fragment and return the objects completed by it."""
+        if not fragment:
+            return []
+        self._fragments.append(fragment)
+
+        completed: list[dict[str, Any]] = []
+        # Offset in this fragment where the currently open top-level object starts
+        object_start = 0 if self._object_parts else None
+        pos = 0
+        length = len(fragment)
+
+        while pos < length:
+            match = self._next_bracket(fragment, pos)
+            if match is None:
+                break
+            char = match.group()
+            pos = match.end()
+
+            if char in "{[":
+                self._depth += 1
+                # Objects directly inside the top-level array are issues
+                if char == "{" and self._depth == 2:
+                    object_start = match.start()
+                    self._object_parts = []
+            else:
+                self._depth -= 1
+                if char == "}" and self._depth == 1 and object_start is not None:
+                    self._object_parts.append(fragment[object_start:pos])
+                    issue = self._decode("".join(self._object_parts))
+                    self._object_parts = []
+                    object_start = None
+                    if issue is not None:
+                        completed.append(issue)
+
+        if object_start is not None:
+            self._object_parts.append(fragment[object_start:])
+
+        self.issues_emitted += len(completed)
+        return completed
+
+    def _next_bracket(self, fragment: str, pos: int) -> re.Match[str] | None:
+        """Find the next brace or bracket from pos that is not inside a string."""
+        length = len(fragment)
+        while pos < length:
+            if self._in_string:
+                pos = self._skip_string(fragment, pos)
+                continue
+            match = _STRUCTURAL_PATTERN.search(fragment, pos)
+            if match is None or match.group() != '"':
+                return match
+            self._in_string = True
+            pos = match.end()
+        return None
+
+    def _skip_string(self, fragment: str, pos: int) -> int:
+        """Scan the open string from pos and return where parsing continues.
+
+        Stops after the closing quote, after a backslash (the escaped character
+        is skipped next), or at the end of the fragment if the string goes on.
+        """
+        if self._escape:
+            self._escape = False
+            return pos + 1
+        match = _STRING_SPECIAL_PATTERN.search(fragment, pos)
+        if match is None:
+            return len(fragment)
+        if match.group() == "\\":
+            self._escape = True
+        else:
+            self._in_string = False
+        return match.end()
+
+    @staticmethod
+    def _decode(raw: str) -> dict[str, Any] | None:
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            logger.error(f"Skipping malformed streamed issue: {raw[:200]}")
+            return None
+        return value if isinstance(value, dict) else None
+
+
+def iter_issues(
+        fragments: Iterable[str], parser: IssueStreamParser | None = None
+) -> Iterator[dict[str, Any]]:
+    """Yield issue objects from an iterable of text fragments as soon as each is complete."""
+    parser = parser or IssueStreamParser()
+    for fragment in fragments:
+        yield from parser.feed(fragment)
+
+
+def stream_issues(
+        fragments: Iterable[str],
+        on_issue: Callable[[dict[str, Any], int], None] | None = None,
+) -> str:
+    """Feed text fragments through the parser, calling on_issue(issue, index) for each issue.
+
+    Returns the full response text for final parsing.
+    """
+    parser = IssueStreamParser()
+    for fragment in fragments:
+        first_index = parser.issues_emitted
+        for offset, issue in enumerate(parser.feed(fragment)):
+            if on_issue:
+                on_issue(issue, first_index + offset)
+    return parser.text
+
+
+async def astream_issues(
+        fragments: AsyncIterable[str],
+        on_issue: Callable[[dict[str, Any], int], None] | None = None,
+) -> str:
+    """Async counterpart of stream_issues for the SDK's async response streams."""
+    parser = IssueStreamParser()
+    async for fragment in fragments:
+        first_index = parser.issues_emitted
+        for offset, issue in enumerate(parser.feed(fragment)):
+            if on_issue:
+                on_issue(issue, first_index + offset)
+    return parser.text
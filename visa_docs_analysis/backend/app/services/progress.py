@@ -1,17 +1,31 @@
 from __future__ import annotations
 
 import json
-import os
 from typing import Any
 
-import redis
+from ..config import get_settings
+from .redis_client import get_redis
+
+# Stages after which a task publishes nothing more
+TERMINAL_STAGES = frozenset({"succeeded", "failed", "canceled"})
 
 
 class ProgressPublisher:
+    """Publish task progress and keep a replayable record of it.
+
+    Besides the pub/sub message, every update gets a per-task sequence number
+    and is appended to a capped history list; stage updates (not streamed
+    issues) also overwrite a last-state key. Late WebSocket clients replay
+    these and skip live messages they already saw by sequence number.
+    """
+
     def __init__(self, channel_prefix: str = "task_progress:"):
-        url = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
-        self._r = redis.Redis.from_url(url)
+        # Shares the process's Redis connection pool instead of opening one per task
+        self._r = get_redis()
         self._prefix = channel_prefix
+        settings = get_settings()
+        self._history_max = settings.progress_history_max
+        self._ttl_seconds = settings.progress_state_ttl_seconds
 
     def publish(self, task_id: str, progress: int, stage: str, message: str | None = None) -> None:
         payload: dict[str, Any] = {
@@ -19,4 +33,40 @@ class ProgressPublisher:
             "stage": stage,
             "message": message,
         }
-        self._r.publish(self._prefix + task_id, json.dumps(payload))
+        self._send(task_id, payload, is_state=True)
+
+    def publish_issue(
+            self, task_id: str, progress: int, index: int, issue: dict[str, Any]
+    ) -> None:
+        """Publish one issue while the model response is still streaming."""
+        payload: dict[str, Any] = {
+            "progress": progress,
+            "stage": "issue",
+            "message": None,
+            "index": index,
+            "issue": issue,
+        }
+        self._send(task_id, payload, is_state=False)
+
+    def _send(self, task_id: str, payload: dict[str, Any], is_state: bool) -> None:
+        keys = progress_keys(task_id)
+        payload["seq"] = int(self._r.incr(keys["seq"]))
+        data = json.dumps(payload)
+        pipe = self._r.pipeline(transaction=True)
+        if is_state:
+            pipe.set(keys["state"], data, ex=self._ttl_seconds)
+        pipe.rpush(keys["history"], data)
+        pipe.ltrim(keys["history"], -self._history_max, -1)
+        pipe.expire(keys["history"], self._ttl_seconds)
+        pipe.expire(keys["seq"], self._ttl_seconds)
+        # Published last, so a subscriber that sees it can already read it from history
+        pipe.publish(self._prefix + task_id, data)
+        pipe.execute()
+
+
+def progress_keys(task_id: str) -> dict[str, str]:
+    return {
+        "seq": f"task_progress_seq:{task_id}",
+        "state": f"task_progress_state:{task_id}",
+        "history": f"task_progress_history:{task_id}",
+    }
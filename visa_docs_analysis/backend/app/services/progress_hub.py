@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+from typing import Any
+
+import redis.asyncio as aioredis
+
+from ..config import get_settings
+from .progress import progress_keys
+
+logger = logging.getLogger(__name__)
+
+# Delay before reconnecting after the subscriber connection failed, doubled up to the maximum
+_RECONNECT_DELAY_SECONDS = 0.5
+_MAX_RECONNECT_DELAY_SECONDS = 10.0
+
+
+class ProgressSubscription:
+    """Progress messages of one task for one consumer, buffered in a bounded queue.
+
+    last_seq is the highest seq queued for or already sent by the consumer;
+    messages at or below it, e.g. history offered again after the hub
+    reconnected to Redis, are not queued a second time.
+    """
+
+    def __init__(self, task_id: str, max_queued: int):
+        self.task_id = task_id
+        self.dropped = False
+        self.last_seq = 0
+        self._queue: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue(max_queued)
+
+    @property
+    def free_slots(self) -> int:
+        return self._queue.maxsize - self._queue.qsize()
+
+    def mark_delivered(self, seq: int) -> None:
+        """Skip messages up to seq, e.g. ones the consumer already sent from a replay."""
+        self.last_seq = max(self.last_seq, seq)
+
+    def _offer(self, message: dict[str, Any]) -> bool:
+        """Queue a message; False if the consumer fell too far behind and was dropped."""
+        if self.dropped:
+            return False
+        seq = message.get("seq")
+        if seq is not None and seq <= self.last_seq:
+            return True
+        try:
+            self._queue.put_nowait(message)
+            if seq is not None:
+                self.last_seq = seq
+            return True
+        except asyncio.QueueFull:
+            self.dropped = True
+            # Make room for the end marker so a waiting get() wakes up
+            with contextlib.suppress(asyncio.QueueEmpty):
+                self._queue.get_nowait()
+            self._queue.put_nowait(None)
+            return False
+
+    async def get(self) -> dict[str, Any] | None:
+        """Next message, or None once the subscription was dropped for being too slow."""
+        if self.dropped and self._queue.empty():
+            return None
+        return await self._queue.get()
+
+
+class ProgressHub:
+    """One Redis pattern subscription per process, fanned out to every watching WebSocket.
+
+    Each published message is decoded once and offered to the subscribers of
+    its task without waiting; a subscriber whose queue is full is dropped
+    instead of slowing down everyone else, so thousands of watchers cost one
+    Redis connection.
+    """
+
+    def __init__(
+            self,
+            redis_url: str,
+            channel_prefix: str = "task_progress:",
+            max_queued: int = 100,
+    ):
+        self.redis_url = redis_url
+        self.channel_prefix = channel_prefix
+        self.max_queued = max_queued
+        self._subscribers: dict[str, set[ProgressSubscription]] = {}
+        self._reader: asyncio.Task[None] | None = None
+        self._client: aioredis.Redis | None = None
+
+    def start(self) -> None:
+        """Start the Redis subscription if it is not running; must be called on the event loop."""
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._read_forever())
+
+    def subscribe(self, task_id: str) -> ProgressSubscription:
+        subscription = ProgressSubscription(task_id, self.max_queued)
+        self._subscribers.setdefault(task_id, set()).add(subscription)
+        self.start()
+        return subscription
+
+    def unsubscribe(self, subscription: ProgressSubscription) -> None:
+        watchers = self._subscribers.get(subscription.task_id)
+        if watchers is not None:
+            watchers.discard(subscription)
+            if not watchers:
+                del self._subscribers[subscription.task_id]
+
+    async def replay(self, task_id: str) -> list[dict[str, Any]]:
+        """Messages a late subscriber missed, oldest first.
+
+        The history is capped, so the last state is prepended when it is older
+        than everything kept (e.g. a long run of streamed issues since).
+        """
+        if self._client is None:
+            self._client = aioredis.from_url(self.redis_url)
+        keys = progress_keys(task_id)
+        async with self._client.pipeline(transaction=False) as pipe:
+            pipe.get(keys["state"])
+            pipe.lrange(keys["history"], 0, -1)
+            state_data, history_data = await pipe.execute()
+
+        history = [json.loads(item) for item in history_data]
+        if state_data is not None:
+            state = json.loads(state_data)
+            if not history or state.get("seq", 0) < history[0].get("seq", 0):
+                history.insert(0, state)
+        return history
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(watchers) for watchers in self._subscribers.values())
+
+    def _dispatch(self, channel: bytes | str, data: bytes | str) -> None:
+        if isinstance(channel, bytes):
+            channel = channel.decode("utf-8")
+        task_id = channel[len(self.channel_prefix):]
+        watchers = self._subscribers.get(task_id)
+        if not watchers:
+            return
+        try:
+            message = json.loads(data)
+        except ValueError:
+            logger.error(f"Ignoring malformed progress message on {channel}")
+            return
+        self._fan_out(task_id, message)
+
+    def _fan_out(self, task_id: str, message: dict[str, Any]) -> None:
+        watchers = self._subscribers.get(task_id)
+        if not watchers:
+            return
+        for subscription in list(watchers):
+            if not subscription._offer(message):
+                logger.warning(f"Dropped slow progress subscriber of task {task_id}")
+                watchers.discard(subscription)
+        if not watchers:
+            self._subscribers.pop(task_id, None)
+
+    async def _read_forever(self) -> None:
+        delay = _RECONNECT_DELAY_SECONDS
+        while True:
+            client = aioredis.from_url(self.redis_url)
+            pubsub = client.pubsub()
+            try:
+                await pubsub.psubscribe(f"{self.channel_prefix}*")
+                logger.info(f"Progress hub subscribed to {self.channel_prefix}*")
+                delay = _RECONNECT_DELAY_SECONDS
+                await self._catch_up()
+                async for message in pubsub.listen():
+                    if message.get("type") == "pmessage":
+                        self._dispatch(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001
+                logger.error(f"Progress hub connection failed, reconnecting in {delay:.1f}s: {exc}")
+            finally:
+                with contextlib.suppress(Exception):
+                    await pubsub.aclose()
+                    await client.aclose()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _MAX_RECONNECT_DELAY_SECONDS)
+
+    async def _catch_up(self) -> None:
+        """Offer each subscriber the history it missed once the subscription is up.
+
+        Covers what was published while the connection was down (or before the
+        first subscription was established); messages arriving from now on are
+        delivered by the subscription, after the history. Only messages newer
+        than a subscriber's last_seq are offered, and no more than fit in its
+        queue, so catching up never drops a subscriber for being slow.
+        """
+        for task_id in list(self._subscribers):
+            history = await self.replay(task_id)
+            for subscription in list(self._subscribers.get(task_id, ())):
+                missed = [
+                    message for message in history if message.get("seq", 0) > subscription.last_seq
+                ]
+                skipped = max(0, len(missed) - subscription.free_slots)
+                if skipped:
+                    # The oldest go first; the task result still has every issue
+                    logger.warning(f"Skipped {skipped} replayed progress messages of {task_id}")
+                for message in missed[skipped:]:
+                    subscription._offer(message)
+
+    async def stop(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+            self._reader = None
+        if self._client is not None:
+            with contextlib.suppress(Exception):
+                await self._client.aclose()
+            self._client = None
+
+
+_hub: ProgressHub | None = None
+
+
+def get_progress_hub() -> ProgressHub:
+    """Return this process's hub; the API starts its Redis subscription at startup."""
+    global _hub
+    if _hub is None:
+        settings = get_settings()
+        _hub = ProgressHub(
+            settings.redis_url or "redis://localhost:6379/0",
+            max_queued=settings.progress_ws_max_queued,
+        )
+    return _hub
+
+
+async def shutdown_progress_hub() -> None:
+    global _hub
+    hub, _hub = _hub, None
+    if hub is not None:
+        await hub.stop()
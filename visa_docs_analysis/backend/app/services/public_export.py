@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+import httpx
+
+from ..config import get_settings
+from .http_clients import get_async_http_client
+
+logger = logging.getLogger(__name__)
+
+
+class ExportResult(NamedTuple):
+    fmt: str
+    url: str
+    content: bytes
+
+
+class ExportFailed(Exception):
+    """Raised when no export URL returned the document before the deadline."""
+
+
+class PublicExportFetcher:
+    """Fetch a public Google document from whichever export URL answers first.
+
+    All candidate URLs are requested concurrently under one shared deadline and
+    the losers are cancelled once one returns the document. The winning format
+    is remembered per document id; repeat fetches request that URL first and
+    start the others in the same race only if it fails or has not answered
+    within hedge_delay_seconds, so a stalled URL cannot use up the deadline.
+    """
+
+    def __init__(
+            self,
+            deadline_seconds: float = 30.0,
+            memory_size: int = 1024,
+            hedge_delay_seconds: float = 2.0,
+    ):
+        self.deadline_seconds = deadline_seconds
+        self.memory_size = max(1, memory_size)
+        self.hedge_delay_seconds = hedge_delay_seconds
+        self._formats: OrderedDict[str, str] = OrderedDict()
+        # Shared by the event loops of a worker process and the API
+        self._lock = threading.Lock()
+
+    def remembered_format(self, doc_id: str) -> str | None:
+        with self._lock:
+            fmt = self._formats.get(doc_id)
+            if fmt is not None:
+                self._formats.move_to_end(doc_id)
+            return fmt
+
+    def _remember(self, doc_id: str, fmt: str | None) -> None:
+        with self._lock:
+            if fmt is None:
+                self._formats.pop(doc_id, None)
+                return
+            self._formats[doc_id] = fmt
+            self._formats.move_to_end(doc_id)
+            while len(self._formats) > self.memory_size:
+                self._formats.popitem(last=False)
+
+    async def fetch(self, doc_id: str, candidates: list[tuple[str, str]]) -> ExportResult:
+        """Return the first successful export among (format, url) candidates."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline_seconds
+        client = get_async_http_client()
+        hedge_delay = None
+        known = self.remembered_format(doc_id)
+        if known is not None and any(fmt == known for fmt, _ in candidates):
+            # Stable sort: the remembered URL first, the others keep their order
+            candidates = sorted(candidates, key=lambda candidate: candidate[0] != known)
+            hedge_delay = self.hedge_delay_seconds
+
+        result = await self._race(client, candidates, deadline, hedge_delay)
+        if known is not None and result.fmt != known:
+            logger.info(f"Remembered export format '{known}' lost for {doc_id} to '{result.fmt}'")
+        self._remember(doc_id, result.fmt)
+        return result
+
+    async def _race(
+            self,
+            client: httpx.AsyncClient,
+            candidates: list[tuple[str, str]],
+            deadline: float,
+            hedge_delay: float | None = None,
+    ) -> ExportResult:
+        """First successful download; with hedge_delay, only the first candidate starts at once.
+
+        The others are started once it fails or after hedge_delay seconds.
+        """
+        if not candidates:
+            raise ExportFailed("No export URLs to try")
+        loop = asyncio.get_running_loop()
+        later = candidates[1:] if hedge_delay is not None else []
+        hedge_at = loop.time() + (hedge_delay or 0.0)
+        pending = {
+            asyncio.create_task(self._download(client, fmt, url, deadline))
+            for fmt, url in candidates[:len(candidates) - len(later)]
+        }
+        try:
+            while pending or later:
+                now = loop.time()
+                if later and (not pending or now >= hedge_at):
+                    pending |= {
+                        asyncio.create_task(self._download(client, fmt, url, deadline))
+                        for fmt, url in later
+                    }
+                    later = []
+                remaining = deadline - now
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=min(remaining, hedge_at - now) if later else remaining,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            raise ExportFailed(f"No export URL answered within {self.deadline_seconds:.0f}s")
+        finally:
+            for task in pending:
+                task.cancel()
+            with contextlib.suppress(Exception):
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    @staticmethod
+    async def _download(
+            client: httpx.AsyncClient, fmt: str, url: str, deadline: float
+    ) -> ExportResult:
+        remaining = deadline - asyncio.get_running_loop().time()
+        async with client.stream(
+            "GET", url, timeout=max(remaining, 0.001), follow_redirects=True
+        ) as response:
+            if response.status_code != 200:
+                raise ExportFailed(f"{url} returned {response.status_code}")
+            # Private documents redirect to a sign-in page instead of failing
+            if "text/html" in response.headers.get("content-type", ""):
+                raise ExportFailed(f"{url} returned a web page instead of the document")
+            content = await response.aread()
+        if not content:
+            raise ExportFailed(f"{url} returned an empty document")
+        return ExportResult(fmt, url, content)
+
+
+_fetcher: PublicExportFetcher | None = None
+
+
+def get_public_export_fetcher() -> PublicExportFetcher:
+    """Return this process's fetcher; the format memory is shared by all its tasks."""
+    global _fetcher
+    if _fetcher is None:
+        settings = get_settings()
+        _fetcher = PublicExportFetcher(
+            settings.google_export_deadline_seconds,
+            settings.google_export_format_memory_size,
+            settings.google_export_hedge_delay_seconds,
+        )
+    return _fetcher
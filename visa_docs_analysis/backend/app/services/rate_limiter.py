@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+StatusCallback = Callable[[str], None]
+
+# Upper bound between two checks of a waiting caller
+_POLL_INTERVAL_SECONDS = 1.0
+# Minimum time between two status messages while the queue position does not change
+_STATUS_INTERVAL_SECONDS = 5.0
+
+
+class RateLimitTimeout(Exception):
+    """Raised when quota did not become available within the allowed wait."""
+
+
+@dataclass
+class _Waiter:
+    tokens: int
+    ticket: str = field(default_factory=lambda: uuid.uuid4().hex)
+    started: float = field(default_factory=time.monotonic)
+    last_position: int | None = None
+    last_reported: float = 0.0
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets with an ordered wait queue.
+
+    The caller at position p may take from the buckets once p requests and the
+    tokens of it and everyone ahead of it have refilled, so waiting callers are
+    released in order instead of all retrying at once, and a large request at
+    the head is not starved by smaller ones behind it.
+    """
+
+    def __init__(
+            self,
+            requests_per_minute: int,
+            tokens_per_minute: int,
+            max_wait_seconds: float = 600.0,
+            sleep: Callable[[float], None] = time.sleep,
+    ):
+        if requests_per_minute <= 0 or tokens_per_minute <= 0:
+            raise ValueError("Rate limits must be positive")
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_wait_seconds = max_wait_seconds
+        self.sleep = sleep
+
+    def _try_acquire(self, ticket: str, tokens: int) -> tuple[bool, int, float]:
+        """Take quota if possible; returns (granted, queue position, wait seconds)."""
+        raise NotImplementedError
+
+    def _abandon(self, ticket: str) -> None:
+        raise NotImplementedError
+
+    def _next_delay(
+            self,
+            waiter: _Waiter,
+            granted: bool,
+            position: int,
+            wait: float,
+            on_status: StatusCallback | None,
+    ) -> float | None:
+        """Seconds to sleep before the next attempt, or None once quota was granted."""
+        now = time.monotonic()
+        waited = now - waiter.started
+        if granted:
+            if waited >= 1:
+                logger.info(f"Waited {waited:.1f}s for Gemini rate limit")
+            return None
+        if waited + wait > self.max_wait_seconds:
+            raise RateLimitTimeout(
+                f"Gemini quota not available within {self.max_wait_seconds:.0f} seconds "
+                f"(position {position} in queue)"
+            )
+
+        changed = position != waiter.last_position
+        if on_status and (changed or now - waiter.last_reported >= _STATUS_INTERVAL_SECONDS):
+            on_status(f"Waiting for Gemini quota: position {position} in queue (~{wait:.0f}s)")
+            waiter.last_position = position
+            waiter.last_reported = now
+        return min(max(wait, 0.05), _POLL_INTERVAL_SECONDS)
+
+    def _waiter(self, tokens: int) -> _Waiter:
+        # A request larger than the whole bucket would never fit; let it drain the bucket instead
+        return _Waiter(tokens=max(1, min(int(tokens), self.tokens_per_minute)))
+
+    def acquire(self, tokens: int = 1, on_status: StatusCallback | None = None) -> float:
+        """Block until one request of the given token cost may be sent; returns seconds waited."""
+        waiter = self._waiter(tokens)
+        try:
+            while True:
+                granted, position, wait = self._try_acquire(waiter.ticket, waiter.tokens)
+                delay = self._next_delay(waiter, granted, position, wait, on_status)
+                if delay is None:
+                    return time.monotonic() - waiter.started
+                self.sleep(delay)
+        except BaseException:
+            self._abandon(waiter.ticket)
+            raise
+
+    async def acquire_async(
+            self, tokens: int = 1, on_status: StatusCallback | None = None
+    ) -> float:
+        """Wait for quota without blocking the event loop; cancelling leaves the queue."""
+        waiter = self._waiter(tokens)
+        try:
+            while True:
+                # The storage call may block on Redis, so it runs off the loop
+                granted, position, wait = await asyncio.to_thread(
+                    self._try_acquire, waiter.ticket, waiter.tokens
+                )
+                delay = self._next_delay(waiter, granted, position, wait, on_status)
+                if delay is None:
+                    return time.monotonic() - waiter.started
+                await asyncio.sleep(delay)
+        except BaseException:
+            self._abandon(waiter.ticket)
+            raise
+
+
+class InProcessRateLimiter(RateLimiter):
+    """Rate limiter for the threads of a single process."""
+
+    def __init__(
+            self,
+            requests_per_minute: int,
+            tokens_per_minute: int,
+            max_wait_seconds: float = 600.0,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], None] = time.sleep,
+    ):
+        super().__init__(requests_per_minute, tokens_per_minute, max_wait_seconds, sleep)
+        self.clock = clock
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = clock()
+        # Waiting tickets in arrival order, with their token cost
+        self._queue: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        elapsed = max(0.0, now - self._updated)
+        self._updated = now
+        self._requests = min(
+            self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60
+        )
+        self._tokens = min(
+            self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60
+        )
+
+    def _try_acquire(self, ticket: str, tokens: int) -> tuple[bool, int, float]:
+        with self._lock:
+            self._queue.setdefault(ticket, tokens)
+            position = 0
+            demand = 0
+            for queued, cost in self._queue.items():
+                position += 1
+                demand += cost
+                if queued == ticket:
+                    break
+
+            # Quota must cover this request and every request queued ahead of it, in requests
+            # and in tokens, so small requests cannot drain the tokens a large one is waiting for
+            self._refill()
+            wait = max(
+                (position - self._requests) * 60 / self.requests_per_minute,
+                (demand - self._tokens) * 60 / self.tokens_per_minute,
+                0.0,
+            )
+            if wait > 0:
+                return False, position, wait
+
+            self._requests -= 1
+            self._tokens -= tokens
+            del self._queue[ticket]
+            return True, position, 0.0
+
+    def _abandon(self, ticket: str) -> None:
+        with self._lock:
+            self._queue.pop(ticket, None)
+
+
+# Atomically: register the caller in the queue, drop waiters that stopped polling, and take
+# from both buckets if enough requests and tokens have refilled for the caller and everyone
+# queued ahead of it.
+_REDIS_ACQUIRE_SCRIPT = """
+local bucket, queue, heartbeats, counter, costs = KEYS[1], KEYS[2], KEYS[3], KEYS[4], KEYS[5]
+local rpm, tpm = tonumber(ARGV[1]), tonumber(ARGV[2])
+local ticket, cost, stale_after = ARGV[3], tonumber(ARGV[4]), tonumber(ARGV[5])
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+if not redis.call('ZSCORE', queue, ticket) then
+    redis.call('ZADD', queue, redis.call('INCR', counter), ticket)
+    redis.call('HSET', costs, ticket, cost)
+end
+redis.call('ZADD', heartbeats, now, ticket)
+
+local stale = redis.call('ZRANGEBYSCORE', heartbeats, '-inf', now - stale_after)
+for _, member in ipairs(stale) do
+    redis.call('ZREM', queue, member)
+    redis.call('ZREM', heartbeats, member)
+    redis.call('HDEL', costs, member)
+end
+
+local position = redis.call('ZRANK', queue, ticket) + 1
+local ahead = redis.call('ZRANGE', queue, 0, position - 1)
+local demand = 0
+for _, queued_cost in ipairs(redis.call('HMGET', costs, unpack(ahead))) do
+    demand = demand + (tonumber(queued_cost) or 0)
+end
+
+local state = redis.call('HMGET', bucket, 'requests', 'tokens', 'updated')
+local requests = tonumber(state[1]) or rpm
+local tokens = tonumber(state[2]) or tpm
+local updated = tonumber(state[3]) or now
+local elapsed = math.max(0, now - updated)
+requests = math.min(rpm, requests + elapsed * rpm / 60)
+tokens = math.min(tpm, tokens + elapsed * tpm / 60)
+
+local wait = math.max((position - requests) * 60 / rpm, (demand - tokens) * 60 / tpm, 0)
+local granted = 0
+if wait <= 0 then
+    requests = requests - 1
+    tokens = tokens - cost
+    granted = 1
+    redis.call('ZREM', queue, ticket)
+    redis.call('ZREM', heartbeats, ticket)
+    redis.call('HDEL', costs, ticket)
+end
+redis.call(
+    'HSET', bucket,
+    'requests', tostring(requests), 'tokens', tostring(tokens), 'updated', tostring(now)
+)
+redis.call('EXPIRE', bucket, 120)
+return {granted, position, tostring(wait)}
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    """Rate limiter shared by all workers and web processes using the same Redis and prefix.
+
+    Waiters that stop polling (e.g. a killed worker) are dropped from the queue
+    after stale_after_seconds.
+    """
+
+    def __init__(
+            self,
+            client: Any,
+            requests_per_minute: int,
+            tokens_per_minute: int,
+            prefix: str = "gemini_rate:",
+            max_wait_seconds: float = 600.0,
+            stale_after_seconds: float = 30.0,
+            sleep: Callable[[float], None] = time.sleep,
+    ):
+        super().__init__(requests_per_minute, tokens_per_minute, max_wait_seconds, sleep)
+        self.client = client
+        self.stale_after_seconds = stale_after_seconds
+        self._keys = [
+            f"{prefix}bucket",
+            f"{prefix}queue",
+            f"{prefix}heartbeats",
+            f"{prefix}counter",
+            f"{prefix}costs",
+        ]
+
+    def _try_acquire(self, ticket: str, tokens: int) -> tuple[bool, int, float]:
+        granted, position, wait = self.client.eval(
+            _REDIS_ACQUIRE_SCRIPT,
+            len(self._keys),
+            *self._keys,
+            self.requests_per_minute,
+            self.tokens_per_minute,
+            ticket,
+            tokens,
+            self.stale_after_seconds,
+        )
+        if isinstance(wait, bytes):
+            wait = wait.decode("utf-8")
+        return bool(int(granted)), int(position), float(wait)
+
+    def _abandon(self, ticket: str) -> None:
+        try:
+            self.client.zrem(self._keys[1], ticket)
+            self.client.zrem(self._keys[2], ticket)
+            self.client.hdel(self._keys[4], ticket)
+        except Exception as exc:  # noqa: BLE001
+            logger.error(f"Failed to leave Gemini rate limit queue: {exc}")
+
+
+_limiter: RateLimiter | None = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter | None:
+    """Return the process-wide rate limiter configured in settings, or None if disabled."""
+    global _limiter
+    settings = get_settings()
+    if settings.gemini_rate_limit_backend == "off":
+        return None
+    with _limiter_lock:
+        if _limiter is None:
+            if settings.gemini_rate_limit_backend == "redis":
+                from .redis_client import get_redis
+
+                _limiter = RedisRateLimiter(
+                    get_redis(),
+                    settings.gemini_rate_limit_rpm,
+                    settings.gemini_rate_limit_tpm,
+                    max_wait_seconds=settings.gemini_rate_limit_max_wait_seconds,
+                )
+            else:
+                _limiter = InProcessRateLimiter(
+                    settings.gemini_rate_limit_rpm,
+                    settings.gemini_rate_limit_tpm,
+                    max_wait_seconds=settings.gemini_rate_limit_max_wait_seconds,
+                )
+        return _limiter
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import logging
+import threading
+
+import redis
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_client: redis.Redis | None = None
+_client_lock = threading.Lock()
+
+
+def get_redis() -> redis.Redis:
+    """Return this process's Redis client; its connection pool is shared by all threads."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = redis.Redis.from_url(get_settings().redis_url or "redis://localhost:6379/0")
+        return _client
+
+
+def close_redis() -> None:
+    """Close the process's Redis connections; the next get_redis() opens a new client."""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        try:
+            client.close()
+        except Exception as exc:  # noqa: BLE001
+            logger.error(f"Failed to close Redis client: {exc}")
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from collections.abc import Iterator
+from typing import Any, Protocol
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_document_text(text: str) -> str:
+    """Normalize text so cosmetic differences do not defeat the cache."""
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+    return "\n".join(line.rstrip() for line in text.split("\n")).strip()
+
+
+def _config_fingerprint(generation_config: Any) -> str:
+    if generation_config is None:
+        return ""
+    if hasattr(generation_config, "model_dump_json"):
+        return generation_config.model_dump_json(exclude_none=True)
+    return repr(generation_config)
+
+
+def make_cache_key(
+        document_text: str, system_prompt: str, model: str, generation_config: Any = None
+) -> str:
+    """Content address of a Gemini request: document, prompt, model and generation config."""
+    digest = hashlib.sha256()
+    for part in (
+        normalize_document_text(document_text),
+        system_prompt or "",
+        model,
+        _config_fingerprint(generation_config),
+    ):
+        data = part.encode("utf-8")
+        # Length prefix keeps the key unambiguous across field boundaries
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> str | None: ...
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+class MemoryCacheBackend:
+    """In-process LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCacheBackend:
+    """On-disk cache shared by all processes on one host."""
+
+    def __init__(self, path: str, max_entries: int = 512):
+        self.path = path
+        self.max_entries = max_entries
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS gemini_response_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_gemini_response_cache_accessed "
+                "ON gemini_response_cache (accessed_at)"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM gemini_response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                conn.execute("DELETE FROM gemini_response_cache WHERE key = ?", (key,))
+                return None
+            conn.execute(
+                "UPDATE gemini_response_cache SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            return row[0]
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO gemini_response_cache "
+                "(key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl_seconds, now),
+            )
+            conn.execute("DELETE FROM gemini_response_cache WHERE expires_at <= ?", (now,))
+            conn.execute(
+                """
+                DELETE FROM gemini_response_cache WHERE key IN (
+                    SELECT key FROM gemini_response_cache
+                    ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM gemini_response_cache")
+
+
+class RedisCacheBackend:
+    """Cache shared across hosts; entries expire via Redis TTL, size is bounded by LRU order."""
+
+    def __init__(self, client: Any, max_entries: int = 512, prefix: str = "gemini_cache:"):
+        self.client = client
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self._index = f"{prefix}index"
+
+    def get(self, key: str) -> str | None:
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            self.client.zrem(self._index, key)
+            return None
+        self.client.zadd(self._index, {key: time.time()})
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        pipe = self.client.pipeline()
+        pipe.set(self.prefix + key, value, ex=ttl_seconds)
+        pipe.zadd(self._index, {key: time.time()})
+        pipe.execute()
+
+        overflow = self.client.zcard(self._index) - self.max_entries
+        if overflow > 0:
+            evicted = self.client.zrange(self._index, 0, overflow - 1)
+            if evicted:
+                keys = [k.decode("utf-8") if isinstance(k, bytes) else k for k in evicted]
+                pipe = self.client.pipeline()
+                pipe.delete(*[self.prefix + k for k in keys])
+                pipe.zrem(self._index, *keys)
+                pipe.execute()
+
+    def clear(self) -> None:
+        keys = self.client.zrange(self._index, 0, -1)
+        if keys:
+            decoded = [k.decode("utf-8") if isinstance(k, bytes) else k for k in keys]
+            self.client.delete(*[self.prefix + k for k in decoded])
+        self.client.delete(self._index)
+
+
+class ResponseCache:
+    """Content-addressed cache of Gemini responses with hit/miss counters."""
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: int = 86_400):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def _count(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def get(self, key: str) -> str | None:
+        try:
+            value = self.backend.get(key)
+        except Exception as exc:  # noqa: BLE001
+            # A broken cache must never fail the analysis itself
+            logger.error(f"Response cache read failed: {exc}")
+            self._count("errors")
+            value = None
+        self._count("hits" if value is not None else "misses")
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        try:
+            self.backend.set(key, value, self.ttl_seconds)
+        except Exception as exc:  # noqa: BLE001
+            logger.error(f"Response cache write failed: {exc}")
+            self._count("errors")
+
+    def get_json(self, key: str) -> Any | None:
+        value = self.get(key)
+        return json.loads(value) if value is not None else None
+
+    def set_json(self, key: str, value: Any) -> None:
+        self.set(key, json.dumps(value, ensure_ascii=False))
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+_cache: ResponseCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache | None:
+    """Return the process-wide response cache configured in settings, or None if disabled."""
+    global _cache
+    settings = get_settings()
+    if settings.gemini_cache_backend == "off":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            backend: CacheBackend
+            if settings.gemini_cache_backend == "redis":
+                from .redis_client import get_redis
+
+                backend = RedisCacheBackend(
+                    get_redis(), max_entries=settings.gemini_cache_max_entries
+                )
+            elif settings.gemini_cache_backend == "sqlite":
+                backend = SQLiteCacheBackend(
+                    settings.gemini_cache_path, max_entries=settings.gemini_cache_max_entries
+                )
+            else:
+                backend = MemoryCacheBackend(max_entries=settings.gemini_cache_max_entries)
+            _cache = ResponseCache(backend, ttl_seconds=settings.gemini_cache_ttl_seconds)
+        return _cache
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from ..config import get_settings
+from .task_lease import LeaseHeld, LeaseLost, LeaseStore, RedisLeaseStore, TaskLease
+
+logger = logging.getLogger(__name__)
+
+StatusCallback = Callable[[str], None]
+
+_WAIT_MESSAGE = "An identical analysis is already running, waiting for its result"
+
+
+class InFlightLeaseLost(Exception):
+    """Raised when the ``inflight:`` lease expired or was taken over mid-computation.
+
+    Deliberately not a LeaseLost: the caller's own task lease is still held,
+    so the caller should treat this as an ordinary, retryable failure.
+    """
+
+
+class SingleFlight:
+    """In-flight registry: identical concurrent computations run once and share the result.
+
+    Callers in the same process attach to the running coroutine directly. With
+    a Redis lease store, the first caller anywhere takes an ``inflight:`` lease
+    on the key (renewed while it computes) and publishes the JSON result under
+    ``inflight_result:``; callers on other workers poll for that result. If the
+    leader dies or fails, its lease disappears without a result and the next
+    waiter computes instead.
+    """
+
+    def __init__(
+            self,
+            lease_store: LeaseStore | None = None,
+            lease_ttl_seconds: float = 60.0,
+            result_ttl_seconds: float = 300.0,
+            poll_interval_seconds: float = 1.0,
+    ):
+        self.lease_store = lease_store
+        self.lease_ttl_seconds = lease_ttl_seconds
+        self.result_ttl_seconds = result_ttl_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self._local: dict[str, asyncio.Future[Any]] = {}
+
+    async def do(
+            self,
+            key: str,
+            compute: Callable[[], Awaitable[Any]],
+            on_wait: StatusCallback | None = None,
+    ) -> Any:
+        """Return compute()'s result, unless an identical call is in flight; then wait for it."""
+        while (running := self._local.get(key)) is not None:
+            logger.info(f"Joined in-flight analysis {key[:12]} in this process")
+            if on_wait:
+                on_wait(_WAIT_MESSAGE)
+            try:
+                # Shielded so a cancelled follower does not cancel the leader
+                return await asyncio.shield(running)
+            except asyncio.CancelledError:
+                if not running.cancelled():
+                    raise
+                # The leader was cancelled, not failed; the next caller takes over
+
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        self._local[key] = future
+        try:
+            result = await self._do_shared(key, compute, on_wait)
+            future.set_result(result)
+            return result
+        except Exception as exc:
+            future.set_exception(exc)
+            # Followers retrieve it; mark it retrieved so asyncio does not warn when there are none
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            del self._local[key]
+
+    async def _do_shared(
+            self,
+            key: str,
+            compute: Callable[[], Awaitable[Any]],
+            on_wait: StatusCallback | None,
+    ) -> Any:
+        store = self.lease_store
+        if not isinstance(store, RedisLeaseStore):
+            return await compute()
+
+        result_key = f"inflight_result:{key}"
+        reported = False
+        while True:
+            try:
+                published = await asyncio.to_thread(store.client.get, result_key)
+            except Exception as exc:  # noqa: BLE001
+                logger.error(f"Single-flight store unavailable, computing locally: {exc}")
+                return await compute()
+            if published is not None:
+                logger.info(f"Reused in-flight analysis {key[:12]} from another worker")
+                return json.loads(published)
+
+            lease = TaskLease(store, f"inflight:{key}", self.lease_ttl_seconds)
+            try:
+                await lease.__aenter__()
+            except LeaseHeld:
+                if on_wait and not reported:
+                    on_wait(_WAIT_MESSAGE)
+                    reported = True
+                await asyncio.sleep(self.poll_interval_seconds)
+                continue
+            except Exception as exc:  # noqa: BLE001
+                logger.error(f"Single-flight store unavailable, computing locally: {exc}")
+                return await compute()
+
+            return await self._lead(key, store, lease, compute)
+
+    async def _lead(
+            self,
+            key: str,
+            store: RedisLeaseStore,
+            lease: TaskLease,
+            compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Compute under an acquired ``inflight:`` lease and publish the result for waiters."""
+        try:
+            result = await compute()
+            try:
+                await asyncio.to_thread(
+                    store.client.set,
+                    f"inflight_result:{key}",
+                    json.dumps(result),
+                    px=int(self.result_ttl_seconds * 1000),
+                )
+            except Exception as exc:  # noqa: BLE001
+                logger.error(f"Failed to publish in-flight result: {exc}")
+        except BaseException as exc:
+            try:
+                await lease.__aexit__(type(exc), exc, exc.__traceback__)
+            except LeaseLost as lost:
+                raise InFlightLeaseLost(
+                    f"In-flight lease for analysis {key[:12]} was lost"
+                ) from lost
+            raise
+        # Released only after publishing, so waiters never see the lease gone without a result
+        try:
+            await lease.__aexit__(None, None, None)
+        except LeaseLost:
+            # Lost only after the result was computed and published; it is still valid
+            logger.warning(f"In-flight lease for analysis {key[:12]} lost after it finished")
+        return result
+
+
+_single_flight: SingleFlight | None = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight | None:
+    """Return the process-wide registry configured in settings, or None if disabled."""
+    global _single_flight
+    settings = get_settings()
+    if settings.single_flight_backend == "off":
+        return None
+    with _single_flight_lock:
+        if _single_flight is None:
+            store: LeaseStore | None = None
+            if settings.single_flight_backend == "redis":
+                from .redis_client import get_redis
+
+                store = RedisLeaseStore(get_redis())
+            _single_flight = SingleFlight(
+                store,
+                lease_ttl_seconds=settings.task_lease_ttl_seconds,
+                result_ttl_seconds=settings.single_flight_result_ttl_seconds,
+            )
+        return _single_flight
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import get_settings
+from ..models.task import ACTIVE_TASK_STATUSES, Task
+
+# Tasks in these states are not reused by content dedup, so resubmitting retries them
+_NOT_REUSABLE_STATUSES = ("failed", "canceled")
+
+
+def _digest(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part.encode("utf-8")
+        # Length prefix keeps the key unambiguous across field boundaries
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def make_dedup_key(user: str, content_ref: str, options: dict[str, Any]) -> str:
+    """Key of a submission: who sent it, what it analyzes (content hash or source ref) and how."""
+    return _digest(user, content_ref, json.dumps(options, sort_keys=True))
+
+
+def scope_idempotency_key(user: str, key: str) -> str:
+    """Idempotency keys are chosen by clients, so they are only unique per user."""
+    return _digest(user, key)
+
+
+async def find_by_idempotency_key(db: AsyncSession, scoped_key: str) -> Task | None:
+    res = await db.execute(select(Task).where(Task.idempotency_key == scoped_key))
+    return res.scalars().first()
+
+
+async def find_recent_duplicate(db: AsyncSession, dedup_key: str) -> Task | None:
+    """Latest task with the same dedup key created within the dedup window, if any."""
+    window = get_settings().task_dedup_window_seconds
+    if window <= 0:
+        return None
+    res = await db.execute(
+        select(Task)
+        .where(
+            Task.dedup_key == dedup_key,
+            Task.created_at >= datetime.utcnow() - timedelta(seconds=window),
+            Task.status.not_in(_NOT_REUSABLE_STATUSES),
+        )
+        .order_by(Task.created_at.desc())
+        .limit(1)
+    )
+    return res.scalars().first()
+
+
+async def find_active_duplicate(db: AsyncSession, dedup_key: str) -> Task | None:
+    """The queued or running task with the dedup key, however old; there is at most one."""
+    res = await db.execute(
+        select(Task).where(Task.dedup_key == dedup_key, Task.status.in_(ACTIVE_TASK_STATUSES))
+    )
+    return res.scalars().first()
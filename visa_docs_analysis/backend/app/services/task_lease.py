@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from types import TracebackType
+from typing import Any
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseHeld(Exception):
+    """Raised when another live worker holds the lease."""
+
+
+class LeaseLost(Exception):
+    """Raised when a lease expired or was taken over while its work was still running."""
+
+
+class LeaseStore:
+    """Expiring ownership records keyed by name; only the owner may renew or release."""
+
+    def acquire(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        raise NotImplementedError
+
+    def renew(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        raise NotImplementedError
+
+    def release(self, key: str, owner: str) -> None:
+        raise NotImplementedError
+
+
+class InProcessLeaseStore(LeaseStore):
+    """Leases for the threads of a single process."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._leases: dict[str, tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _live_owner(self, key: str) -> str | None:
+        lease = self._leases.get(key)
+        if lease is None or lease[1] <= self.clock():
+            return None
+        return lease[0]
+
+    def acquire(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        with self._lock:
+            # An expired lease is free to take over
+            if self._live_owner(key) not in (None, owner):
+                return False
+            self._leases[key] = (owner, self.clock() + ttl_seconds)
+            return True
+
+    def renew(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        with self._lock:
+            if self._live_owner(key) != owner:
+                return False
+            self._leases[key] = (owner, self.clock() + ttl_seconds)
+            return True
+
+    def release(self, key: str, owner: str) -> None:
+        with self._lock:
+            if self._live_owner(key) == owner:
+                del self._leases[key]
+
+
+# Extend or delete the key only while it still holds the caller's owner token
+_REDIS_RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_REDIS_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisLeaseStore(LeaseStore):
+    """Leases shared by all workers using the same Redis and prefix.
+
+    A lease is a key holding the owner token with a PX expiry; SET NX only
+    succeeds once the previous owner released it or stopped renewing it.
+    """
+
+    def __init__(self, client: Any, prefix: str = "task_lease:"):
+        self.client = client
+        self.prefix = prefix
+
+    def acquire(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        return bool(
+            self.client.set(self.prefix + key, owner, nx=True, px=int(ttl_seconds * 1000))
+        )
+
+    def renew(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        renewed = self.client.eval(
+            _REDIS_RENEW_SCRIPT, 1, self.prefix + key, owner, int(ttl_seconds * 1000)
+        )
+        return bool(int(renewed))
+
+    def release(self, key: str, owner: str) -> None:
+        self.client.eval(_REDIS_RELEASE_SCRIPT, 1, self.prefix + key, owner)
+
+
+class TaskLease:
+    """Hold a lease for the duration of an ``async with`` block, renewing it in the background.
+
+    Entering raises LeaseHeld if another worker holds a live lease. If a
+    renewal fails because the lease expired and someone else took it over,
+    the block is cancelled and LeaseLost is raised, so two workers never keep
+    running the same work. If the store cannot be reached on entry, the
+    fallback store is used instead.
+    """
+
+    def __init__(
+            self,
+            store: LeaseStore,
+            key: str,
+            ttl_seconds: float = 60.0,
+            fallback: LeaseStore | None = None,
+    ):
+        self.store = store
+        self.fallback = fallback
+        self.key = key
+        self.ttl_seconds = ttl_seconds
+        self.owner = uuid.uuid4().hex
+        self.lost = False
+        self._heartbeat: asyncio.Task[None] | None = None
+        self._holder: asyncio.Task[Any] | None = None
+
+    async def __aenter__(self) -> TaskLease:
+        try:
+            acquired = await asyncio.to_thread(
+                self.store.acquire, self.key, self.owner, self.ttl_seconds
+            )
+        except Exception as exc:  # noqa: BLE001
+            if self.fallback is None:
+                raise
+            logger.error(f"Lease store unavailable, using in-process lease for '{self.key}': {exc}")
+            self.store = self.fallback
+            acquired = await asyncio.to_thread(
+                self.store.acquire, self.key, self.owner, self.ttl_seconds
+            )
+        if not acquired:
+            raise LeaseHeld(f"Lease '{self.key}' is held by another worker")
+        self._holder = asyncio.current_task()
+        self._heartbeat = asyncio.create_task(self._renew_periodically())
+        return self
+
+    async def _renew_periodically(self) -> None:
+        interval = self.ttl_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                renewed = await asyncio.to_thread(
+                    self.store.renew, self.key, self.owner, self.ttl_seconds
+                )
+            except Exception as exc:  # noqa: BLE001
+                # The lease is still ours until it expires; try again at the next beat
+                logger.error(f"Failed to renew lease '{self.key}': {exc}")
+                continue
+            if not renewed:
+                logger.error(f"Lease '{self.key}' was lost; stopping its work")
+                self.lost = True
+                if self._holder is not None:
+                    self._holder.cancel()
+                return
+
+    async def __aexit__(
+            self,
+            exc_type: type[BaseException] | None,
+            exc: BaseException | None,
+            tb: TracebackType | None,
+    ) -> None:
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+        if self.lost:
+            uncancel = getattr(self._holder, "uncancel", None)
+            if uncancel is not None:
+                uncancel()
+            raise LeaseLost(f"Lease '{self.key}' expired or was taken over") from exc
+        try:
+            await asyncio.to_thread(self.store.release, self.key, self.owner)
+        except Exception as exc_release:  # noqa: BLE001
+            # It expires on its own after ttl_seconds
+            logger.error(f"Failed to release lease '{self.key}': {exc_release}")
+
+
+_store: LeaseStore | None = None
+_fallback_store = InProcessLeaseStore()
+_store_lock = threading.Lock()
+
+
+def get_lease_store() -> LeaseStore | None:
+    """Return the lease store configured in settings, or None if leases are disabled."""
+    global _store
+    settings = get_settings()
+    if settings.task_lease_backend == "off":
+        return None
+    with _store_lock:
+        if _store is None:
+            if settings.task_lease_backend == "redis":
+                from .redis_client import get_redis
+
+                _store = RedisLeaseStore(get_redis())
+            else:
+                _store = _fallback_store
+        return _store
+
+
+def task_lease(task_id: str) -> TaskLease | None:
+    """Lease for one analysis task id, or None if leases are disabled.
+
+    If Redis cannot be reached the lease falls back to this process only,
+    which still stops a redelivery picked up by the same worker process.
+    """
+    store = get_lease_store()
+    if store is None:
+        return None
+    return TaskLease(
+        store,
+        f"analysis:{task_id}",
+        get_settings().task_lease_ttl_seconds,
+        fallback=_fallback_store if store is not _fallback_store else None,
+    )
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import logging
+import math
+import re
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ModelLimits:
+    input_tokens: int
+    output_tokens: int
+
+
+MODEL_LIMITS: dict[str, ModelLimits] = {
+    "gemini-2.5-pro": ModelLimits(input_tokens=1_048_576, output_tokens=65_536),
+    "gemini-2.5-flash": ModelLimits(input_tokens=1_048_576, output_tokens=65_536),
+}
+DEFAULT_MODEL_LIMITS = ModelLimits(input_tokens=1_048_576, output_tokens=65_536)
+
+# Ask the API for an exact count when the local estimate is this close to the budget
+EXACT_COUNT_BAND = 0.3
+
+# Runs of one script class; each class has its own chars-per-token ratio
+_TOKEN_CLASS_PATTERN = re.compile(
+    r"(?P<ascii>[A-Za-z]+)"
+    r"|(?P<digits>\d+)"
+    "|(?P<cjk>[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+)"
+    r"|(?P<letters>[^\W\d_]+)"
+    r"|(?P<symbol>[^\w\s])"
+    r"|(?P<newline>\n)"
+)
+_CHARS_PER_TOKEN = {
+    "ascii": 4.0,
+    "digits": 1.0,  # numbers are split into single digits
+    "cjk": 1.0,
+    "letters": 2.5,  # Cyrillic, Greek, accented Latin words
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of text locally, weighting each run of characters by script."""
+    if not text:
+        return 0
+    tokens = 0
+    for match in _TOKEN_CLASS_PATTERN.finditer(text):
+        ratio = _CHARS_PER_TOKEN.get(match.lastgroup or "")
+        if ratio is None:
+            tokens += 1
+        else:
+            tokens += math.ceil((match.end() - match.start()) / ratio)
+    return tokens
+
+
+def count_tokens(client: Any, model: str, text: str) -> int | None:
+    """Count tokens exactly through the API; None if the call fails."""
+    try:
+        return int(client.models.count_tokens(model=model, contents=text).total_tokens)
+    except Exception as exc:  # noqa: BLE001
+        logger.error(f"Exact token count failed, using local estimate: {exc}")
+        return None
+
+
+@dataclass(frozen=True)
+class TokenPlan:
+    """How a document is sent to the model, with the numbers behind the decision."""
+
+    model: str
+    strategy: str  # "single" or "chunked"
+    document_chars: int
+    document_tokens: int
+    prompt_tokens: int
+    exact: bool
+    input_limit: int
+    output_limit: int
+    input_budget: int
+    expected_output_tokens: int
+    chunk_count: int
+    chunk_tokens: int
+    chunk_chars: int
+
+    @property
+    def chunked(self) -> bool:
+        return self.strategy == "chunked"
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    def describe(self) -> str:
+        source = "counted" if self.exact else "estimated"
+        summary = (
+            f"{self.model}: document {self.document_tokens} tokens "
+            f"({source}, {self.document_chars} chars), prompt {self.prompt_tokens} tokens, "
+            f"budget {self.input_budget}/{self.input_limit} input tokens, "
+            f"~{self.expected_output_tokens}/{self.output_limit} output tokens -> {self.strategy}"
+        )
+        if self.chunked:
+            summary += (
+                f" into {self.chunk_count} chunks of ~{self.chunk_tokens} tokens "
+                f"({self.chunk_chars} chars)"
+            )
+        return summary
+
+
+def plan_request(
+        document: str,
+        system_prompt: str,
+        model: str,
+        client: Any = None,
+        overlap_chars: int = 0,
+        limits: ModelLimits | None = None,
+) -> TokenPlan:
+    """Choose single-call vs chunked processing from the model's input and output limits."""
+    settings = get_settings()
+    limits = limits or MODEL_LIMITS.get(model, DEFAULT_MODEL_LIMITS)
+    output_ratio = settings.gemini_output_tokens_per_input_token
+    thinking_reserve = settings.gemini_thinking_token_reserve
+
+    prompt_tokens = estimate_tokens(system_prompt or "")
+    document_tokens = estimate_tokens(document)
+
+    input_budget = int(limits.input_tokens * (1 - settings.gemini_token_safety_margin))
+    input_budget -= prompt_tokens
+    # Largest document slice whose expected response still fits into the output limit
+    output_bound = int((limits.output_tokens - thinking_reserve) / output_ratio)
+    input_budget = max(1, min(input_budget, output_bound))
+
+    exact = False
+    borderline = abs(document_tokens - input_budget) <= input_budget * EXACT_COUNT_BAND
+    if client is not None and settings.gemini_exact_token_count and borderline:
+        counted = count_tokens(client, model, document)
+        if counted is not None:
+            document_tokens = counted
+            exact = True
+
+    chars_per_token = len(document) / document_tokens if document_tokens else 1.0
+
+    if document_tokens <= input_budget:
+        chunk_count = 1
+        chunk_tokens = document_tokens
+        chunk_chars = len(document)
+    else:
+        # Overlap repeats text in every chunk after the first
+        overlap_tokens = math.ceil(overlap_chars / chars_per_token)
+        chunk_count = math.ceil(document_tokens / max(1, input_budget - overlap_tokens))
+        # Even chunks keep the calls about equally long
+        chunk_tokens = min(input_budget, math.ceil(document_tokens / chunk_count) + overlap_tokens)
+        chunk_chars = max(1, int(chunk_tokens * chars_per_token))
+
+    return TokenPlan(
+        model=model,
+        strategy="single" if chunk_count == 1 else "chunked",
+        document_chars=len(document),
+        document_tokens=document_tokens,
+        prompt_tokens=prompt_tokens,
+        exact=exact,
+        input_limit=limits.input_tokens,
+        output_limit=limits.output_tokens,
+        input_budget=input_budget,
+        expected_output_tokens=thinking_reserve + math.ceil(chunk_tokens * output_ratio),
+        chunk_count=chunk_count,
+        chunk_tokens=chunk_tokens,
+        chunk_chars=chunk_chars,
+    )
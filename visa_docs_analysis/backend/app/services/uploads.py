@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+
+from fastapi import UploadFile
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured size limit."""
+
+
+@dataclass(frozen=True)
+class StoredUpload:
+    path: str
+    sha256: str
+    size: int
+
+
+def _content_path(uploads_dir: str, digest: str) -> str:
+    # Two-character fan-out keeps directories small
+    return os.path.join(uploads_dir, digest[:2], digest)
+
+
+async def save_upload(
+        file: UploadFile,
+        uploads_dir: str | None = None,
+        max_bytes: int | None = None,
+        chunk_size: int | None = None,
+) -> StoredUpload:
+    """Stream an upload to content-addressed storage, hashing it chunk by chunk.
+
+    Only one chunk is held in memory at a time. The file lands at
+    ``<uploads_dir>/<sha[:2]>/<sha>``, so identical uploads are stored once.
+    Raises UploadTooLarge as soon as the size limit is passed.
+    """
+    settings = get_settings()
+    uploads_dir = uploads_dir or settings.uploads_dir
+    max_bytes = max_bytes if max_bytes is not None else settings.upload_max_bytes
+    chunk_size = chunk_size or settings.upload_chunk_bytes
+
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLarge(f"Upload exceeds the {max_bytes} byte limit")
+
+    # Temporary file on the same volume so the final move is an atomic rename
+    tmp_dir = os.path.join(uploads_dir, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(chunk_size):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds the {max_bytes} byte limit")
+                digest.update(chunk)
+                await asyncio.to_thread(out.write, chunk)
+
+        sha256 = digest.hexdigest()
+        path = _content_path(uploads_dir, sha256)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            logger.info(f"Upload {sha256[:12]} already stored ({size} bytes)")
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        return StoredUpload(path=path, sha256=sha256, size=size)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
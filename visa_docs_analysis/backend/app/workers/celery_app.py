@@ -4,6 +4,8 @@ import os
 
 from celery import Celery
 
+from ..config import get_settings
+
 celery = Celery(
     "worker",
     broker=os.environ.get("REDIS_URL", "redis://localhost:6379/0"),
@@ -12,3 +14,13 @@ celery = Celery(
 
 celery.conf.task_acks_late = True
 celery.conf.worker_prefetch_multiplier = 1
+
+if get_settings().worker_mode == "async":
+    # Analyses mostly wait on Gemini: pool threads hand their coroutines to the process's
+    # shared event loop (see runtime.py), so one process runs many of them concurrently.
+    # Each thread holds its task until the analysis finishes, so acks_late still applies.
+    celery.conf.worker_pool = "threads"
+    celery.conf.worker_concurrency = get_settings().worker_async_concurrency
+
+# Per-process event loop, database engine and Redis client (registers worker signal handlers)
+from . import lifecycle  # noqa: E402, F401
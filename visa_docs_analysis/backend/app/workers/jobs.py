@@ -1,16 +1,18 @@
 from __future__ import annotations
 
-import asyncio
 import json
 import logging
 
 from sqlalchemy import select
 
 from .celery_app import celery
+from .runtime import get_runtime
 from ..db.session import SessionLocal
 from ..models.task import Task
 from ..models.task import TaskInput
 from ..services.analysis_service import AnalysisService
+from ..services.progress import ProgressPublisher
+from ..services.task_lease import LeaseHeld, LeaseLost, task_lease
 
 logger = logging.getLogger(__name__)
 
@@ -23,15 +25,20 @@ logger = logging.getLogger(__name__)
     max_retries=5,
 )
 def run_analyze_task(self, task_id: str) -> None:
-    # Run in sync Celery context; create async session for DB operations
+    # Runs in a Celery pool thread or process; the coroutine executes on the process's
+    # persistent event loop, next to other analyses
     logger.info(f"Starting analysis task {task_id}")
 
-    async def _inner() -> None:
+    async def _analyze() -> None:
         async with SessionLocal() as db:  # type: AsyncSession
             task = await db.get(Task, task_id)
             if task is None:
                 logger.error(f"Task {task_id} not found")
                 return
+            if task.status == "succeeded":
+                # Redelivered after another worker finished it
+                logger.info(f"Task {task_id} already succeeded; skipping")
+                return
             task.status = "running"
             task.progress = 10
             await db.flush()
@@ -46,13 +53,37 @@ def run_analyze_task(self, task_id: str) -> None:
                 await svc.run_analyze(task, payload)
                 task.status = "succeeded"
                 task.progress = 100
+                task.error = None
                 await db.commit()
+                ProgressPublisher().publish(task_id, 100, "succeeded")
                 logger.info(f"Task {task_id} succeeded")
             except Exception as e:  # noqa: BLE001
                 await db.rollback()
-                task.status = "failed"
+                final = self.request.retries >= self.max_retries
+                # Retries resume from the stage checkpoints committed during this attempt
+                task.status = "failed" if final else "pending"
                 task.error = str(e)
                 await db.commit()
-                logger.error(f"Task {task_id} failed: {e}")
+                if final:
+                    ProgressPublisher().publish(task_id, task.progress, "failed", str(e))
+                    logger.error(f"Task {task_id} failed: {e}")
+                    return
+                ProgressPublisher().publish(task_id, task.progress, "retrying", str(e))
+                logger.warning(f"Task {task_id} attempt {self.request.retries + 1} failed: {e}")
+                raise
+
+    async def _inner() -> None:
+        # acks_late redelivers long-running tasks; the lease keeps a second copy from running
+        lease = task_lease(task_id)
+        if lease is None:
+            await _analyze()
+            return
+        try:
+            async with lease:
+                await _analyze()
+        except LeaseHeld:
+            logger.warning(f"Task {task_id} is already running on another worker; skipping")
+        except LeaseLost:
+            logger.warning(f"Task {task_id} lease was taken over; stopped this copy")
 
-    asyncio.run(_inner())
+    get_runtime().run(_inner())
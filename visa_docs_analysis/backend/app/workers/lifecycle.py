@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any
+
+from celery.signals import (
+    worker_init,
+    worker_process_init,
+    worker_process_shutdown,
+    worker_shutdown,
+)
+from sqlalchemy import text
+
+from ..config import get_settings
+from ..db.session import dispose_engine, init_engine
+from ..services.http_clients import close_http_clients
+from ..services.redis_client import close_redis, get_redis
+from .runtime import get_runtime, shutdown_runtime
+
+logger = logging.getLogger(__name__)
+
+_initialized = False
+_state_lock = threading.Lock()
+
+
+def init_process_resources() -> None:
+    """Create the per-process event loop, database engine and Redis client.
+
+    Runs once in every process that executes tasks, after the pool forked, so
+    no loop thread, pooled connection or socket is shared across a fork. Tasks
+    then reuse the pooled connections instead of connecting on every run.
+    """
+    global _initialized
+    with _state_lock:
+        if _initialized:
+            return
+        settings = get_settings()
+        runtime = get_runtime()
+        # Each concurrent analysis keeps one connection checked out while it runs
+        pool_size = settings.worker_async_concurrency if settings.worker_mode == "async" else 1
+        engine = init_engine(pool_size=max(pool_size, 1), max_overflow=settings.db_max_overflow)
+        get_redis()
+        _initialized = True
+
+    async def _warm_up() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    try:
+        runtime.run(_warm_up(), timeout=30)
+    except Exception as exc:  # noqa: BLE001
+        # Not fatal: the pool connects on first use instead
+        logger.error(f"Database warm-up failed: {exc}")
+    logger.info(f"Worker process resources ready (db pool size {max(pool_size, 1)})")
+
+
+def shutdown_process_resources() -> None:
+    """Dispose the engine and HTTP clients on their loop, then close Redis and the loop."""
+    global _initialized
+    with _state_lock:
+        if not _initialized:
+            return
+        _initialized = False
+    try:
+        get_runtime().run(dispose_engine(), timeout=30)
+    except Exception as exc:  # noqa: BLE001
+        logger.error(f"Failed to dispose database engine: {exc}")
+    try:
+        get_runtime().run(close_http_clients(), timeout=30)
+    except Exception as exc:  # noqa: BLE001
+        logger.error(f"Failed to close HTTP clients: {exc}")
+    close_redis()
+    shutdown_runtime()
+    logger.info("Worker process resources released")
+
+
+def _runs_tasks_in_main_process(worker: Any) -> bool:
+    # The thread pool never forks and sends no worker_process_init
+    return "thread" in str(getattr(worker, "pool_cls", "")).lower()
+
+
+@worker_process_init.connect
+def _on_worker_process_init(**_: Any) -> None:
+    init_process_resources()
+
+
+@worker_process_shutdown.connect
+def _on_worker_process_shutdown(**_: Any) -> None:
+    shutdown_process_resources()
+
+
+@worker_init.connect
+def _on_worker_init(sender: Any = None, **_: Any) -> None:
+    if _runs_tasks_in_main_process(sender):
+        init_process_resources()
+
+
+@worker_shutdown.connect
+def _on_worker_shutdown(**_: Any) -> None:
+    shutdown_process_resources()
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from collections.abc import Coroutine
+from concurrent.futures import Future
+from typing import Any, TypeVar
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class AsyncRuntime:
+    """A persistent event loop in a background thread, shared by all tasks of a worker process.
+
+    Celery pool threads call run() with a coroutine; it is scheduled on the
+    shared loop and the calling thread blocks until it finishes, so the task is
+    still acknowledged only after the analysis completes (acks_late). Because
+    analyses spend their time awaiting Gemini, one loop drives many of them at
+    once; max_concurrency bounds how many run at the same time.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max(1, max_concurrency)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._started = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        self.start()
+        assert self._loop is not None
+        return self._loop
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._started.clear()
+            self._thread = threading.Thread(
+                target=self._run_loop, name="async-runtime", daemon=True
+            )
+            self._thread.start()
+        self._started.wait()
+
+    def _run_loop(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        logger.info(f"Async worker runtime started (max {self.max_concurrency} concurrent tasks)")
+        self._started.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    async def _limited(self, coro: Coroutine[Any, Any, T]) -> T:
+        assert self._semaphore is not None
+        async with self._semaphore:
+            return await coro
+
+    def submit(self, coro: Coroutine[Any, Any, T]) -> Future[T]:
+        """Schedule a coroutine on the shared loop without waiting for it."""
+        return asyncio.run_coroutine_threadsafe(self._limited(coro), self.loop)
+
+    def run(self, coro: Coroutine[Any, Any, T], timeout: float | None = None) -> T:
+        """Run a coroutine on the shared loop and block the calling thread until it completes."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("AsyncRuntime.run() cannot be called from the runtime loop")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            # Timeouts and worker shutdown cancel the coroutine instead of leaking it
+            future.cancel()
+            raise
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Cancel outstanding coroutines, stop the loop and join its thread."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None or thread is None or not thread.is_alive():
+                return
+
+            async def _cancel_pending() -> None:
+                current = asyncio.current_task()
+                pending = [task for task in asyncio.all_tasks() if task is not current]
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+
+            try:
+                asyncio.run_coroutine_threadsafe(_cancel_pending(), loop).result(timeout)
+            except Exception as exc:  # noqa: BLE001
+                logger.error(f"Failed to cancel pending tasks on shutdown: {exc}")
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            self._loop = None
+            self._thread = None
+            logger.info("Async worker runtime stopped")
+
+
+_runtime: AsyncRuntime | None = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime() -> AsyncRuntime:
+    """Return this process's runtime, starting it on first use (i.e. after the pool forks)."""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = AsyncRuntime(get_settings().worker_async_concurrency)
+        runtime = _runtime
+    runtime.start()
+    return runtime
+
+
+def shutdown_runtime() -> None:
+    global _runtime
+    with _runtime_lock:
+        runtime, _runtime = _runtime, None
+    if runtime is not None:
+        runtime.stop()
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from app.services.progress import progress_keys
+from app.services.progress_hub import ProgressHub
+
+
+@pytest.fixture
+def hub():
+    fakeredis = pytest.importorskip("fakeredis")
+    hub = ProgressHub("redis://unused", max_queued=10)
+    hub._client = fakeredis.FakeAsyncRedis()
+    return hub
+
+
+async def _publish_history(hub: ProgressHub, task_id: str, count: int) -> None:
+    history = [json.dumps({"seq": seq, "stage": "issue"}) for seq in range(1, count + 1)]
+    await hub._client.rpush(progress_keys(task_id)["history"], *history)
+
+
+async def _drain(subscription) -> list[int]:
+    seqs = []
+    while not subscription._queue.empty():
+        seqs.append((await subscription.get())["seq"])
+    return seqs
+
+
+async def test_catch_up_offers_only_messages_after_last_seq(hub: ProgressHub) -> None:
+    await _publish_history(hub, "t", 25)
+    subscription = hub.subscribe("t")
+    hub._reader.cancel()
+    subscription.mark_delivered(20)
+
+    await hub._catch_up()
+
+    assert await _drain(subscription) == [21, 22, 23, 24, 25]
+    # A second catch-up, e.g. after another reconnect, queues nothing twice
+    await hub._catch_up()
+    assert await _drain(subscription) == []
+
+
+async def test_catch_up_larger_than_the_queue_keeps_the_subscriber(hub: ProgressHub) -> None:
+    await _publish_history(hub, "t", 25)
+    subscription = hub.subscribe("t")
+    hub._reader.cancel()
+    subscription._offer({"seq": 1, "stage": "issue"})
+
+    await hub._catch_up()
+
+    assert not subscription.dropped
+    assert hub.subscriber_count == 1
+    assert await _drain(subscription) == [1, *range(17, 26)]
+
+    # Live messages continue after the replayed ones
+    hub._fan_out("t", {"seq": 26, "stage": "issue"})
+    assert await _drain(subscription) == [26]
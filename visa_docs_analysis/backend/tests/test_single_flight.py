@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.services.single_flight import InFlightLeaseLost, SingleFlight
+from app.services.task_lease import LeaseLost, RedisLeaseStore
+
+
+@pytest.fixture
+def fake_redis():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return fakeredis.FakeRedis()
+
+
+async def test_leader_publishes_result_and_releases_its_lease(fake_redis) -> None:
+    flight = SingleFlight(RedisLeaseStore(fake_redis), lease_ttl_seconds=1.0)
+
+    async def compute() -> list[str]:
+        return ["issue"]
+
+    assert await flight.do("k", compute) == ["issue"]
+    assert fake_redis.get("inflight_result:k") == b'["issue"]'
+    assert fake_redis.get("task_lease:inflight:k") is None
+
+
+async def test_lost_inflight_lease_is_not_reported_as_the_task_lease(fake_redis) -> None:
+    flight = SingleFlight(RedisLeaseStore(fake_redis), lease_ttl_seconds=0.3)
+
+    async def compute() -> list[str]:
+        # Another worker takes the lease over before the next renewal
+        fake_redis.set("task_lease:inflight:k", "someone-else")
+        await asyncio.sleep(1)
+        return ["issue"]
+
+    with pytest.raises(InFlightLeaseLost) as raised:
+        await flight.do("k", compute)
+
+    assert not isinstance(raised.value, LeaseLost)
+    assert isinstance(raised.value.__cause__, LeaseLost)
+    assert fake_redis.get("inflight_result:k") is None
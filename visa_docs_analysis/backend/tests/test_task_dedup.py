@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.api.v1 import routes_tasks
+from app.models import Base
+from app.models.task import Task
+from app.services.task_dedup import find_active_duplicate
+
+
+@pytest.fixture
+async def db() -> AsyncIterator[AsyncSession]:
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+
+async def _add_task(db: AsyncSession, status: str, age: timedelta = timedelta()) -> Task:
+    task = Task(
+        type="document_inconsistency_check",
+        status=status,
+        dedup_key="k",
+        created_at=datetime.utcnow() - age,
+    )
+    db.add(task)
+    await db.commit()
+    return task
+
+
+async def test_only_one_active_task_per_dedup_key(db: AsyncSession) -> None:
+    await _add_task(db, "failed")
+    await _add_task(db, "succeeded")
+    active = await _add_task(db, "running")
+
+    db.add(Task(type="document_inconsistency_check", status="pending", dedup_key="k"))
+    with pytest.raises(IntegrityError):
+        await db.flush()
+    await db.rollback()
+
+    assert (await find_active_duplicate(db, "k")).id == active.id
+
+
+async def test_losing_insert_returns_the_active_task(db: AsyncSession, monkeypatch) -> None:
+    monkeypatch.setattr(routes_tasks.run_analyze_task, "delay", lambda task_id: None)
+    # Older than the dedup window, so only the unique index catches the repeat
+    active = await _add_task(db, "pending", age=timedelta(days=1))
+
+    assert await routes_tasks._create_task(db, {}, None, "k") is None
+    existing = await routes_tasks._find_conflicting_task(db, None, "k")
+    assert existing.id == active.id
+
+    active.status = "failed"
+    await db.commit()
+    assert await routes_tasks._create_task(db, {}, None, "k") is not None